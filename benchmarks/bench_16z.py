@@ -0,0 +1,78 @@
+""" 16z depth decoding time per frame, the native reader's cost for every depth frame.
+
+Reads the 16z depth payloads of a recording (by default a synthetic 640x480 one) and
+decodes each of them a few times; the encoder `OniWriter` uses is timed on the same
+frames for reference.
+
+Usage: python benchmarks/bench_16z.py [path/to/file.oni] [--frames 60 --resolution 640x480]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from player_core import oni_file  # noqa: E402
+from synthetic import make_recording, resolution  # noqa: E402
+
+REPEATS = 3
+
+
+def payloads(path):
+    """ (payload, pixel count) of every depth frame of `path`. """
+    recording = oni_file.OniRecording(path)
+    try:
+        node = recording.node(oni_file.NODE_TYPE_DEPTH)
+        if node.codec != oni_file.CODEC_16Z:
+            raise SystemExit(f'{path}: depth is {node.codec.decode()}, not 16z')
+        mode = node.video_mode
+        count = mode.resolutionX * mode.resolutionY
+        return [(bytes(recording.payload(node, i)), count) for i in range(len(node.frames))]
+    finally:
+        recording.close()
+
+
+def timed(function, items):
+    timings = []
+    for item in items:
+        best = None
+        for _ in range(REPEATS):
+            started = time.perf_counter()
+            function(*item)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings.append(best)
+    return np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', nargs='?', help='.oni recording with 16z depth, default: a synthetic one')
+    parser.add_argument('--frames', type=int, default=60, help='frames of the synthetic recording')
+    parser.add_argument('--resolution', type=resolution, default=(640, 480), help='synthetic frame size')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.path
+        if path is None:
+            width, height = args.resolution
+            path = make_recording(os.path.join(directory, 'bench_16z.oni'), args.frames, width, height)
+        frames = payloads(path)
+
+    decode = timed(oni_file.decompress_16z, frames)
+    depth = [oni_file.decompress_16z(payload, count) for payload, count in frames]
+    encode = timed(oni_file.compress_16z, [(values,) for values in depth])
+    size = np.mean([len(payload) for payload, _ in frames])
+    pixels = frames[0][1]
+    print(f'{os.path.basename(path) if args.path else "synthetic"}: {len(frames)} frames, {pixels} pixels, '
+          f'{size / 1024:.0f} KiB per frame ({size / pixels / 2:.0%} of raw), best of {REPEATS}')
+    for name, ms in (('decode', decode), ('encode', encode)):
+        print(f'{name:<8}p50 {np.percentile(ms, 50):7.2f} ms  p99 {np.percentile(ms, 99):7.2f} ms  '
+              f'{1000 / np.percentile(ms, 50):7.1f} fps')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+""" Clip export time against the length of the clip and of the recording it is cut from.
+
+Synthetic recordings of each --sources length are written from a few pre-encoded
+frames, then clips of each --clips length are copied from their middle. Every clip
+starts by building the frame index of its source, one pass over all record headers;
+that is shown on its own, then for each clip length the copy from an index built
+already and `save_clip` end to end, index included. The copy should cost about the
+same from every source and grow with the clip, the index grows with the source. For
+reference, the last row decodes and re-encodes the same ranges instead.
+
+Usage: python benchmarks/bench_clip.py [--sources 500 2000 8000 --clips 50 200 800 --resolution 640x480]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from player_core import clip  # noqa: E402
+from player_core.backends import close_recording, open_recording  # noqa: E402
+from player_core.export import read_range  # noqa: E402
+from player_core.oni_file import CODEC_16Z, CODEC_JPEG, OniRecording, OniWriter, compress_16z  # noqa: E402
+from synthetic import resolution, scene  # noqa: E402
+
+SCENE_FRAMES = 30
+REPEATS = 3
+
+
+def write_source(path, frames, width, height):
+    """ A `frames` long recording cycling through SCENE_FRAMES pre-encoded frame pairs. """
+    rng = np.random.default_rng(0)
+    payloads = []
+    for i in range(SCENE_FRAMES):
+        depth, color = scene(i, width, height, SCENE_FRAMES, rng)
+        color_payload = cv2.imencode('.jpg', cv2.cvtColor(color, cv2.COLOR_RGB2BGR))[1].tobytes()
+        payloads.append((compress_16z(depth), color_payload))
+    with OniWriter(path, width, height, depth_codec=CODEC_16Z, color_codec=CODEC_JPEG) as writer:
+        for i in range(frames):
+            writer.write_payloads(*payloads[i % SCENE_FRAMES])
+    return path
+
+
+def best_ms(function, *args, **kwargs):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        function(*args, **kwargs)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def reencode_ms(source, target, start, end, width, height):
+    started = time.perf_counter()
+    device, engine = open_recording(source, 'native')
+    with OniWriter(target, width, height, depth_codec=CODEC_16Z, color_codec=CODEC_JPEG) as writer:
+        for _, depth, color in read_range(engine, start, end + 1):
+            writer.write(depth, color)
+    close_recording(device, engine)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sources', type=int, nargs='+', default=[500, 2000, 8000], help='recording lengths')
+    parser.add_argument('--clips', type=int, nargs='+', default=[50, 200, 800], help='clip lengths')
+    parser.add_argument('--resolution', type=resolution, default=(640, 480), help='frame size')
+    parser.add_argument('--no-reencode', action='store_true', help='skip the decode and re-encode reference')
+    args = parser.parse_args()
+
+    width, height = args.resolution
+    clips = [length for length in args.clips if length <= min(args.sources)]
+    with tempfile.TemporaryDirectory() as directory:
+        target = os.path.join(directory, 'clip.oni')
+        print(f'{width}x{height} 16z depth + JPEG color, ms (best of {REPEATS}): '
+              'copy with the index built, save_clip end to end')
+        print(f'{"source":>16} {"index":>8} ' + ' '.join(f'{f"{length} frames":>17}' for length in clips))
+        for frames in args.sources:
+            source = write_source(os.path.join(directory, f'source_{frames}.oni'), frames, width, height)
+            size = os.path.getsize(source) / 2 ** 20
+            index_ms = best_ms(lambda: OniRecording(source).close())
+            recording = OniRecording(source)
+            row = []
+            for length in clips:
+                start = (frames - length) // 2 + 1
+                end = start + length - 1
+                row.append((
+                    best_ms(clip.copy_records, source, target, start, end, recording=recording),
+                    best_ms(clip.save_clip, source, target, start, end),
+                ))
+            recording.close()
+            print(f'{frames:>6} ({size:5.0f} MB) {index_ms:8.1f} '
+                  + ' '.join(f'{copy:8.1f}{total:9.1f}' for copy, total in row), flush=True)
+            if frames != args.sources[-1]:
+                os.remove(source)
+        if not args.no_reencode:
+            row = []
+            for length in clips:
+                start = (frames - length) // 2 + 1
+                row.append(reencode_ms(source, target, start, start + length - 1, width, height))
+            print(f'{"re-encode":>16} {"":>8} ' + ' '.join(f'{"":8}{ms:9.1f}' for ms in row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+""" Microbenchmark of depth rendering: the old convertScaleAbs path against the LUT colorizer.
+
+Usage: python benchmarks/bench_colorize.py [width height]
+"""
+import os
+import sys
+import timeit
+
+import cv2
+import numpy as np
+import qimage2ndarray
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from player_core.colorize import COLORMAPS, DepthColorizer  # noqa: E402
+
+
+def legacy(depth):
+    img = cv2.convertScaleAbs(cv2.cvtColor(depth, cv2.COLOR_BGR2RGB), alpha=(1200.0 / 65535.0))
+    return qimage2ndarray.array2qimage(img)
+
+
+def main(width=640, height=480, number=200):
+    rng = np.random.default_rng(0)
+    depth = rng.integers(0, 8000, size=(height, width), dtype=np.uint16)
+    out = np.empty((height, width, 3), dtype=np.uint8)
+
+    def report(name, func):
+        ms = timeit.timeit(func, number=number) / number * 1000
+        print(f'{name:<24}{ms:8.3f} ms/frame')
+
+    report('convertScaleAbs + qimage', lambda: legacy(depth))
+    for colormap in COLORMAPS:
+        colorizer = DepthColorizer(colormap=colormap)
+        report(f'lut {colormap}', lambda: colorizer.render(depth, out))
+        report(f'lut {colormap} + qimage', lambda: qimage2ndarray.array2qimage(colorizer.render(depth, out)))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))
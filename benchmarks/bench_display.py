@@ -0,0 +1,76 @@
+""" Render and display cost per frame against the size of the view it is shown in.
+
+Synthetic frames go through the prefetcher's render stage (resampling, colorizing,
+color copy) and are shown in an offscreen label of each size, once rendered at full
+resolution and scaled by Qt as before, once rendered at the size the label needs.
+
+Usage: python benchmarks/bench_display.py [--resolution 1280x960 --views 1280x960 640x480 320x240]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from player_core.colorize import DepthColorizer  # noqa: E402
+from player_core.prefetch import HIDDEN, FrameSlot, Prefetcher  # noqa: E402
+from synthetic import resolution, scene  # noqa: E402
+
+SCENE_FRAMES = 30
+
+
+def measure(frames, views, prefetcher, slot, sizes):
+    from PyQt5 import QtCore
+
+    prefetcher.sizes = sizes
+    timings = []
+    for position, (depth, color) in enumerate(frames * 3):
+        started = time.perf_counter()
+        prefetcher.render(position, depth, color, slot)
+        frame_size = QtCore.QSize(depth.shape[1], depth.shape[0])
+        for view, array in zip(views, (slot.depth, slot.color)):
+            view.show(array, frame_size)
+        timings.append(time.perf_counter() - started)
+    ms = np.array(timings[len(frames):]) * 1000
+    return np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+def main():
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtWidgets
+    from player_core.display import FrameView
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resolution', type=resolution, default=(1280, 960), help='frame size')
+    parser.add_argument('--views', type=resolution, nargs='+', default=[(1280, 960), (640, 480), (320, 240)],
+                        help='label sizes')
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])  # noqa: F841
+    width, height = args.resolution
+    rng = np.random.default_rng(0)
+    frames = [scene(i, width, height, SCENE_FRAMES, rng) for i in range(SCENE_FRAMES)]
+    prefetcher = Prefetcher(None, None, DepthColorizer())
+    slot = FrameSlot((height, width), (height, width))
+
+    print(f'{width}x{height} frames, ms per frame (render + display)')
+    print(f'{"view":>10} {"full p50":>9} {"p99":>7} {"fitted p50":>11} {"p99":>7}')
+    for view_width, view_height in args.views:
+        labels = [QtWidgets.QLabel(), QtWidgets.QLabel()]
+        for label in labels:
+            label.setFixedSize(view_width, view_height)
+            label.show()
+        views = [FrameView(label) for label in labels]
+        full = measure(frames, views, prefetcher, slot, (None, None))
+        fitted = measure(frames, views, prefetcher, slot, tuple(view.fit(width, height) for view in views))
+        print(f'{view_width:>5}x{view_height:<4} {full[0]:9.2f} {full[1]:7.2f} {fitted[0]:11.2f} {fitted[1]:7.2f}')
+        for label in labels:
+            label.hide()
+    hidden = measure(frames, views, prefetcher, slot, (HIDDEN, HIDDEN))
+    print(f'{"hidden":>10} {"":>9} {"":>7} {hidden[0]:11.2f} {hidden[1]:7.2f}')
+
+
+if __name__ == '__main__':
+    main()
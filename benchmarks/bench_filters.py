@@ -0,0 +1,60 @@
+""" Cost of each depth filter, and of all of them together, per frame.
+
+Frames come from the synthetic scene (noise and dropouts included) and are filtered in
+sequence, so the temporal filters run in their steady state. The share of the frame
+budget at the recording rate is printed next to each result.
+
+Usage: python benchmarks/bench_filters.py [--resolution 640x480 --frames 200 --fps 30]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from player_core.colorize import DepthColorizer  # noqa: E402
+from player_core.filters import FILTERS, DepthFilters  # noqa: E402
+from synthetic import resolution, scene  # noqa: E402
+
+# Distinct frames generated; the benchmark cycles through them.
+SCENE_FRAMES = 30
+
+
+def measure(frames, names, count, colorizer, out):
+    filters = DepthFilters(names)
+    timings = []
+    for position in range(1, count + 1):
+        depth = frames[position % len(frames)]
+        started = time.perf_counter()
+        colorizer.render(filters.apply(depth, position), out)
+        timings.append(time.perf_counter() - started)
+    ms = np.array(timings[len(frames):] or timings) * 1000
+    return np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resolution', type=resolution, default=(640, 480))
+    parser.add_argument('--frames', type=int, default=200, help='frames filtered per measurement')
+    parser.add_argument('--fps', type=float, default=30, help='recording rate the budget is taken from')
+    args = parser.parse_args()
+
+    width, height = args.resolution
+    rng = np.random.default_rng(0)
+    frames = [scene(i, width, height, SCENE_FRAMES, rng)[0] for i in range(SCENE_FRAMES)]
+    colorizer = DepthColorizer()
+    out = np.empty((height, width, 3), dtype=np.uint8)
+    budget = 1000 / args.fps
+
+    base, _ = measure(frames, (), args.frames, colorizer, out)
+    print(f'{width}x{height}, frame budget {budget:.1f} ms at {args.fps:g} fps; colorizing alone {base:.2f} ms')
+    for names in [(name,) for name in FILTERS] + [FILTERS]:
+        p50, p99 = measure(frames, names, args.frames, colorizer, out)
+        print(f'{"+".join(names):<28}p50 {p50 - base:7.2f} ms  p99 {p99 - base:7.2f} ms  '
+              f'{(p50 - base) / budget:6.1%} of the budget')
+
+
+if __name__ == '__main__':
+    main()
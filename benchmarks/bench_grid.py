@@ -0,0 +1,76 @@
+""" Grid viewer scaling: refresh rate and CPU time per refresh for 1/4/8 recordings.
+
+Plays synthetic recordings through the grid window (headless) as fast as every tile
+can be refreshed, with tiles decimated to the pixel budget and their viewport, and at
+full resolution for comparison. Decoding is done at full resolution whatever the
+stride, so --store transcodes the recordings to .oniz first to see the rendering share.
+
+Usage: python benchmarks/bench_grid.py [--counts 1 4 8 --frames 150 --resolution 640x480 --store]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from player_core import store  # noqa: E402
+from synthetic import make_recording, resolution  # noqa: E402
+
+
+def measure(paths, decimate, size):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtWidgets
+    from player_core.gridview import GridWindow
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+    window = GridWindow(paths, 'native')
+    window.resize(*size)
+    window.show()
+    app.processEvents()
+    window.update_strides()
+    if not decimate:
+        window.strides = [1] * len(paths)
+
+    timeline = window.timeline
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for step in range(timeline.steps):
+        window.move_to(timeline.time(step))
+        for source in window.sources:
+            source.wait()
+        window.collect()
+        app.processEvents()
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    strides = sorted(set(window.strides))
+    window.close()
+    return timeline.steps / wall, cpu / timeline.steps * 1000, strides
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--counts', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--frames', type=int, default=150)
+    parser.add_argument('--resolution', type=resolution, default=(640, 480))
+    parser.add_argument('--window', type=resolution, default=(1280, 800), help='grid window size')
+    parser.add_argument('--store', action='store_true', help='play .oniz transcodes of the recordings')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [
+            make_recording(os.path.join(directory, f'rig_{i}.oni'), args.frames, *args.resolution, seed=i)
+            for i in range(max(args.counts))
+        ]
+        if args.store:
+            paths = [store.transcode(path) for path in paths]
+        print(f'{"recordings":>10} {"tiles":>10} {"stride":>8} {"refresh/s":>10} {"cpu ms/refresh":>15}')
+        for count in args.counts:
+            for decimate in (True, False):
+                fps, cpu_ms, strides = measure(paths[:count], decimate, args.window)
+                print(f'{count:>10} {"decimated" if decimate else "full":>10} {"/".join(map(str, strides)):>8} '
+                      f'{fps:10.1f} {cpu_ms:15.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+""" Compare seek-per-frame playback with sequential reads on a recording.
+
+Usage: python benchmarks/bench_sequential.py path/to/file.oni [frames]
+"""
+import os
+import sys
+import time
+
+from openni import openni2
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from player_core.playback import PlaybackEngine  # noqa: E402
+
+
+def play_seeking(engine, frames):
+    """ The previous playback path: seek both streams before every read. """
+    start = time.perf_counter()
+    for position in range(engine.first_frame, engine.first_frame + frames):
+        engine.playback_support.seek(engine.depth_stream, position)
+        engine.playback_support.seek(engine.color_stream, position)
+        engine.depth_stream.read_frame()
+        engine.color_stream.read_frame()
+    return frames / (time.perf_counter() - start)
+
+
+def play_sequential(engine, frames):
+    engine.stream_position = engine.color_position = None
+    engine.seek(engine.first_frame)
+    start = time.perf_counter()
+    for _ in range(frames):
+        engine.read_next()
+    return frames / (time.perf_counter() - start)
+
+
+def main(path, frames=None):
+    openni2.initialize()
+    device = openni2.Device.open_file(path.encode('utf-8'))
+    depth_stream = device.create_depth_stream()
+    color_stream = device.create_color_stream()
+    engine = PlaybackEngine(depth_stream, color_stream, openni2.PlaybackSupport(device))
+    depth_stream.start()
+    color_stream.start()
+
+    frames = min(frames or engine.last_frame, engine.last_frame - engine.first_frame)
+    seeking_fps = play_seeking(engine, frames)
+    sequential_fps = play_sequential(engine, frames)
+    print(f'{frames} frames')
+    print(f'seek per frame: {seeking_fps:8.1f} fps')
+    print(f'sequential:     {sequential_fps:8.1f} fps ({sequential_fps / seeking_fps:.2f}x)')
+
+    depth_stream.close()
+    color_stream.close()
+    device.close()
+    openni2.unload()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
@@ -0,0 +1,70 @@
+""" Optimized recordings against their source .oni: file size, seek latency, sequential fps.
+
+Transcodes the recording with every installed codec and reads each result, and the
+source through the native reader, with random seeks and one sequential pass.
+
+Usage: python benchmarks/bench_store.py [path/to/file.oni] [--frames 300 --resolution 640x480]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from player_core import store  # noqa: E402
+from player_core.backends import close_recording, open_recording  # noqa: E402
+from synthetic import make_recording, resolution  # noqa: E402
+
+
+def measure(path, seeks):
+    device, engine = open_recording(path, 'native')
+    positions = random.Random(0).choices(range(1, engine.last_frame + 1), k=seeks)
+    timings = []
+    for position in positions:
+        started = time.perf_counter()
+        engine.read_at(position)
+        timings.append(time.perf_counter() - started)
+
+    engine.seek(1)
+    started = time.perf_counter()
+    for _ in range(engine.last_frame):
+        engine.read()
+    fps = engine.last_frame / (time.perf_counter() - started)
+    close_recording(device, engine)
+    ms = np.array(timings) * 1000
+    return np.percentile(ms, 50), np.percentile(ms, 99), fps
+
+
+def report(name, path, source_size, seeks, extra=''):
+    p50, p99, fps = measure(path, seeks)
+    size = os.path.getsize(path)
+    print(f'{name:<12}{size / 2 ** 20:9.1f} MB {size / source_size:6.0%}  '
+          f'seek p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  sequential {fps:7.1f} fps{extra}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', nargs='?', help='.oni recording, default: a synthetic one')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--resolution', type=resolution, default=(640, 480))
+    parser.add_argument('--chunk', type=int, default=store.CHUNK_FRAMES)
+    parser.add_argument('--seeks', type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = args.path or make_recording(os.path.join(directory, 'synthetic.oni'), args.frames, *args.resolution)
+        source_size = os.path.getsize(source)
+        report('source .oni', source, source_size, args.seeks)
+        for name in store.available_codecs():
+            target = os.path.join(directory, f'{name}{store.SUFFIX}')
+            started = time.perf_counter()
+            store.transcode(source, target, chunk=args.chunk, codec_name=name)
+            report(name, target, source_size, args.seeks, f'  (transcoded in {time.perf_counter() - started:.1f} s)')
+
+
+if __name__ == '__main__':
+    main()
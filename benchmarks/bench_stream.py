@@ -0,0 +1,124 @@
+""" Frame streaming throughput and latency against the number of subscribers.
+
+Synthetic frame pairs are published in-process, as fast as they can be or at --fps,
+to 1..N subscriber processes over the socket transport (each backpressure policy,
+lz4 too when the package is installed) and over the shared memory ring. Per setup it
+reports what the publisher managed, what the slowest subscriber received, frames
+dropped or missed and the publish-to-receive latency.
+
+Usage: python benchmarks/bench_stream.py [--subscribers 1 2 4 --frames 300 --address unix:/tmp/bench_stream.sock]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from player_core import stream  # noqa: E402
+from synthetic import resolution, scene  # noqa: E402
+
+SCENE_FRAMES = 30
+SHM_NAME = 'bench_stream'
+# Subscribers give up after this long without a frame, s.
+IDLE_TIMEOUT = 2
+
+
+def subscribe(source, compressed, policy):
+    """ Subscriber process: prints 'ready', then a JSON line with what it received. """
+    if source.startswith('shm:'):
+        reader = stream.SharedRingReader(source[len('shm:'):])
+        frames = (frame for _, frame in reader.frames(copy=True, timeout=IDLE_TIMEOUT))
+    else:
+        reader = stream.StreamClient(source, compressed, policy, timeout=IDLE_TIMEOUT)
+        frames = iter(reader)
+    print('ready', flush=True)
+    latencies = []
+    dropped = 0
+    for frame in frames:
+        latencies.append((time.monotonic_ns() - frame.sent) / 1e6)
+        dropped += frame.dropped
+    lost = reader.missed if source.startswith('shm:') else dropped
+    print(json.dumps({'count': len(latencies), 'lost': lost, 'latencies': latencies}), flush=True)
+    reader.close()
+
+
+def run(frames, count, fps, subscribers, setup, address):
+    """ Publish `count` frames to `subscribers` processes; returns the report row. """
+    name, policy, compressed = setup
+    shm = name == 'shm'
+    publisher = stream.FramePublisher(SHM_NAME if shm else None)
+    if shm:
+        # Readers attach to an existing ring, so it is made by publishing the first frame.
+        publisher.publish(0, *frames[0])
+    else:
+        publisher.serve(address)
+    # Separate interpreters rather than multiprocessing children, which would share our
+    # resource tracker and have it unregister the ring we own.
+    command = [sys.executable, os.path.abspath(__file__), '--subscribe', f'shm:{SHM_NAME}' if shm else address,
+               '--policy', policy] + (['--lz4'] if compressed else [])
+    processes = []
+    for _ in range(subscribers):
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        process.stdout.readline()
+        processes.append(process)
+    while not shm and len(publisher.subscribers) < subscribers:
+        time.sleep(0.01)
+
+    started = time.perf_counter()
+    for i in range(count):
+        if fps:
+            time.sleep(max(0.0, started + i / fps - time.perf_counter()))
+        publisher.publish(i + 1, *frames[i % len(frames)])
+    elapsed = time.perf_counter() - started
+
+    received = [json.loads(process.communicate()[0]) for process in processes]
+    publisher.close()
+
+    slowest = min(result['count'] for result in received)
+    lost = sum(result['lost'] for result in received)
+    ms = np.concatenate([result['latencies'] for result in received])
+    size = frames[0][0].nbytes + frames[0][1].nbytes
+    return (f'{name:>6} {policy:>6} {subscribers:>4} {count / elapsed:9.1f} {slowest / count * 100:7.1f}% '
+            f'{slowest * size / elapsed / 2 ** 20:8.0f} {lost:7d} '
+            f'{np.percentile(ms, 50):8.2f} {np.percentile(ms, 99):8.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resolution', type=resolution, default=(640, 480), help='frame size')
+    parser.add_argument('--frames', type=int, default=300, help='frames published per setup')
+    parser.add_argument('--fps', type=float, default=0, help='publish rate, 0 for as fast as possible')
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--address', default='unix:/tmp/bench_stream.sock', help='tcp:HOST:PORT or unix:PATH')
+    parser.add_argument('--subscribe', help=argparse.SUPPRESS)
+    parser.add_argument('--policy', default='drop', help=argparse.SUPPRESS)
+    parser.add_argument('--lz4', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.subscribe:
+        return subscribe(args.subscribe, args.lz4, args.policy)
+
+    width, height = args.resolution
+    rng = np.random.default_rng(0)
+    frames = [scene(i, width, height, SCENE_FRAMES, rng) for i in range(SCENE_FRAMES)]
+    setups = [('socket', 'drop', False), ('socket', 'block', False)]
+    if stream.lz4_codec() is not None:
+        setups += [('lz4', 'drop', True), ('lz4', 'block', True)]
+    else:
+        print('lz4 is not installed, skipping compressed subscribers')
+    setups.append(('shm', 'drop', False))
+
+    rate = f'{args.fps:g} fps' if args.fps else 'as fast as possible'
+    print(f'{width}x{height} frames, {args.frames} published {rate} per setup, {args.address}')
+    print(f'{"setup":>6} {"policy":>6} {"subs":>4} {"pub fps":>9} {"recv":>8} {"MB/s":>8} {"lost":>7} '
+          f'{"p50 ms":>8} {"p99 ms":>8}')
+    for setup in setups:
+        for subscribers in args.subscribers:
+            print(run(frames, args.frames, args.fps, subscribers, setup, args.address), flush=True)
+
+
+if __name__ == '__main__':
+    main()
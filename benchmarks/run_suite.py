@@ -0,0 +1,380 @@
+""" Frame pipeline benchmark suite on synthetic recordings.
+
+Every case runs headless in its own process, so peak RSS is reported per case:
+
+    stages   per frame read / convert / QImage / paint latency and sequential fps
+    seek     random-access PlaybackEngine.read_at latency
+    core     PlaybackSession without Qt: open, then every frame through the prefetcher as fast
+             as it renders, with per stage (read / convert / render) latency
+    loop     QThread player: open (until indexes are built), set_position on random frames,
+             a full play-through
+    timer    the same for the QTimer player
+    startup  wall time from launching each player to its first window and to the first frame
+             of the recording (--startup-report), over several launches
+
+Results are printed and, with --out, written as JSON together with the commit they
+were measured on; --compare prints the relative change of every metric between two
+result files.
+
+    python benchmarks/run_suite.py --resolution 640x480 --frames 300 --out results.json
+    python benchmarks/run_suite.py --compare baseline.json results.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.append(ROOT)
+from player_core import backends  # noqa: E402
+from player_core.colorize import DepthColorizer  # noqa: E402
+from player_core.convert import color_array, depth_array, render_color, render_depth  # noqa: E402
+from player_core.display import wrap_array  # noqa: E402
+from player_core.backends import close_recording, open_recording  # noqa: E402
+from player_core.instrument import Profiler  # noqa: E402
+from player_core.scheduler import SPEEDS  # noqa: E402
+from player_core.session import PlaybackSession  # noqa: E402
+from synthetic import DEPTH_CODECS, make_recording, resolution  # noqa: E402
+
+CASES = ('stages', 'seek', 'core', 'loop', 'timer', 'startup')
+# Give up on a play-through that has not wrapped around after this many seconds.
+PLAY_TIMEOUT = 120
+# Player launches per startup measurement.
+STARTUP_LAUNCHES = 5
+
+
+def percentiles(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {
+        'p50': float(np.percentile(ms, 50)), 'p90': float(np.percentile(ms, 90)),
+        'p99': float(np.percentile(ms, 99)), 'max': float(ms.max()),
+    }
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def application():
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5 import QtWidgets
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+
+
+def case_stages(path, options):
+    from PyQt5 import QtGui, QtWidgets
+
+    app = application()  # noqa: F841
+    device, engine = open_recording(path, 'native')
+    colorizer = DepthColorizer()
+    depth_shape, color_shape = engine.frame_shapes()
+    depth_out = np.empty(depth_shape + (3,), dtype=np.uint8)
+    color_out = np.empty(color_shape + (3,), dtype=np.uint8)
+    labels = [QtWidgets.QLabel(), QtWidgets.QLabel()]
+    for label, shape in zip(labels, (depth_shape, color_shape)):
+        label.resize(shape[1], shape[0])
+        label.show()
+
+    timings = {'read': [], 'convert': [], 'qimage': [], 'paint': []}
+    engine.seek(1)
+    started = time.perf_counter()
+    for _ in range(engine.last_frame):
+        t0 = time.perf_counter()
+        depth_frame, color_frame = engine.read()
+        t1 = time.perf_counter()
+        render_depth(depth_array(depth_frame), depth_out, colorizer)
+        render_color(color_array(color_frame), color_out)
+        t2 = time.perf_counter()
+        images = [wrap_array(depth_out), wrap_array(color_out)]
+        t3 = time.perf_counter()
+        for label, image in zip(labels, images):
+            label.setPixmap(QtGui.QPixmap.fromImage(image))
+            label.repaint()
+        t4 = time.perf_counter()
+        for stage, seconds in zip(timings, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            timings[stage].append(seconds)
+    elapsed = time.perf_counter() - started
+    close_recording(device, engine)
+
+    result = {'frames': engine.last_frame, 'fps': engine.last_frame / elapsed}
+    result.update({f'{stage}_ms': percentiles(seconds) for stage, seconds in timings.items()})
+    return result
+
+
+def case_seek(path, options):
+    device, engine = open_recording(path, 'native')
+    positions = random.Random(0).choices(range(1, engine.last_frame + 1), k=options.seeks)
+    timings = []
+    for position in positions:
+        started = time.perf_counter()
+        engine.read_at(position)
+        timings.append(time.perf_counter() - started)
+    close_recording(device, engine)
+    return {'seeks': len(positions), 'read_at_ms': percentiles(timings)}
+
+
+def case_core(path, options):
+    started = time.perf_counter()
+    profiler = Profiler(window=1 << 20)
+    session = PlaybackSession.open(backends.device_class('native'), os.fsencode(path), profiler=profiler)
+    open_seconds = time.perf_counter() - started
+
+    session.cache.clear()
+    frames = 0
+    started = time.perf_counter()
+    for _ in session.frames():
+        frames += 1
+    elapsed = time.perf_counter() - started
+    session.close()
+
+    result = {'open_s': open_seconds, 'frames': frames, 'fps': frames / elapsed}
+    for name, durations in profiler.durations.items():
+        result[f'{name}_ms'] = percentiles(np.array(durations) / 1e9)
+    return result
+
+
+def load_player(variant):
+    directory = os.path.join(ROOT, f'player_{variant}_version')
+    sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(f'player_{variant}_main', os.path.join(directory, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def case_player(variant, path, options):
+    app = application()
+    module = load_player(variant)
+    player = module.OniPlayer(backends.device_class('native'))
+    player.browse_folder = lambda: os.fsencode(path)
+    player.show()
+
+    started = time.perf_counter()
+    player.open_device()
+    while player.job is not None:
+        app.processEvents()
+    open_seconds = time.perf_counter() - started
+
+    last_frame = player.session.last_frame
+    positions = random.Random(0).choices(range(2, last_frame + 1), k=options.seeks)
+    seek_timings = []
+    for position in positions:
+        started = time.perf_counter()
+        player.set_position(position)
+        app.processEvents()
+        seek_timings.append(time.perf_counter() - started)
+
+    # Play from the first frame until playback wraps around, timing every paint.
+    shown = []
+    paint_timings = []
+    paint = player.paint
+
+    def timed_paint(slot):
+        started = time.perf_counter()
+        paint(slot)
+        paint_timings.append(time.perf_counter() - started)
+        shown.append((slot.index, started))
+
+    player.speed_box.setCurrentIndex(SPEEDS.index(options.speed))
+    player.set_position(2)
+    player.paint = timed_paint
+    player.session.cache.clear()
+    started = time.perf_counter()
+    player.play_video()
+    while time.perf_counter() - started < PLAY_TIMEOUT:
+        app.processEvents()
+        if len(shown) > 1 and shown[-1][0] < shown[-2][0]:
+            shown.pop()
+            break
+    play_seconds = (shown[-1][1] if shown else time.perf_counter()) - started
+    player.play_video()
+    clock = player.session.clock
+    player.stop_video()
+
+    intervals = np.diff([when for _, when in shown]) if len(shown) > 1 else [0.0]
+    return {
+        'open_s': open_seconds,
+        'set_position_ms': percentiles(seek_timings),
+        'speed': options.speed,
+        'frames': len(shown),
+        'fps': len(shown) / play_seconds if play_seconds > 0 else 0.0,
+        'target_fps': clock.speed / clock.interval,
+        'late': clock.late,
+        'dropped': clock.dropped,
+        'skipped': clock.skipped,
+        'paint_ms': percentiles(paint_timings or [0.0]),
+        'frame_interval_ms': percentiles(intervals),
+    }
+
+
+def launch(variant, path):
+    """ Seconds from starting a player process to each event it reports with --startup-report. """
+    directory = os.path.join(ROOT, f'player_{variant}_version')
+    command = [sys.executable, 'main.py', '--backend', 'native', '--startup-report', path]
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=directory, env=env, stdout=subprocess.PIPE, text=True)
+    events = {}
+    for line in process.stdout:
+        # 'first window 34.5 ms'
+        events[line.rsplit(' ', 2)[0]] = time.perf_counter() - started
+    process.wait()
+    return events
+
+
+def case_startup(path, options):
+    path = os.path.abspath(path)
+    result = {}
+    for variant in ('loop', 'timer'):
+        launches = [launch(variant, path) for _ in range(STARTUP_LAUNCHES)]
+        for event in ('first window', 'first frame'):
+            result[f'{variant}_{event.split()[1]}_ms'] = percentiles([events[event] for events in launches])
+    return result
+
+
+def run_case(case, path, options):
+    if case == 'stages':
+        result = case_stages(path, options)
+    elif case == 'seek':
+        result = case_seek(path, options)
+    elif case == 'core':
+        result = case_core(path, options)
+    elif case == 'startup':
+        result = case_startup(path, options)
+    else:
+        result = case_player(case, path, options)
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def spawn_case(case, path, options):
+    """ Run one case in a fresh interpreter and return its parsed result. """
+    command = [
+        sys.executable, os.path.abspath(__file__), '--case', case, '--recording', path,
+        '--seeks', str(options.seeks), '--speed', str(options.speed),
+    ]
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    done = subprocess.run(command, capture_output=True, text=True, env=env)
+    if done.returncode:
+        sys.stderr.write(done.stderr)
+        return {'error': done.stderr.strip().splitlines()[-1] if done.stderr.strip() else f'exit {done.returncode}'}
+    return json.loads(done.stdout.strip().splitlines()[-1])
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results):
+    metrics = {}
+    for case, values in results['cases'].items():
+        for key, value in values.items():
+            if isinstance(value, dict):
+                for name, number in value.items():
+                    metrics[f'{case}.{key}.{name}'] = number
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                metrics[f'{case}.{key}'] = value
+    return metrics
+
+
+def report(results):
+    print(f"commit {results['commit']}, {results['recording']}")
+    for case, values in results['cases'].items():
+        print(f'{case}:')
+        for key, value in values.items():
+            if isinstance(value, dict) and 'p50' in value:
+                print(f"  {key:<20}p50 {value['p50']:8.2f}  p90 {value['p90']:8.2f}  "
+                      f"p99 {value['p99']:8.2f}  max {value['max']:8.2f}")
+            elif isinstance(value, float):
+                print(f'  {key:<20}{value:.2f}')
+            else:
+                print(f'  {key:<20}{value}')
+
+
+def compare(baseline_path, current_path, threshold):
+    with open(baseline_path) as f:
+        baseline = flatten(json.load(f))
+    with open(current_path) as f:
+        current = flatten(json.load(f))
+    for key in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[key], current[key]
+        if not old:
+            continue
+        change = (new - old) / abs(old)
+        # Rates get better as they grow, everything else (latency, memory, drops) as it shrinks.
+        worse = -change if key.endswith('fps') else change
+        flag = '  REGRESSION' if worse > threshold else ''
+        print(f'{key:<40}{old:12.2f} -> {new:12.2f}  {change:+7.1%}{flag}')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the frame pipeline on a synthetic recording.')
+    parser.add_argument('--recording', help='benchmark this .oni file instead of generating one')
+    parser.add_argument('--resolution', type=resolution, default=(640, 480), help='WIDTHxHEIGHT')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--depth-codec', choices=DEPTH_CODECS, default='16z')
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES))
+    parser.add_argument('--seeks', type=int, default=100, help='random positions per seek measurement')
+    parser.add_argument('--speed', type=float, choices=SPEEDS, default=SPEEDS[-1], help='play-through speed')
+    parser.add_argument('--out', help='write the results as JSON')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help='compare two result files')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change flagged by --compare')
+    parser.add_argument('--case', choices=CASES, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    if options.compare:
+        compare(*options.compare, options.threshold)
+        return
+    if options.case:
+        print(json.dumps(run_case(options.case, options.recording, options)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = options.recording
+        if path is None:
+            width, height = options.resolution
+            path = make_recording(
+                os.path.join(directory, 'synthetic.oni'), options.frames, width, height, depth_codec=options.depth_codec,
+            )
+            recording = f'synthetic {width}x{height}, {options.frames} frames, {options.depth_codec} depth'
+        else:
+            recording = os.path.abspath(path)
+
+        results = {
+            'commit': commit(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'recording': recording,
+            'cases': {case: spawn_case(case, path, options) for case in options.cases},
+        }
+
+    report(results)
+    if options.out:
+        with open(options.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+""" Synthetic depth/color recordings for the benchmarks.
+
+A tilted floor with a ball bouncing across it, sensor noise and dropouts on the depth
+side, a gradient with a moving square on the color side. Scenes are deterministic for
+a given seed, so runs on different commits read identical files.
+
+    python benchmarks/synthetic.py out.oni --resolution 640x480 --frames 300
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from player_core.oni_file import CODEC_16Z, CODEC_JPEG, CODEC_NONE, OniWriter  # noqa: E402
+
+DEPTH_CODECS = {'16z': CODEC_16Z, 'none': CODEC_NONE}
+COLOR_CODECS = {'none': CODEC_NONE, 'jpeg': CODEC_JPEG}
+
+
+def resolution(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def scene(i, width, height, frames, rng):
+    yy, xx = np.mgrid[0:height, 0:width]
+    depth = 1500 + 3000 * (height - yy) / height + 2 * xx / width * 100
+
+    phase = i / max(frames, 1)
+    cx = width * (0.2 + 0.6 * phase)
+    cy = height * (0.5 - 0.3 * abs(np.sin(phase * 4 * np.pi)))
+    radius = min(width, height) / 6
+    inside = (xx - cx) ** 2 + (yy - cy) ** 2 < radius ** 2
+    depth = np.where(inside, 1200 - np.sqrt(np.maximum(radius ** 2 - (xx - cx) ** 2 - (yy - cy) ** 2, 0)), depth)
+
+    depth += rng.normal(0, 4, depth.shape)
+    depth[rng.random(depth.shape) < 0.02] = 0
+    depth = np.clip(depth, 0, 0x7FFF).astype(np.uint16)
+
+    color = np.empty((height, width, 3), dtype=np.uint8)
+    color[..., 0] = (xx * 255 // max(width - 1, 1)).astype(np.uint8)
+    color[..., 1] = (yy * 255 // max(height - 1, 1)).astype(np.uint8)
+    color[..., 2] = (i * 3) % 256
+    color[inside] = (230, 80, 40)
+    return depth, color
+
+
+def make_recording(path, frames=300, width=640, height=480, fps=30, depth_codec='16z', color_codec='none', seed=0):
+    rng = np.random.default_rng(seed)
+    with OniWriter(path, width, height, fps, DEPTH_CODECS[depth_codec], COLOR_CODECS[color_codec]) as writer:
+        for i in range(frames):
+            writer.write(*scene(i, width, height, frames, rng))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic .oni recording.')
+    parser.add_argument('path')
+    parser.add_argument('--resolution', type=resolution, default=(640, 480), help='WIDTHxHEIGHT')
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--depth-codec', choices=DEPTH_CODECS, default='16z')
+    parser.add_argument('--color-codec', choices=COLOR_CODECS, default='none')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    make_recording(args.path, args.frames, *args.resolution, args.fps, args.depth_codec, args.color_codec, args.seed)
+
+
+if __name__ == '__main__':
+    main()
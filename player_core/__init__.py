@@ -0,0 +1 @@
+""" Playback building blocks shared by the loop and timer players. """
@@ -0,0 +1,97 @@
+""" Selection between the OpenNI runtime and the built-in .oni reader.
+
+Importing this module is cheap: the readers (and NumPy/OpenCV with them) and the
+OpenNI runtime are only loaded once a backend is asked for, so the players can show
+their window first.
+"""
+import os
+import threading
+
+BACKENDS = ('openni', 'native')
+
+_openni_loaded = False
+_openni_lock = threading.Lock()
+
+
+def device_class(backend):
+    """ Class whose `open_file(path)` opens a recording with the given backend.
+
+    The first call for 'openni' initializes the runtime; it may come from any thread.
+    """
+    global _openni_loaded
+    if backend == 'native':
+        from player_core import oni_file
+        return oni_file.OniDevice
+    if backend == 'openni':
+        from openni import openni2
+        with _openni_lock:
+            if not _openni_loaded:
+                openni2.initialize()
+                _openni_loaded = True
+        return openni2.Device
+    raise ValueError(f'unknown backend {backend!r}, expected one of {BACKENDS}')
+
+
+def open_file(device_class, path, progress=None):
+    """ Open `path` with `device_class`, or with the store reader for an optimized recording.
+
+    `progress(done, total)` is passed on to the built-in readers.
+    """
+    from player_core import oni_file, store
+    if store.is_store(path):
+        return store.StoreDevice.open_file(path, progress)
+    if device_class is oni_file.OniDevice:
+        return device_class.open_file(path, progress)
+    return device_class.open_file(path)
+
+
+def concurrent_device(device_class, device, path):
+    """ Device whose streams can be read from another thread while `device` plays.
+
+    The built-in readers hand out streams with independent cursors over one shared file
+    map, so `device` itself will do; OpenNI streams of one device share the playback
+    position, so the file is opened a second time.
+    """
+    from player_core import oni_file, store
+    if isinstance(device, (oni_file.OniDevice, store.StoreDevice)):
+        return device
+    return device_class.open_file(path)
+
+
+def create_playback_support(device):
+    from player_core import oni_file, store
+    if isinstance(device, (oni_file.OniDevice, store.StoreDevice)):
+        return oni_file.OniPlaybackSupport(device)
+    from openni import openni2
+    return openni2.PlaybackSupport(device)
+
+
+def open_recording(path, backend, sync=True):
+    """ Device and engine of `path` for the headless tools; with `sync` color is paired by timestamp. """
+    from player_core.playback import PlaybackEngine
+    from player_core.sync import SyncTable
+    device = open_file(device_class(backend), os.fsencode(path))
+    depth_stream = device.create_depth_stream()
+    color_stream = device.create_color_stream()
+    depth_stream.start()
+    color_stream.start()
+    playback_support = create_playback_support(device)
+    engine = PlaybackEngine(depth_stream, color_stream, playback_support, first_frame=1)
+    if sync:
+        engine.sync = SyncTable.for_streams(path, depth_stream, color_stream, playback_support)
+    return device, engine
+
+
+def close_recording(device, engine):
+    engine.depth_stream.close()
+    engine.color_stream.close()
+    device.close()
+
+
+def unload():
+    global _openni_loaded
+    with _openni_lock:
+        if _openni_loaded:
+            from openni import openni2
+            openni2.unload()
+            _openni_loaded = False
@@ -0,0 +1,69 @@
+import collections
+import threading
+
+import numpy as np
+
+
+class FrameCache:
+
+    """ LRU cache of decoded frames keyed by (stream, frame index).
+
+    Frames are stored as private copies, so they outlive the driver buffers they were
+    decoded from. The least recently used frames are evicted once the total size
+    exceeds `budget_mb`.
+    """
+
+    def __init__(self, budget_mb=256):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.frames = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __contains__(self, key):
+        return key in self.frames
+
+    def get(self, stream, index):
+        key = (stream, index)
+        with self.lock:
+            array = self.frames.get(key)
+            if array is None:
+                self.misses += 1
+            else:
+                self.frames.move_to_end(key)
+                self.hits += 1
+            return array
+
+    def put(self, stream, index, array):
+        key = (stream, index)
+        array = np.array(array, copy=True)
+        with self.lock:
+            old = self.frames.pop(key, None)
+            if old is not None:
+                self.size -= old.nbytes
+            if array.nbytes > self.budget:
+                return array
+            self.frames[key] = array
+            self.size += array.nbytes
+            while self.size > self.budget:
+                _, evicted = self.frames.popitem(last=False)
+                self.size -= evicted.nbytes
+        return array
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+            self.size = 0
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self):
+        return (f'cache {self.hits} hits / {self.misses} misses, '
+                f'{len(self.frames)} frames, {self.size / 2 ** 20:.0f} of {self.budget / 2 ** 20:.0f} MB')
@@ -0,0 +1,213 @@
+""" Saving a frame range of a recording as a recording of its own.
+
+    python -m player_core.clip recording.oni 300 900 --out clip.oni
+
+For .oni files the compressed frames are not touched: the records describing the
+depth and color streams are copied, then the new-data records of the range, payloads
+as they are, with only the frame numbers in them rewritten. The source is opened on
+its own, not shared with a player reading it; past the frame index built then, one
+pass over the record headers, the time taken depends on the length of the clip, not
+of the recording. The clip covers depth frames `start` through `end` and
+every color frame paired with them; timestamps are kept, so the clip stays aligned
+with whatever else was recorded at the time. Like `OniWriter` output, clips are meant
+for the native backend: seek tables and other streams are left out.
+
+Optimized recordings (.oniz) compress a few frames per chunk, so a range cannot be cut
+out of them as it is; the chunks it covers are decoded and compressed again instead.
+"""
+import argparse
+import os
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from player_core import oni_file, store
+from player_core.opener import Cancelled
+from player_core.sync import SyncTable
+
+# Records copied between two progress reports.
+PROGRESS_RECORDS = 256
+# Frame count, first and last timestamp and seek table position of a node-added record.
+NODE_ADDED_COUNTS = struct.Struct('<IQQQ')
+
+
+def clip_path(path, start, end):
+    root, ext = os.path.splitext(os.fsdecode(path))
+    return f'{root}_{start}-{end}{ext}'
+
+
+def copy_records(source, target, start, end, progress=None, recording=None):
+    """ Write depth frames `start` through `end` of the .oni file `source`, and their color, to `target`.
+
+    `recording` is the `OniRecording` of `source` if it is open already; otherwise the
+    file is opened, and its frame index built, for the copy. `progress(done, total)`
+    counts bytes indexed while that happens, then records copied; an exception it
+    raises stops either.
+    """
+    opened = recording is None
+    if opened:
+        recording = oni_file.OniRecording(source, progress)
+    try:
+        depth = recording.node(oni_file.NODE_TYPE_DEPTH)
+        color = recording.node(oni_file.NODE_TYPE_IMAGE)
+        if not 1 <= start <= end <= len(depth.frames):
+            raise ValueError(f'frames {start}..{end} are not in {recording.path} (1..{len(depth.frames)})')
+        pairs = SyncTable(depth.frames['timestamp'], color.frames['timestamp']).color_index[start - 1:end]
+        ranges = {
+            depth.node_id: depth.frames[start - 1:end],
+            color.node_id: color.frames[int(pairs.min()):int(pairs.max()) + 1],
+        }
+        # Both streams in file order, as they were recorded.
+        records = np.concatenate([rows['record'] for rows in ranges.values()])
+        nodes = np.concatenate([np.full(len(rows), node_id) for node_id, rows in ranges.items()])
+        order = np.argsort(records, kind='stable')
+        numbers = {node_id: 0 for node_id in ranges}
+        buf = memoryview(recording.map)
+
+        partial = target + '.partial'
+        try:
+            with open(partial, 'wb') as f:
+                header = list(oni_file.FILE_HEADER.unpack_from(buf, 0))
+                header[5] = max(int(rows['timestamp'].max()) for rows in ranges.values())
+                f.write(oni_file.FILE_HEADER.pack(*header))
+                copy_prologue(buf, f, ranges)
+                for done, i in enumerate(order):
+                    if progress is not None and done % PROGRESS_RECORDS == 0:
+                        progress(done, len(order))
+                    offset = int(records[i])
+                    node_id = int(nodes[i])
+                    numbers[node_id] += 1
+                    _, record_type, _, fields_size, payload_size, _ = oni_file.RECORD_HEADER.unpack_from(buf, offset)
+                    fields = offset + oni_file.RECORD_HEADER.size
+                    timestamp, _ = oni_file.NEW_DATA_FIELDS.unpack_from(buf, fields)
+                    f.write(oni_file.RECORD_HEADER.pack(
+                        oni_file.RECORD_MAGIC, record_type, node_id, fields_size, payload_size, 0,
+                    ))
+                    f.write(oni_file.NEW_DATA_FIELDS.pack(timestamp, numbers[node_id]))
+                    f.write(buf[fields + oni_file.NEW_DATA_FIELDS.size:offset + fields_size + payload_size])
+                f.write(oni_file.RECORD_HEADER.pack(
+                    oni_file.RECORD_MAGIC, oni_file.RECORD_END, 0, oni_file.RECORD_HEADER.size, 0, 0,
+                ))
+            os.replace(partial, target)
+        finally:
+            buf.release()
+            if os.path.exists(partial):
+                os.remove(partial)
+    finally:
+        if opened:
+            recording.close()
+    return target
+
+
+def copy_prologue(buf, f, ranges):
+    """ Copy the records before the first frame of the recording that describe the streams in `ranges`.
+
+    Node-added records get the frame count and timestamp range of the clip, and no seek
+    table, as `OniWriter` writes them.
+    """
+    offset = oni_file.FILE_HEADER.size
+    while offset + oni_file.RECORD_HEADER.size <= len(buf):
+        _, record_type, node_id, fields_size, payload_size, _ = oni_file.RECORD_HEADER.unpack_from(buf, offset)
+        if record_type in (oni_file.RECORD_NEW_DATA, oni_file.RECORD_END):
+            break
+        size = fields_size + payload_size
+        if node_id in ranges and record_type != oni_file.RECORD_SEEK_TABLE:
+            record = bytearray(buf[offset:offset + size])
+            if record_type == oni_file.RECORD_NODE_ADDED:
+                rows = ranges[node_id]
+                name_size = oni_file.UINT32.unpack_from(record, oni_file.RECORD_HEADER.size)[0] + oni_file.UINT32.size
+                NODE_ADDED_COUNTS.pack_into(
+                    record, oni_file.RECORD_HEADER.size + name_size + 8,
+                    len(rows), int(rows['timestamp'][0]), int(rows['timestamp'][-1]), 0,
+                )
+            f.write(record)
+        offset += size
+
+
+def store_header(path):
+    with open(path, 'rb') as f:
+        return store.HEADER.unpack(f.read(store.HEADER.size))
+
+
+def save_clip(source, target, start, end, progress=None, backend='native'):
+    """ Save depth frames `start` through `end` of `source` (1-based, inclusive) to `target`.
+
+    `progress(done, total)` is called as it goes; an exception it raises cancels the
+    clip, and nothing is left behind then.
+    """
+    source = os.fsdecode(source)
+    target = os.fsdecode(target)
+    if store.is_store(source):
+        chunk, codec_name = store_header(source)[9:11]
+        return store.transcode(
+            source, target, backend, chunk, codec_name.rstrip(b' ').decode(), start=start, end=end, progress=progress,
+        )
+    return copy_records(source, target, start, end, progress)
+
+
+class ClipJob(threading.Thread):
+
+    """ Saves a clip in the background, see `save_clip`.
+
+    Like `OpenJob`, it exposes `stage`, `done` and `total` for a progress bar, stops at
+    its next progress report after `cancel`, keeps an exception in `error` and sets
+    `finished` at the end.
+    """
+
+    def __init__(self, source, target, start, end, backend='native'):
+        super().__init__(daemon=True)
+        self.source = source
+        self.target = target
+        self.start_frame = start
+        self.end_frame = end
+        self.backend = backend
+        self.stage = 'saving clip'
+        self.done = 0
+        self.total = 0
+        self.error = None
+        self.finished = threading.Event()
+        self.cancelled = threading.Event()
+
+    def progress(self, done, total):
+        if self.cancelled.is_set():
+            raise Cancelled()
+        self.done = done
+        self.total = total
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            save_clip(self.source, self.target, self.start_frame, self.end_frame, self.progress, self.backend)
+        except Cancelled:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished.set()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Save a frame range of a recording without re-encoding it.')
+    parser.add_argument('path', help='.oni or .oniz recording')
+    parser.add_argument('start', type=int, help='first depth frame (1-based)')
+    parser.add_argument('end', type=int, help='last depth frame')
+    parser.add_argument('--out', help='target file, default: next to the source with the range in its name')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    target = options.out or clip_path(options.path, options.start, options.end)
+    started = time.perf_counter()
+    save_clip(options.path, target, options.start, options.end)
+    print(f'{options.path} -> {target}: {options.end - options.start + 1} frames, '
+          f'{os.path.getsize(target) / 2 ** 20:.1f} MB, {time.perf_counter() - started:.2f} s')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+
+COLORMAPS = ('linear', 'jet', 'turbo')
+DEFAULT_NEAR = 400
+DEFAULT_FAR = 4500
+
+
+def colormap_table(name):
+    """ 256 RGB entries of the named colormap. """
+    ramp = np.arange(256, dtype=np.uint8)
+    if name == 'linear':
+        return np.repeat(ramp[:, None], 3, axis=1)
+    code = {'jet': cv2.COLORMAP_JET, 'turbo': cv2.COLORMAP_TURBO}[name]
+    return cv2.applyColorMap(ramp[:, None], code)[:, 0, ::-1].copy()
+
+
+class DepthColorizer:
+
+    """ Maps uint16 depth to RGB through a 65536-entry lookup table.
+
+    Depth between `near` and `far` is spread over the whole colormap, values outside
+    are clipped to its ends and zero (no reading) stays black. Rendering is a single
+    `np.take` into a caller-owned buffer.
+    """
+
+    def __init__(self, near=DEFAULT_NEAR, far=DEFAULT_FAR, colormap='linear'):
+        self.near = near
+        self.far = far
+        self.colormap = colormap
+        self.lut = self.build_lut(near, far, colormap)
+
+    @staticmethod
+    def build_lut(near, far, colormap):
+        depth = np.arange(65536, dtype=np.float32)
+        scale = 255.0 / max(far - near, 1)
+        index = np.clip((depth - near) * scale, 0, 255).astype(np.uint8)
+        lut = colormap_table(colormap)[index]
+        lut[0] = 0
+        return lut
+
+    def configure(self, near=None, far=None, colormap=None):
+        near = self.near if near is None else near
+        far = self.far if far is None else far
+        colormap = self.colormap if colormap is None else colormap
+        # Swap in a complete table at once, so a render running on another thread
+        # never sees a half-built one.
+        self.lut = self.build_lut(near, far, colormap)
+        self.near, self.far, self.colormap = near, far, colormap
+
+    def render(self, depth, out=None):
+        if out is None:
+            out = np.empty(depth.shape + (3,), dtype=np.uint8)
+        np.take(self.lut, depth, axis=0, out=out, mode='clip')
+        return out
@@ -0,0 +1,20 @@
+import numpy as np
+
+
+def depth_array(frame):
+    img = np.frombuffer(frame.get_buffer_as_uint16(), dtype=np.uint16)
+    return img.reshape(frame.height, frame.width)
+
+
+def color_array(frame):
+    img = np.frombuffer(frame.get_buffer_as_uint8(), dtype=np.uint8)
+    return img.reshape(frame.height, frame.width, 3)
+
+
+def render_depth(depth, out, colorizer):
+    return colorizer.render(depth, out)
+
+
+def render_color(color, out):
+    np.copyto(out, color)
+    return out
@@ -0,0 +1,213 @@
+import time
+
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+def wrap_array(array, color_table=None):
+    """ QImage sharing memory with `array`; the caller must keep `array` alive.
+
+    Supported layouts are HxWx3 uint8 (RGB888), HxW uint16 (Grayscale16) and HxW uint8
+    (Indexed8 with `color_table`, Grayscale8 without).
+    """
+    height, width = array.shape[:2]
+    if array.dtype == np.uint8 and array.ndim == 3 and array.shape[2] == 3:
+        fmt = QtGui.QImage.Format_RGB888
+    elif array.dtype == np.uint16 and array.ndim == 2:
+        fmt = QtGui.QImage.Format_Grayscale16
+    elif array.dtype == np.uint8 and array.ndim == 2:
+        fmt = QtGui.QImage.Format_Indexed8 if color_table is not None else QtGui.QImage.Format_Grayscale8
+    else:
+        raise ValueError(f'unsupported frame layout {array.shape} {array.dtype}')
+    if array.strides[-1] != array.itemsize or (array.ndim == 3 and array.strides[1] != 3):
+        raise ValueError('frame rows must be contiguous')
+
+    image = QtGui.QImage(array.data, width, height, array.strides[0], fmt)
+    if color_table is not None:
+        image.setColorTable([int(c) for c in color_table])
+    return image
+
+
+class FrameView:
+
+    """ Shows persistent NumPy frame buffers in a QLabel.
+
+    Each buffer is wrapped in a QImage once and reused for every frame written into
+    it, so the only copy left per frame is the QPixmap upload. Copied bytes and time
+    spent per frame are accumulated for the status bar and benchmarks.
+
+    Frames are fitted into the label keeping their aspect ratio, never enlarged past
+    their own size. `fit` tells the renderer the size in device pixels that is, so
+    frames arrive already at it and the pixmap is shown as is.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.images = {}
+        self.frames = 0
+        self.bytes_copied = 0
+        self.seconds = 0.0
+
+    def image(self, array):
+        entry = self.images.get(id(array))
+        if entry is None or entry[0] is not array:
+            if any(cached.shape != array.shape for cached, _ in self.images.values()):
+                # The render size changed; buffers of the old one are not coming back.
+                self.images.clear()
+            entry = (array, wrap_array(array))
+            self.images[id(array)] = entry
+        return entry[1]
+
+    def is_visible(self):
+        return self.label.isVisible() and not self.label.window().isMinimized()
+
+    def logical_size(self, width, height):
+        size = QtCore.QSize(width, height)
+        fitted = size.scaled(self.label.size(), QtCore.Qt.KeepAspectRatio)
+        return size if fitted.width() >= width else fitted
+
+    def fit(self, width, height):
+        """ (width, height) in device pixels a width x height frame is shown at, (0, 0) while hidden. """
+        if not self.is_visible():
+            return 0, 0
+        ratio = self.label.devicePixelRatioF()
+        size = QtCore.QSize(width, height).scaled(self.label.size() * ratio, QtCore.Qt.KeepAspectRatio)
+        if size.width() >= width:
+            return width, height
+        return max(size.width(), 1), max(size.height(), 1)
+
+    def show(self, array, size=None):
+        """ Show `array`, a frame of `size` (QSize, default its own) rendered at any resolution. """
+        if not self.is_visible():
+            return
+        start = time.perf_counter()
+        width, height = (size.width(), size.height()) if size is not None else (array.shape[1], array.shape[0])
+        target = QtCore.QSize(*self.fit(width, height))
+        pixmap = QtGui.QPixmap.fromImage(self.image(array))
+        if abs(pixmap.width() - target.width()) > 1 or abs(pixmap.height() - target.height()) > 1:
+            # Rendered for another size (a preview, frames queued before a resize).
+            pixmap = pixmap.scaled(target, QtCore.Qt.KeepAspectRatio)
+        pixmap.setDevicePixelRatio(pixmap.width() / max(self.logical_size(width, height).width(), 1))
+        self.label.setPixmap(pixmap)
+        self.seconds += time.perf_counter() - start
+        self.bytes_copied += array.nbytes
+        self.frames += 1
+
+    def clear(self):
+        self.label.clear()
+        self.images.clear()
+
+    def reset_stats(self):
+        self.frames = 0
+        self.bytes_copied = 0
+        self.seconds = 0.0
+
+    @property
+    def usec_per_frame(self):
+        return self.seconds / self.frames * 1e6 if self.frames else 0.0
+
+    @property
+    def bytes_per_frame(self):
+        return self.bytes_copied / self.frames if self.frames else 0.0
+
+
+class TextOverlay(QtWidgets.QLabel):
+
+    """ Semi-transparent monospaced text box over the top-left corner of its parent. """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.setStyleSheet('background-color: rgba(0, 0, 0, 160); color: #e0e0e0; padding: 6px;')
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.hide()
+
+    def set_lines(self, lines):
+        self.setText('\n'.join(lines))
+        self.adjustSize()
+        self.move(8, 8)
+        self.raise_()
+
+
+class Sparkline(QtWidgets.QWidget):
+
+    """ Per-frame values drawn as bars, one column per group of frames, with marked frames highlighted.
+
+    A clip range set with `set_range` is shaded, its in and out frames drawn as lines,
+    over the frames given by the values or, until they are known, by `set_span`. Clicking emits `clicked` with the frame under the cursor.
+    """
+
+    clicked = QtCore.pyqtSignal(int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(24)
+        self.setMaximumHeight(24)
+        self.values = np.zeros(0, dtype=np.float32)
+        self.marks = None
+        self.first = 1
+        self.last = 0
+        self.range = None
+
+    def set_values(self, values, first=1):
+        """ `values[i]` belongs to frame `first + i`; bars are scaled to the 99th percentile. """
+        values = np.asarray(values, dtype=np.float32)
+        peak = float(np.percentile(values, 99)) if len(values) else 0.0
+        self.values = np.clip(values / peak, 0, 1) if peak > 0 else np.zeros_like(values)
+        self.first = first
+        self.last = first + len(values) - 1
+        self.marks = None
+        self.update()
+
+    def set_span(self, first, last):
+        """ Frames the line covers while there are no values for them yet. """
+        if not len(self.values):
+            self.first = first
+            self.last = last
+            self.update()
+
+    def set_marks(self, marks):
+        self.marks = marks
+        self.update()
+
+    def set_range(self, start, end):
+        """ In and out frames of the clip range, None for none. """
+        self.range = (start, end) if start is not None else None
+        self.update()
+
+    def clear(self):
+        self.set_values([])
+
+    def columns(self, values, width):
+        """ Maximum of `values` over each of `width` equal groups of frames. """
+        edges = np.linspace(0, len(values), width + 1).astype(int)
+        edges = np.minimum(edges, len(values) - 1)
+        return np.maximum.reduceat(values, edges[:-1])
+
+    def paintEvent(self, event):
+        frames = self.last - self.first + 1
+        if frames <= 0:
+            return
+        painter = QtGui.QPainter(self)
+        width, height = self.width(), self.height()
+        if len(self.values):
+            bars = self.columns(self.values, width)
+            marked = self.columns(self.marks.astype(np.uint8), width) if self.marks is not None else None
+            for x, value in enumerate(bars):
+                if marked is not None and marked[x]:
+                    painter.fillRect(x, 0, 1, height, QtGui.QColor(255, 160, 0, 110))
+                bar = int(round(value * (height - 1)))
+                if bar:
+                    painter.fillRect(x, height - bar, 1, bar, QtGui.QColor(70, 130, 200))
+        if self.range is not None:
+            start, end = (int((frame - self.first) * width / frames) for frame in self.range)
+            end = max(end, start + 1)
+            painter.fillRect(start, 0, end - start, height, QtGui.QColor(80, 200, 120, 60))
+            painter.fillRect(start, 0, 1, height, QtGui.QColor(40, 160, 80))
+            painter.fillRect(end - 1, 0, 1, height, QtGui.QColor(200, 60, 60))
+        painter.end()
+
+    def mousePressEvent(self, event):
+        if len(self.values):
+            i = min(max(event.x() * len(self.values) // max(self.width(), 1), 0), len(self.values) - 1)
+            self.clicked.emit(self.first + i)
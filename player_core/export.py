@@ -0,0 +1,203 @@
+""" Headless batch export of .oni recordings.
+
+    python -m player_core.export recordings/*.oni --out exported --format png --jobs 8
+
+Writes per frame 16-bit depth PNGs, colorized depth PNGs and color PNGs (`png`),
+depth/color stacks per frame range (`npz`) or colorized depth and color videos (`mp4`).
+Files are split into frame ranges of `--chunk` frames that are exported in parallel
+by a process pool; throughput is reported per file.
+"""
+import argparse
+import collections
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+from player_core import backends
+from player_core.backends import close_recording, open_recording
+from player_core.colorize import COLORMAPS, DEFAULT_FAR, DEFAULT_NEAR, DepthColorizer
+from player_core.convert import color_array, depth_array
+from player_core.filters import FILTERS, DepthFilters
+
+FORMATS = ('png', 'npz', 'mp4')
+
+
+def count_frames(path, backend):
+    device, engine = open_recording(path, backend, sync=False)
+    try:
+        return engine.last_frame
+    finally:
+        close_recording(device, engine)
+
+
+def read_range(engine, start, end):
+    """ Yield (position, depth, color) for frames start..end-1, reading sequentially. """
+    engine.seek(start)
+    for _ in range(start, end):
+        depth_frame, color_frame = engine.read()
+        yield engine.position, depth_array(depth_frame), color_array(color_frame)
+
+
+class PngWriter:
+    def __init__(self, out_dir, start, colorizer, fps):
+        self.out_dir = out_dir
+        self.colorizer = colorizer
+        self.rendered = None
+
+    def write(self, position, depth, color):
+        self.rendered = self.colorizer.render(depth, self.rendered)
+        name = f'{position:06d}.png'
+        cv2.imwrite(os.path.join(self.out_dir, 'depth_' + name), depth)
+        cv2.imwrite(os.path.join(self.out_dir, 'depth_color_' + name), cv2.cvtColor(self.rendered, cv2.COLOR_RGB2BGR))
+        cv2.imwrite(os.path.join(self.out_dir, 'color_' + name), cv2.cvtColor(color, cv2.COLOR_RGB2BGR))
+
+    def close(self):
+        pass
+
+
+class NpzWriter:
+    def __init__(self, out_dir, start, colorizer, fps):
+        self.path = os.path.join(out_dir, f'frames_{start:06d}.npz')
+        self.positions = []
+        self.depth = []
+        self.color = []
+
+    def write(self, position, depth, color):
+        self.positions.append(position)
+        self.depth.append(np.array(depth))
+        self.color.append(np.array(color))
+
+    def close(self):
+        if self.positions:
+            np.savez_compressed(
+                self.path, positions=np.array(self.positions), depth=np.stack(self.depth), color=np.stack(self.color),
+            )
+
+
+class Mp4Writer:
+    def __init__(self, out_dir, start, colorizer, fps):
+        self.out_dir = out_dir
+        self.start = start
+        self.colorizer = colorizer
+        self.fps = fps or 30
+        self.rendered = None
+        self.depth_video = None
+        self.color_video = None
+
+    def open(self, name, shape):
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        path = os.path.join(self.out_dir, f'{name}_{self.start:06d}.mp4')
+        return cv2.VideoWriter(path, fourcc, self.fps, (shape[1], shape[0]))
+
+    def write(self, position, depth, color):
+        self.rendered = self.colorizer.render(depth, self.rendered)
+        if self.depth_video is None:
+            self.depth_video = self.open('depth', depth.shape)
+            self.color_video = self.open('color', color.shape)
+        self.depth_video.write(cv2.cvtColor(self.rendered, cv2.COLOR_RGB2BGR))
+        self.color_video.write(cv2.cvtColor(color, cv2.COLOR_RGB2BGR))
+
+    def close(self):
+        if self.depth_video is not None:
+            self.depth_video.release()
+            self.color_video.release()
+
+
+WRITERS = {'png': PngWriter, 'npz': NpzWriter, 'mp4': Mp4Writer}
+
+
+def export_range(path, start, end, out_dir, options):
+    """ Export frames start..end-1 of one recording; runs in a worker process. """
+    started = time.perf_counter()
+    colorizer = DepthColorizer(options.near, options.far, options.colormap)
+    device, engine = open_recording(path, options.backend)
+    writer = WRITERS[options.format](out_dir, start, colorizer, engine.depth_stream.get_video_mode().fps)
+    filters = DepthFilters(options.filters)
+    frames = 0
+    try:
+        for position, depth, color in read_range(engine, start, end):
+            writer.write(position, filters.apply(depth, position), color)
+            frames += 1
+    finally:
+        writer.close()
+        close_recording(device, engine)
+    return path, frames, time.perf_counter() - started
+
+
+def plan(paths, options):
+    """ Split every recording into (path, start, end, out_dir) tasks of `options.chunk` frames. """
+    tasks = []
+    for path in paths:
+        frames = count_frames(path, options.backend)
+        if not frames:
+            print(f'{path}: no frames, skipped')
+            continue
+        out_dir = os.path.join(options.out, os.path.splitext(os.path.basename(path))[0])
+        os.makedirs(out_dir, exist_ok=True)
+        chunk = options.chunk or frames
+        for start in range(1, frames + 1, chunk):
+            tasks.append((path, start, min(start + chunk, frames + 1), out_dir))
+    return tasks
+
+
+def rate(frames, seconds):
+    return frames / seconds if seconds > 0 else 0.0
+
+
+def run(paths, options):
+    tasks = plan(paths, options)
+    frames = collections.Counter()
+    seconds = collections.Counter()
+    first_start = {}
+    last_end = {}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=options.jobs) as pool:
+        futures = {pool.submit(export_range, *task, options): task for task in tasks}
+        for future in as_completed(futures):
+            path, done, spent = future.result()
+            now = time.perf_counter()
+            frames[path] += done
+            seconds[path] += spent
+            first_start[path] = min(first_start.get(path, now - spent), now - spent)
+            last_end[path] = now
+
+    for path in paths:
+        if path not in last_end:
+            # Skipped by plan.
+            continue
+        wall = last_end[path] - first_start[path]
+        print(f'{path}: {frames[path]} frames in {wall:.1f} s, '
+              f'{rate(frames[path], wall):.1f} fps ({rate(frames[path], seconds[path]):.1f} fps per worker)')
+    total = sum(frames.values())
+    elapsed = time.perf_counter() - started
+    print(f'total: {total} frames from {len(paths)} files in {elapsed:.1f} s, {rate(total, elapsed):.1f} fps')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Export depth/color frames from .oni recordings.')
+    parser.add_argument('paths', nargs='+', help='.oni recordings')
+    parser.add_argument('--out', default='exported', help='output directory, one subdirectory per recording')
+    parser.add_argument('--format', choices=FORMATS, default='png')
+    parser.add_argument('--backend', choices=backends.BACKENDS, default='native')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk', type=int, default=0, help='frames per task, 0 exports each file as one task')
+    parser.add_argument('--colormap', choices=COLORMAPS, default='linear')
+    parser.add_argument('--near', type=int, default=DEFAULT_NEAR, help='near end of the colorized depth range, mm')
+    parser.add_argument('--far', type=int, default=DEFAULT_FAR, help='far end of the colorized depth range, mm')
+    parser.add_argument('--filters', nargs='+', choices=FILTERS, default=[],
+                        help='clean up depth before writing; temporal filters restart at every --chunk')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    run(options.paths, options)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
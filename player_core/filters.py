@@ -0,0 +1,207 @@
+""" Optional clean-up of raw uint16 depth before it is rendered or exported.
+
+Every filter works in place on a float32 frame held by `DepthFilters`, using
+preallocated buffers, so enabling them allocates nothing per frame. Zero stays the
+"no reading" value throughout.
+"""
+import cv2
+import numpy as np
+
+FILTERS = ('holes', 'spatial', 'ema', 'median')
+TITLES = {'holes': 'Fill holes', 'spatial': 'Spatial smoothing', 'ema': 'Temporal average', 'median': 'Temporal median'}
+
+
+class HoleFill:
+
+    """ Fills zero pixels with the farthest valid depth around them.
+
+    Holes mostly sit on the background side of occlusion edges, so taking the farthest
+    neighbour (a grey dilation) extends the background instead of smearing the edge.
+    Each pass grows the valid area `size` // 2 pixels into the holes.
+    """
+
+    temporal = False
+
+    def __init__(self, size=5, passes=2):
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+        self.passes = passes
+        self.dilated = None
+        self.holes = None
+
+    def apply(self, depth):
+        if self.dilated is None or self.dilated.shape != depth.shape:
+            self.dilated = np.empty_like(depth)
+            self.holes = np.empty(depth.shape, dtype=bool)
+        for _ in range(self.passes):
+            np.equal(depth, 0, out=self.holes)
+            cv2.dilate(depth, self.kernel, dst=self.dilated)
+            np.copyto(depth, self.dilated, where=self.holes)
+        return depth
+
+
+class SpatialSmooth:
+
+    """ Edge-preserving smoothing: a bilateral filter with `sigma_depth` in mm.
+
+    Depth steps much larger than `sigma_depth` (object edges, holes) are left sharp.
+    """
+
+    temporal = False
+
+    def __init__(self, diameter=5, sigma_depth=40.0, sigma_space=3.0):
+        self.diameter = diameter
+        self.sigma_depth = sigma_depth
+        self.sigma_space = sigma_space
+        self.out = None
+        self.holes = None
+
+    def apply(self, depth):
+        if self.out is None or self.out.shape != depth.shape:
+            self.out = np.empty_like(depth)
+            self.holes = np.empty(depth.shape, dtype=bool)
+        cv2.bilateralFilter(depth, self.diameter, self.sigma_depth, self.sigma_space, dst=self.out)
+        # Keep holes as holes instead of letting their neighbours bleed in.
+        np.equal(depth, 0, out=self.holes)
+        np.copyto(self.out, depth, where=self.holes)
+        return self.out
+
+
+class TemporalEma:
+
+    """ Exponential moving average over consecutive frames.
+
+    A pixel is only averaged while its change stays under `delta` mm, so moving edges
+    are not dragged; a pixel missing in the new frame keeps its last value.
+    """
+
+    temporal = True
+
+    def __init__(self, alpha=0.4, delta=100.0):
+        self.alpha = alpha
+        self.delta = delta
+        self.state = None
+        self.started = False
+
+    def reset(self):
+        self.started = False
+
+    def apply(self, depth):
+        if self.state is None or self.state.shape != depth.shape:
+            self.state = np.empty_like(depth)
+            self.change = np.empty_like(depth)
+            self.distance = np.empty_like(depth)
+            self.blend = np.empty(depth.shape, dtype=bool)
+            self.valid = np.empty(depth.shape, dtype=bool)
+            self.known = np.empty(depth.shape, dtype=bool)
+            self.started = False
+        if not self.started:
+            np.copyto(self.state, depth)
+            self.started = True
+            return depth
+        np.subtract(depth, self.state, out=self.change)
+        np.abs(self.change, out=self.distance)
+        np.less(self.distance, self.delta, out=self.blend)
+        np.greater(depth, 0, out=self.valid)
+        np.greater(self.state, 0, out=self.known)
+        self.blend &= self.valid
+        self.blend &= self.known
+        self.change *= self.alpha
+        np.add(self.state, self.change, out=self.state, where=self.blend)
+        # Large changes and readings where there was none replace the average.
+        np.logical_not(self.blend, out=self.known)
+        self.known &= self.valid
+        np.copyto(self.state, depth, where=self.known)
+        np.copyto(depth, self.state)
+        return depth
+
+
+class TemporalMedian:
+
+    """ Per-pixel median of the last `window` frames (odd), holes included.
+
+    The frames are kept in a ring; the median is selected with elementwise min/max
+    exchanges instead of a sort, which is much faster than np.median over axis 0.
+    """
+
+    temporal = True
+
+    def __init__(self, window=5):
+        if window % 2 == 0:
+            raise ValueError('the median window must be odd')
+        self.window = window
+        self.ring = None
+        self.work = None
+        self.low = None
+        self.count = 0
+        self.next = 0
+
+    def reset(self):
+        self.count = 0
+        self.next = 0
+
+    def apply(self, depth):
+        if self.ring is None or self.ring.shape[1:] != depth.shape:
+            self.ring = np.empty((self.window,) + depth.shape, dtype=depth.dtype)
+            self.work = np.empty_like(self.ring)
+            self.low = np.empty_like(depth)
+            self.reset()
+        self.ring[self.next] = depth
+        self.next = (self.next + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+        # Until the ring is full, use the largest odd number of frames available.
+        n = self.count if self.count % 2 else self.count - 1
+        frames = self.work[:n]
+        np.copyto(frames, self.ring[:n])
+        # Partial selection sort: after pass i, frames[i] holds the i-th smallest value.
+        for i in range(n // 2 + 1):
+            for j in range(i + 1, n):
+                np.minimum(frames[i], frames[j], out=self.low)
+                np.maximum(frames[i], frames[j], out=frames[j])
+                np.copyto(frames[i], self.low)
+        np.copyto(depth, frames[n // 2])
+        return depth
+
+
+FACTORIES = {'holes': HoleFill, 'spatial': SpatialSmooth, 'ema': TemporalEma, 'median': TemporalMedian}
+
+
+class DepthFilters:
+
+    """ The enabled filters, applied in the order of FILTERS.
+
+    `apply` takes the frame position so temporal filters can start over whenever the
+    frames stop being consecutive (a seek, a skip, the wrap-around). The returned array
+    is reused by the next call.
+    """
+
+    def __init__(self, names=()):
+        self.names = tuple(name for name in FILTERS if name in names)
+        self.filters = [FACTORIES[name]() for name in self.names]
+        self.position = None
+        self.work = None
+        self.out = None
+
+    def __bool__(self):
+        return bool(self.filters)
+
+    def __str__(self):
+        return '+'.join(self.names) or 'none'
+
+    def apply(self, depth, position=None):
+        if not self.filters:
+            return depth
+        if position is None or self.position is None or position != self.position + 1:
+            for depth_filter in self.filters:
+                if depth_filter.temporal:
+                    depth_filter.reset()
+        self.position = position
+        if self.work is None or self.work.shape != depth.shape:
+            self.work = np.empty(depth.shape, dtype=np.float32)
+            self.out = np.empty(depth.shape, dtype=np.uint16)
+        np.copyto(self.work, depth)
+        frame = self.work
+        for depth_filter in self.filters:
+            frame = depth_filter.apply(frame)
+        np.rint(frame, out=frame)
+        np.copyto(self.out, frame, casting='unsafe')
+        return self.out
@@ -0,0 +1,180 @@
+""" Several recordings played side by side on one shared timeline.
+
+Every recording gets its own `GridSource` worker thread that decodes and renders the
+frame the timeline asks for. Tiles are decimated so that the pixels rendered per
+refresh stay within `PIXEL_BUDGET` however many recordings are open.
+"""
+import math
+import threading
+
+import numpy as np
+
+from player_core.convert import color_array, depth_array
+from player_core.backends import close_recording, open_recording
+from player_core.prefetch import FrameSlot
+
+# Depth pixels rendered per refresh over the whole grid (color is decimated alike).
+PIXEL_BUDGET = 2 * 640 * 480
+
+
+def tile_stride(width, height, count, budget=PIXEL_BUDGET, fit=None):
+    """ Pixel step for one of `count` width x height tiles sharing `budget` pixels.
+
+    With `fit`, the (width, height) of the viewport, the tile is also decimated down to
+    about the size it is shown at. A budget of 0 only applies `fit`.
+    """
+    stride = 1
+    if budget:
+        stride = math.ceil(math.sqrt(width * height * count / budget))
+    if fit is not None:
+        stride = max(stride, width // max(fit[0], 1), height // max(fit[1], 1))
+    return max(stride, 1)
+
+
+class Timeline:
+
+    """ Maps a shared time axis, in microseconds, onto the frames of several recordings.
+
+    Recordings are lined up at their first depth frame, or by their raw timestamps with
+    `absolute` (sensors of one rig sharing a clock). Steps are the shortest nominal
+    frame interval among them.
+    """
+
+    def __init__(self, timestamps, absolute=False):
+        timestamps = [np.asarray(t, dtype=np.int64) for t in timestamps]
+        origin = min(int(t[0]) for t in timestamps)
+        self.times = [t - (origin if absolute else t[0]) for t in timestamps]
+        self.duration = max(int(t[-1]) for t in self.times)
+        intervals = [np.median(np.diff(t)) for t in self.times if len(t) > 1]
+        self.interval = max(int(min(intervals)), 1) if intervals else 33333
+        self.steps = self.duration // self.interval + 1
+
+    def time(self, step):
+        return step * self.interval
+
+    def step(self, time):
+        return min(max(int(time // self.interval), 0), self.steps - 1)
+
+    def positions(self, time):
+        """ 1-based depth frame of every recording shown at `time` (the last one started). """
+        return [int(np.clip(np.searchsorted(t, time, side='right'), 1, len(t))) for t in self.times]
+
+
+class GridSource(threading.Thread):
+
+    """ Decodes one recording of the grid on its own thread.
+
+    `request` asks for a frame; only the latest request is served, so a recording that
+    cannot keep up skips frames instead of falling behind the others. Rendered tiles are
+    double-buffered: the worker fills `back` and swaps it with `front` under `lock`,
+    which the display holds while it reads `front`.
+    """
+
+    def __init__(self, path, backend, colorizer, stride=1):
+        super().__init__(daemon=True)
+        self.path = path
+        self.colorizer = colorizer
+        self.device, self.engine = open_recording(path, backend)
+        self.sync = self.engine.sync
+        self.depth_shape, self.color_shape = self.engine.frame_shapes()
+        self.stride = stride
+        self.front = None
+        self.back = None
+        self.wanted = None
+        self.rendered = None
+        self.fresh = False
+        self.requested = 0
+        self.skipped = 0
+        self.stopped = False
+        self.lock = threading.Lock()
+        self.condition = threading.Condition(self.lock)
+
+    @property
+    def timestamps(self):
+        return self.sync.depth_timestamps
+
+    def request(self, position, stride=None):
+        with self.condition:
+            stride = self.stride if stride is None else stride
+            if (position, stride) == self.wanted:
+                return
+            if self.wanted is not None and self.wanted != self.rendered:
+                self.skipped += 1
+            self.wanted = (position, stride)
+            self.stride = stride
+            self.requested += 1
+            self.condition.notify_all()
+
+    def take(self):
+        """ The front slot if it changed since the last call, else None; call with `lock` held. """
+        if not self.fresh:
+            return None
+        self.fresh = False
+        return self.front
+
+    def wait(self, timeout=None):
+        """ Block until the latest request has been rendered. """
+        with self.condition:
+            return self.condition.wait_for(lambda: self.rendered == self.wanted or self.stopped, timeout)
+
+    def run(self):
+        try:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.wanted != self.rendered or self.stopped)
+                    if self.stopped:
+                        break
+                    wanted = self.wanted
+                self.render(*wanted)
+                with self.condition:
+                    self.front, self.back = self.back, self.front
+                    self.rendered = wanted
+                    self.fresh = True
+                    self.condition.notify_all()
+        finally:
+            # Never leave `wait` blocked on a worker that died.
+            with self.condition:
+                self.stopped = True
+                self.condition.notify_all()
+
+    def render(self, position, stride):
+        depth_frame, color_frame = self.engine.read_at(position)
+        depth = depth_array(depth_frame)[::stride, ::stride]
+        color = color_array(color_frame)[::stride, ::stride]
+        if self.back is None or self.back.depth.shape[:2] != depth.shape or self.back.color.shape[:2] != color.shape:
+            self.back = FrameSlot(depth.shape, color.shape[:2])
+        self.back.fill(position, depth, color, self.colorizer)
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.is_alive():
+            self.join()
+        close_recording(self.device, self.engine)
+
+
+def open_sources(paths, backend, colorizer):
+    """ Open every recording in parallel and return their started `GridSource`s. """
+    sources = [None] * len(paths)
+    errors = []
+
+    def open_one(i, path):
+        try:
+            sources[i] = GridSource(path, backend, colorizer)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_one, args=item) for item in enumerate(paths)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        for source in sources:
+            if source is not None:
+                close_recording(source.device, source.engine)
+        raise errors[0]
+    for source in sources:
+        source.start()
+    return sources
@@ -0,0 +1,220 @@
+""" Window playing several recordings side by side on one timeline.
+
+    python -m player_core.gridview rig/*.oni --backend native
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+from PyQt5 import QtCore, QtWidgets
+
+from player_core import backends
+from player_core.colorize import DepthColorizer
+from player_core.display import FrameView
+from player_core.grid import PIXEL_BUDGET, Timeline, open_sources, tile_stride
+from player_core.playback import FpsMeter
+
+# Refresh period of the status line, ms.
+STATUS_INTERVAL = 500
+
+
+class Tile(QtWidgets.QFrame):
+
+    """ Depth and color of one recording, with its name and current frame. """
+
+    def __init__(self, title):
+        super().__init__()
+        self.setFrameShape(QtWidgets.QFrame.StyledPanel)
+        self.title = title
+        self.caption = QtWidgets.QLabel(title)
+        labels = [QtWidgets.QLabel(), QtWidgets.QLabel()]
+        for label in labels:
+            label.setAlignment(QtCore.Qt.AlignCenter)
+            label.setSizePolicy(QtWidgets.QSizePolicy.Ignored, QtWidgets.QSizePolicy.Ignored)
+            label.setMinimumSize(80, 60)
+        self.depth_view = FrameView(labels[0])
+        self.color_view = FrameView(labels[1])
+
+        images = QtWidgets.QHBoxLayout()
+        for label in labels:
+            images.addWidget(label)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(2, 2, 2, 2)
+        layout.addWidget(self.caption)
+        layout.addLayout(images, 1)
+
+    def viewport(self):
+        size = self.depth_view.label.size()
+        return size.width(), size.height()
+
+    def show_slot(self, slot):
+        for view, array in ((self.depth_view, slot.depth), (self.color_view, slot.color)):
+            size = QtCore.QSize(array.shape[1], array.shape[0]).scaled(view.label.size(), QtCore.Qt.KeepAspectRatio)
+            view.show(array, size)
+        self.caption.setText(f'{self.title}  #{slot.index}')
+
+
+class GridWindow(QtWidgets.QWidget):
+
+    """ A grid of recordings driven by one slider and one play button.
+
+    The timeline is advanced by a timer at the shortest frame interval among the
+    recordings; on every tick each source is asked for its frame at the current time and
+    whichever tiles are ready are painted. Tiles are decimated to their viewport and to
+    a shared pixel budget, so the work per tick stays bounded as recordings are added.
+    """
+
+    def __init__(self, paths, backend='native', absolute=False, budget=PIXEL_BUDGET):
+        super().__init__()
+        self.setWindowTitle(f'ONI grid - {len(paths)} recordings')
+        self.budget = budget
+        self.colorizer = DepthColorizer()
+        self.sources = open_sources(paths, backend, self.colorizer)
+        self.timeline = Timeline([source.timestamps for source in self.sources], absolute)
+        self.time = 0
+        self.started = None
+        self.meter = FpsMeter()
+
+        self.tiles = [Tile(os.path.basename(os.fsdecode(path))) for path in paths]
+        grid = QtWidgets.QGridLayout()
+        columns = math.ceil(math.sqrt(len(self.tiles)))
+        for i, tile in enumerate(self.tiles):
+            grid.addWidget(tile, i // columns, i % columns)
+
+        self.play_button = QtWidgets.QPushButton('Play')
+        self.play_button.clicked.connect(self.play)
+        self.slider = QtWidgets.QSlider(QtCore.Qt.Horizontal)
+        self.slider.setRange(0, self.timeline.steps - 1)
+        self.slider.valueChanged.connect(self.slider_moved)
+        self.time_label = QtWidgets.QLabel()
+        self.status = QtWidgets.QLabel()
+        controls = QtWidgets.QHBoxLayout()
+        controls.addWidget(self.play_button)
+        controls.addWidget(self.slider, 1)
+        controls.addWidget(self.time_label)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addLayout(grid, 1)
+        layout.addLayout(controls)
+        layout.addWidget(self.status)
+        self.resize(1280, 800)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.setInterval(max(self.timeline.interval // 1000, 1))
+        self.timer.timeout.connect(self.tick)
+        self.status_timer = QtCore.QTimer(self)
+        self.status_timer.timeout.connect(self.show_status)
+        self.status_timer.start(STATUS_INTERVAL)
+        self.strides = [1] * len(self.sources)
+        self.update_strides()
+        self.seek(0)
+
+    def update_strides(self):
+        count = len(self.sources)
+        for i, (source, tile) in enumerate(zip(self.sources, self.tiles)):
+            height, width = source.depth_shape
+            self.strides[i] = tile_stride(width, height, count, self.budget, tile.viewport())
+
+    def request(self):
+        for source, position, stride in zip(self.sources, self.timeline.positions(self.time), self.strides):
+            source.request(position, stride)
+
+    def collect(self):
+        """ Paint every tile whose source rendered a new frame; returns how many did. """
+        painted = 0
+        for source, tile in zip(self.sources, self.tiles):
+            with source.lock:
+                slot = source.take()
+                if slot is not None:
+                    tile.show_slot(slot)
+                    painted += 1
+        if painted:
+            self.meter.tick()
+        return painted
+
+    def move_to(self, at):
+        """ Put the timeline at `at` us and ask every source for its frame there. """
+        self.time = at
+        self.slider.blockSignals(True)
+        self.slider.setValue(self.timeline.step(at))
+        self.slider.blockSignals(False)
+        self.time_label.setText(f'{at / 1e6:8.2f} s')
+        self.request()
+
+    def seek(self, at):
+        if self.started is not None:
+            self.started = (time.perf_counter(), at)
+        self.move_to(at)
+
+    def slider_moved(self, step):
+        self.seek(self.timeline.time(step))
+        for source in self.sources:
+            source.wait(1.0)
+        self.collect()
+
+    def play(self):
+        if self.timer.isActive():
+            self.timer.stop()
+            self.started = None
+            self.play_button.setText('Play')
+            return
+        if self.time >= self.timeline.duration:
+            self.seek(0)
+        self.started = (time.perf_counter(), self.time)
+        self.timer.start()
+        self.play_button.setText('Pause')
+
+    def tick(self):
+        wall, origin = self.started
+        now = origin + int((time.perf_counter() - wall) * 1e6)
+        if now > self.timeline.duration:
+            now = 0
+            self.started = (time.perf_counter(), 0)
+        self.move_to(now)
+        self.collect()
+
+    def show_status(self):
+        skipped = sum(source.skipped for source in self.sources)
+        requested = sum(source.requested for source in self.sources)
+        strides = sorted(set(self.strides))
+        self.status.setText(
+            f'{len(self.sources)} recordings, {self.meter.fps:.1f} refreshes/s, '
+            f'{skipped} of {requested} frames skipped, tile stride {"/".join(map(str, strides))}'
+        )
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_strides()
+        self.request()
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        for source in self.sources:
+            source.stop()
+        super().closeEvent(event)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Play several .oni recordings side by side.')
+    parser.add_argument('paths', nargs='+', help='.oni or .oniz recordings')
+    parser.add_argument('--backend', choices=backends.BACKENDS, default='native')
+    parser.add_argument('--absolute', action='store_true',
+                        help='align recordings by their raw timestamps instead of their first frames')
+    parser.add_argument('--budget', type=int, default=PIXEL_BUDGET,
+                        help='depth pixels rendered per refresh over all tiles, 0 for no limit')
+    return parser.parse_known_args(argv)
+
+
+def main(argv=None):
+    args, qt_args = parse_args(argv)
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    window = GridWindow(args.paths, args.backend, args.absolute, args.budget)
+    window.show()
+    return app.exec_()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+""" Hot-path timing that is cheap enough to leave on.
+
+Every stage keeps its last `window` durations, counters keep their last value. With
+`tracing` on, stages and counters are also recorded as Chrome trace events (open the
+dump in chrome://tracing or https://ui.perfetto.dev); the event buffer is bounded so a
+long session only keeps its most recent part.
+"""
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+TRACE_EVENTS = 200000
+
+
+class Profiler:
+    def __init__(self, window=300, tracing=False):
+        self.window = window
+        self.tracing = tracing
+        self.durations = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self.counters = {}
+        self.events = collections.deque(maxlen=TRACE_EVENTS)
+        self.threads = {}
+        self.origin = time.perf_counter_ns()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter_ns())
+
+    def record(self, name, start, end):
+        """ Add one `name` stage that ran from `start` to `end` (perf_counter_ns). """
+        self.durations[name].append(end - start)
+        if self.tracing:
+            self.events.append({
+                'name': name, 'ph': 'X', 'ts': (start - self.origin) / 1000, 'dur': (end - start) / 1000,
+                'pid': os.getpid(), 'tid': self.thread_id(),
+            })
+
+    def count(self, name, value):
+        self.counters[name] = value
+        if self.tracing:
+            self.events.append({
+                'name': name, 'ph': 'C', 'ts': (time.perf_counter_ns() - self.origin) / 1000,
+                'pid': os.getpid(), 'args': {name: value},
+            })
+
+    def thread_id(self):
+        ident = threading.get_ident()
+        if ident not in self.threads:
+            self.threads[ident] = threading.current_thread().name
+        return ident
+
+    def stats(self, name):
+        """ (mean, p95, max) of the stage's recent durations in ms. """
+        durations = self.durations.get(name)
+        if not durations:
+            return 0.0, 0.0, 0.0
+        ms = np.array(durations) / 1e6
+        return float(ms.mean()), float(np.percentile(ms, 95)), float(ms.max())
+
+    def histogram(self, name, bins=10):
+        """ Counts and ms bin edges of the stage's recent durations. """
+        return np.histogram(np.array(self.durations.get(name, ()), dtype=np.float64) / 1e6, bins=bins)
+
+    def lines(self):
+        rows = []
+        for name in list(self.durations):
+            mean, p95, peak = self.stats(name)
+            rows.append(f'{name:<9}{mean:7.2f} {p95:7.2f} {peak:7.2f} ms')
+        rows.extend(f'{name:<9}{value:>7}' for name, value in list(self.counters.items()))
+        return rows
+
+    def reset(self):
+        self.durations.clear()
+        self.counters.clear()
+
+    def dump_trace(self, path):
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': ident, 'args': {'name': name}}
+            for ident, name in list(self.threads.items())
+        ]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': metadata + list(self.events), 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,592 @@
+""" Reader for .oni recordings that does not need the OpenNI runtime.
+
+The container is parsed directly from a memory map: a 24 byte file header ("NI10")
+followed by records, each with a 28 byte header ("NIR\\0" magic, record type, node id,
+size of header + fields, payload size, undo position). Node-added records describe
+the streams, property records their video mode and new-data records carry one frame
+each. Opening a file only walks the record headers to build a per-stream frame index;
+frame payloads are decoded on demand, uncompressed ones as zero-copy NumPy views.
+
+`OniDevice`, `OniStream` and `OniPlaybackSupport` mirror the parts of
+`openni.openni2` the players use, so either backend can be plugged into `OniPlayer`.
+"""
+import math
+import mmap
+import os
+import struct
+
+import cv2
+import numpy as np
+
+FILE_MAGIC = b'NI10'
+RECORD_MAGIC = 0x0052494E
+
+FILE_HEADER = struct.Struct('<4sBBHIQI')
+RECORD_HEADER = struct.Struct('<IIIIIQ')
+UINT32 = struct.Struct('<I')
+UINT64 = struct.Struct('<Q')
+DOUBLE = struct.Struct('<d')
+NEW_DATA_FIELDS = struct.Struct('<QI')
+
+RECORD_NODE_ADDED_1_0_0_4 = 0x02
+RECORD_INT_PROPERTY = 0x03
+RECORD_REAL_PROPERTY = 0x04
+RECORD_STRING_PROPERTY = 0x05
+RECORD_GENERAL_PROPERTY = 0x06
+RECORD_NODE_REMOVED = 0x07
+RECORD_NODE_DATA_BEGIN = 0x08
+RECORD_NODE_STATE_READY = 0x09
+RECORD_NEW_DATA = 0x0A
+RECORD_END = 0x0B
+RECORD_NODE_ADDED_1_0_0_5 = 0x0C
+RECORD_NODE_ADDED = 0x0D
+RECORD_SEEK_TABLE = 0x0E
+
+NODE_ADDED_RECORDS = (RECORD_NODE_ADDED_1_0_0_4, RECORD_NODE_ADDED_1_0_0_5, RECORD_NODE_ADDED)
+
+NODE_TYPE_DEPTH = 2
+NODE_TYPE_IMAGE = 3
+NODE_TYPE_IR = 5
+
+CODEC_NONE = b'NONE'
+CODEC_16Z = b'16zP'
+CODEC_16Z_EMB_TABLE = b'16zT'
+CODEC_8Z = b'Im8z'
+CODEC_JPEG = b'JPEG'
+
+PIXEL_FORMAT_DEPTH_1_MM = 100
+PIXEL_FORMAT_RGB888 = 200
+
+# PrimeSense reference sensor, used when a recording carries no optics properties.
+DEFAULT_HFOV = math.radians(58.0)
+DEFAULT_VFOV = math.radians(45.0)
+
+# Records parsed between two progress reports while opening a file.
+PROGRESS_RECORDS = 4096
+
+FRAME_INDEX_DTYPE = np.dtype([
+    ('record', np.int64),
+    ('offset', np.int64),
+    ('size', np.int64),
+    ('timestamp', np.uint64),
+    ('number', np.uint32),
+])
+
+
+class OniFormatError(ValueError):
+    pass
+
+
+class VideoMode:
+    def __init__(self, pixelFormat, resolutionX, resolutionY, fps):
+        self.pixelFormat = pixelFormat
+        self.resolutionX = resolutionX
+        self.resolutionY = resolutionY
+        self.fps = fps
+
+
+def _read_string(buf, offset):
+    size, = UINT32.unpack_from(buf, offset)
+    offset += UINT32.size
+    return bytes(buf[offset:offset + size]).rstrip(b'\0').decode('latin-1'), offset + size
+
+
+# A byte of a variable-length code maps the bytes still to skip before the next token
+# (0, 1 or 2; 0 means a token starts at it) to the count after it. Such a map is coded
+# as f(0) + 3 f(1) + 9 f(2); _APPLY[code, state] evaluates it and _COMPOSE[g, f] codes g after f.
+_APPLY = np.array([[code % 3, code // 3 % 3, code // 9] for code in range(27)], dtype=np.uint8)
+_COMPOSE = (_APPLY[np.arange(27)[:, None, None], _APPLY[None]].astype(np.uint8) * [1, 3, 9]).sum(-1).astype(np.uint8)
+_IDENTITY = 0 + 3 * 1 + 9 * 2
+
+
+def _token_starts(lengths):
+    """ Offsets of the tokens of a variable-length code, given each position's token length.
+
+    Walking 0 -> 0 + len(0) -> ... is a 3-state automaton (payload bytes left to skip),
+    and chaining its per-byte transitions is associative. A tree of pairwise compositions
+    is built bottom-up, then walked top-down to give the state at every byte: O(log n)
+    array operations, no loop over the data.
+    """
+    # A token of length l starts at state 0 and leaves l - 1 bytes to skip; others count down.
+    codes = (np.asarray(lengths) - 1 + 3 * 0 + 9 * 1).astype(np.uint8)
+    n = len(codes)
+    levels = []
+    while len(codes) > 1:
+        if len(codes) & 1:
+            codes = np.append(codes, np.uint8(_IDENTITY))
+        levels.append(codes)
+        codes = _COMPOSE[codes[1::2], codes[0::2]]
+    states = np.zeros(1, dtype=np.uint8)
+    for codes in reversed(levels):
+        states = states[:len(codes) // 2]
+        below = np.empty(len(codes), dtype=np.uint8)
+        below[0::2] = states
+        below[1::2] = _APPLY[codes[0::2], states]
+        states = below
+    return np.flatnonzero(states[:n] == 0)
+
+
+# 16z token layout by leading byte:
+#   < 0xE0, low nibble != F: two 4-bit deltas (low nibble D pads the last one)
+#   < 0xE0, low nibble == F: one 4-bit delta then a large value
+#   0xE0..0xFE:              run of 2 * (byte - 0xE0) unchanged values
+#   0xFF:                    a large value
+# A large value follows the leading byte: one byte holding a 7-bit delta (high bit
+# set) or two bytes holding the big-endian absolute value. Per leading byte: whether a
+# large value follows, values decoded and the delta of the first and second of them
+# (0 where there is none).
+_LEAD = np.arange(256)
+_SMALL = _LEAD < 0xE0
+_HAS_LARGE = (_SMALL & (_LEAD & 0x0F == 0x0F)) | (_LEAD == 0xFF)
+_OUTPUTS = np.where(_SMALL, 2 - (_LEAD & 0x0F == 0x0D), np.where(_HAS_LARGE, 1, 2 * (_LEAD - 0xE0))).astype(np.int32)
+_FIRST_DELTA = np.where(_SMALL, (_LEAD >> 4) - 6, 0).astype(np.int32)
+_SECOND_DELTA = np.where(_SMALL & (_LEAD & 0x0F < 0x0D), (_LEAD & 0x0F) - 6, 0).astype(np.int32)
+
+
+def decompress_16z(payload, count):
+    """ Decode PrimeSense 16z depth (deltas, zero runs and absolute values). """
+    first, = struct.unpack_from('<H', payload, 0)
+    data = np.frombuffer(payload, dtype=np.uint8, offset=2)
+    if not len(data):
+        return np.full(count, first, dtype=np.uint16)
+
+    padded = np.concatenate([data, np.zeros(2, dtype=np.uint8)])
+    has_large = _HAS_LARGE[data]
+    lengths = 1 + has_large * (2 - (padded[1:len(data) + 1] >> 7))
+    starts = _token_starts(lengths)
+    lead = data[starts]
+    if not _OUTPUTS[lead].all():
+        # Empty runs; they would share a position with the token after them.
+        starts = starts[_OUTPUTS[lead] > 0]
+        lead = data[starts]
+        if not len(starts):
+            out = np.zeros(count, dtype=np.uint16)
+            out[:1] = first
+            return out
+
+    # Where each token's values go, 0 being `first`. A token with one value writes a
+    # zero second delta over the next token's first, which the first deltas then replace.
+    outputs = _OUTPUTS[lead]
+    position = np.cumsum(outputs, dtype=np.int32) - outputs + 1
+    total = int(position[-1] + outputs[-1])
+    delta = np.zeros(total + 1, dtype=np.int32)
+    delta[position + 1] = _SECOND_DELTA[lead]
+    delta[position] = _FIRST_DELTA[lead]
+
+    # A large value is the last of its token. Its delta is written whether it is one or
+    # not: an absolute value restarts the sum below, which cancels the delta at it.
+    tokens = np.flatnonzero(_HAS_LARGE[lead])
+    large_at = position[tokens] + outputs[tokens] - 1
+    large_starts = starts[tokens]
+    large = padded[large_starts + 1].astype(np.int32)
+    delta[large_at] = large - 192
+    absolute = large < 0x80
+
+    # Each value is the previous one minus its delta; every value up to the next absolute
+    # one is that value minus the deltas since.
+    consumed = np.cumsum(delta[:total], dtype=np.int32)
+    restarts = np.concatenate([[0], large_at[absolute]])
+    values = np.concatenate([[first], (large[absolute] << 8) | padded[large_starts[absolute] + 2]])
+    base = values + consumed[restarts]
+    out = (np.repeat(base, np.diff(np.append(restarts, total))) - consumed).astype(np.uint16)
+
+    if len(out) < count:
+        out = np.concatenate([out, np.zeros(count - len(out), dtype=np.uint16)])
+    return out[:count]
+
+
+def decompress_16z_emb_table(payload, count):
+    table_size, = struct.unpack_from('<H', payload, 0)
+    table = np.frombuffer(payload, dtype=np.uint16, count=table_size, offset=2)
+    indices = decompress_16z(payload[2 + 2 * table_size:], count)
+    return table[np.minimum(indices, max(table_size - 1, 0))]
+
+
+def compress_16z(values):
+    """ Encode depth as 16z: pairs of 4-bit deltas and 7-bit deltas or absolute values.
+
+    Values must stay below 0x8000. Zero runs are not used, so the output is somewhat
+    larger than the PrimeSense encoder's but decodes to the same values.
+    """
+    values = np.asarray(values, dtype=np.uint16).reshape(-1)
+    if not len(values):
+        return b''
+    header = struct.pack('<H', int(values[0]))
+    v = values.astype(np.int32)
+    d = v[:-1] - v[1:]
+    n = len(d)
+    if not n:
+        return header
+    small = np.abs(d) <= 6
+
+    # The encoder pairs consecutive small deltas; a large one flushes a pending small
+    # delta into its leading byte. Whether a small delta is pending is the parity of
+    # the small deltas seen since the previous large one.
+    index = np.arange(n)
+    seen = np.cumsum(small)
+    last_large = np.concatenate([[-1], np.maximum.accumulate(np.where(small, -1, index))[:-1]])
+    before = seen - small - np.where(last_large >= 0, seen[np.maximum(last_large, 0)], 0)
+    odd = (before & 1) == 1
+    second = small & odd
+    last = small & ~odd & (index == n - 1)
+    short = np.abs(d) <= 63
+
+    nbytes = np.where(second | last, 1, 0) + np.where(small, 0, np.where(short, 2, 3))
+    start = 2 + np.cumsum(nbytes) - nbytes
+    out = np.empty(2 + int(nbytes.sum()), dtype=np.uint8)
+    out[:2] = np.frombuffer(header, dtype=np.uint8)
+
+    nibble = d + 6
+    previous = np.concatenate([[0], nibble[:-1]])
+    out[start[second]] = (previous[second] << 4) | nibble[second]
+    out[start[last]] = (nibble[last] << 4) | 0x0D
+
+    large = ~small
+    lead = np.where(odd, (previous << 4) | 0x0F, 0xFF)
+    out[start[large]] = lead[large]
+    one = large & short
+    out[start[one] + 1] = (d[one] + 192) & 0xFF
+    two = large & ~short
+    cur = v[1:]
+    out[start[two] + 1] = cur[two] >> 8
+    out[start[two] + 2] = cur[two] & 0xFF
+    return out.tobytes()
+
+
+class OniNode:
+
+    """ One recorded stream: its description, properties and frame index. """
+
+    def __init__(self, node_id, name, node_type, codec):
+        self.node_id = node_id
+        self.name = name
+        self.node_type = node_type
+        self.codec = codec
+        self.properties = {}
+        self.frames = None
+        self._rows = []
+
+    @property
+    def video_mode(self):
+        mode = self.properties.get('xnMapOutputMode')
+        if mode is not None and len(mode) >= 12:
+            x_res, y_res, fps = struct.unpack_from('<III', mode)
+        else:
+            x_res = self.properties.get('xRes', 0)
+            y_res = self.properties.get('yRes', 0)
+            fps = self.properties.get('FPS', 30)
+        default_format = PIXEL_FORMAT_DEPTH_1_MM if self.node_type == NODE_TYPE_DEPTH else PIXEL_FORMAT_RGB888
+        pixel_format = self.properties.get('oniPixelFormat', default_format)
+        return VideoMode(pixel_format, x_res, y_res, fps)
+
+    def field_of_view(self):
+        zpd = self.properties.get('ZPD')
+        zpps = self.properties.get('ZPPS')
+        if zpd and zpps:
+            # ZPPS is given for the SXGA (1280x1024) sensor resolution.
+            return 2 * math.atan(zpps * 640 / zpd), 2 * math.atan(zpps * 512 / zpd)
+        return (self.properties.get('horizontalFov', DEFAULT_HFOV),
+                self.properties.get('verticalFov', DEFAULT_VFOV))
+
+
+class OniRecording:
+
+    """ Memory-mapped .oni file with a frame index per stream. """
+
+    def __init__(self, path, progress=None):
+        self.path = os.fsdecode(path)
+        self.file = open(self.path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.nodes = {}
+        try:
+            self.parse(progress)
+        except Exception:
+            self.close()
+            raise
+
+    def parse(self, progress=None):
+        """ Build the frame index; `progress(bytes_done, bytes_total)` is called as it goes. """
+        buf = self.map
+        if len(buf) < FILE_HEADER.size:
+            raise OniFormatError(f'{self.path}: file too short')
+        magic, _, _, _, _, self.max_timestamp, _ = FILE_HEADER.unpack_from(buf, 0)
+        if magic != FILE_MAGIC:
+            raise OniFormatError(f'{self.path}: not an .oni file')
+
+        offset = FILE_HEADER.size
+        end = len(buf)
+        records = 0
+        while offset + RECORD_HEADER.size <= end:
+            records += 1
+            if progress is not None and records % PROGRESS_RECORDS == 0:
+                progress(offset, end)
+            record_magic, record_type, node_id, fields_size, payload_size, _ = RECORD_HEADER.unpack_from(buf, offset)
+            if record_magic != RECORD_MAGIC or fields_size < RECORD_HEADER.size:
+                raise OniFormatError(f'{self.path}: corrupt record at {offset}')
+            fields = offset + RECORD_HEADER.size
+            payload = offset + fields_size
+            if record_type == RECORD_END:
+                break
+            if record_type == RECORD_NEW_DATA:
+                node = self.nodes.get(node_id)
+                if node is not None:
+                    timestamp, number = NEW_DATA_FIELDS.unpack_from(buf, fields)
+                    node._rows.append((offset, payload, payload_size, timestamp, number))
+            elif record_type in NODE_ADDED_RECORDS:
+                name, pos = _read_string(buf, fields)
+                node_type, codec = struct.unpack_from('<I4s', buf, pos)
+                self.nodes[node_id] = OniNode(node_id, name, node_type, codec)
+            elif RECORD_INT_PROPERTY <= record_type <= RECORD_GENERAL_PROPERTY and node_id in self.nodes:
+                self.read_property(self.nodes[node_id], record_type, fields)
+            offset = payload + payload_size
+
+        for node in self.nodes.values():
+            node.frames = np.array(node._rows, dtype=FRAME_INDEX_DTYPE)
+            node._rows = None
+
+    def read_property(self, node, record_type, offset):
+        buf = self.map
+        name, offset = _read_string(buf, offset)
+        if record_type == RECORD_INT_PROPERTY:
+            value, = UINT64.unpack_from(buf, offset)
+        elif record_type == RECORD_REAL_PROPERTY:
+            value, = DOUBLE.unpack_from(buf, offset)
+        elif record_type == RECORD_STRING_PROPERTY:
+            value, _ = _read_string(buf, offset)
+        else:
+            size, = UINT32.unpack_from(buf, offset)
+            offset += UINT32.size
+            value = bytes(buf[offset:offset + size])
+        node.properties[name] = value
+
+    def node(self, node_type):
+        for node in self.nodes.values():
+            if node.node_type == node_type:
+                return node
+        raise OniFormatError(f'{self.path}: no stream of type {node_type}')
+
+    def payload(self, node, i):
+        row = node.frames[i]
+        return memoryview(self.map)[int(row['offset']):int(row['offset']) + int(row['size'])]
+
+    def close(self):
+        try:
+            self.map.close()
+        except BufferError:
+            # Frames handed out as views still reference the map; it is released
+            # once they are garbage collected.
+            pass
+        self.file.close()
+
+
+class OniFrame:
+    def __init__(self, data, width, height, timestamp, frame_index):
+        self.data = data
+        self.width = width
+        self.height = height
+        self.timestamp = timestamp
+        self.frameIndex = frame_index
+
+    def get_buffer_as_uint16(self):
+        return self.data.view(np.uint16).reshape(-1)
+
+    def get_buffer_as_uint8(self):
+        return self.data.view(np.uint8).reshape(-1)
+
+
+class OniStream:
+
+    """ Depth or color stream of an `OniRecording`, read through a cursor. """
+
+    def __init__(self, recording, node):
+        self.recording = recording
+        self.node = node
+        self.mode = node.video_mode
+        self.cursor = 0
+
+    def get_number_of_frames(self):
+        return len(self.node.frames)
+
+    def get_video_mode(self):
+        return self.mode
+
+    def get_horizontal_fov(self):
+        return self.node.field_of_view()[0]
+
+    def get_vertical_fov(self):
+        return self.node.field_of_view()[1]
+
+    def timestamps(self):
+        return self.node.frames['timestamp']
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+    def seek(self, frame_index):
+        self.cursor = min(max(frame_index - 1, 0), len(self.node.frames) - 1)
+
+    def decode(self, i):
+        node = self.node
+        payload = self.recording.payload(node, i)
+        width, height = self.mode.resolutionX, self.mode.resolutionY
+        if node.node_type == NODE_TYPE_DEPTH:
+            if node.codec == CODEC_NONE:
+                return np.frombuffer(payload, dtype=np.uint16, count=width * height)
+            if node.codec == CODEC_16Z:
+                return decompress_16z(payload, width * height)
+            if node.codec == CODEC_16Z_EMB_TABLE:
+                return decompress_16z_emb_table(payload, width * height)
+        else:
+            if node.codec == CODEC_NONE:
+                return np.frombuffer(payload, dtype=np.uint8, count=width * height * 3)
+            if node.codec == CODEC_JPEG:
+                img = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+                return cv2.cvtColor(img, cv2.COLOR_BGR2RGB).reshape(-1)
+        raise OniFormatError(f'{self.recording.path}: unsupported codec {node.codec!r} for {node.name}')
+
+    def read_frame(self):
+        frames = self.node.frames
+        if not len(frames):
+            raise OniFormatError(f'{self.recording.path}: {self.node.name} has no frames')
+        i = self.cursor
+        self.cursor = (i + 1) % len(frames)
+        row = frames[i]
+        return OniFrame(
+            self.decode(i), self.mode.resolutionX, self.mode.resolutionY, int(row['timestamp']), i + 1,
+        )
+
+
+class OniDevice:
+
+    """ Drop-in for `openni2.Device` on recorded files. """
+
+    def __init__(self, recording):
+        self.recording = recording
+
+    @classmethod
+    def open_file(cls, path, progress=None):
+        return cls(OniRecording(path, progress))
+
+    def create_depth_stream(self):
+        return OniStream(self.recording, self.recording.node(NODE_TYPE_DEPTH))
+
+    def create_color_stream(self):
+        return OniStream(self.recording, self.recording.node(NODE_TYPE_IMAGE))
+
+    def close(self):
+        self.recording.close()
+
+
+class OniPlaybackSupport:
+    def __init__(self, device):
+        self.device = device
+        self.speed = 1.0
+        self.repeat = True
+
+    def seek(self, stream, frame_index):
+        stream.seek(frame_index)
+
+    def get_number_of_frames(self, stream):
+        return stream.get_number_of_frames()
+
+
+class OniWriter:
+
+    """ Writes a recording with one depth and one color stream.
+
+    The file carries what `OniRecording` reads (node descriptions, output modes, field
+    of view and one new-data record per frame); the OpenNI player expects more
+    properties than that, so these files are meant for the native backend.
+
+        with OniWriter(path, 640, 480) as writer:
+            writer.write(depth, color)
+    """
+
+    DEPTH_NODE = 1
+    COLOR_NODE = 2
+
+    def __init__(self, path, width, height, fps=30, depth_codec=CODEC_16Z, color_codec=CODEC_NONE):
+        if depth_codec not in (CODEC_NONE, CODEC_16Z) or color_codec not in (CODEC_NONE, CODEC_JPEG):
+            raise OniFormatError(f'cannot write {depth_codec!r} depth or {color_codec!r} color')
+        self.path = os.fsdecode(path)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.codecs = {self.DEPTH_NODE: depth_codec, self.COLOR_NODE: color_codec}
+        self.frames = 0
+        self.timestamp = 0
+        self.node_records = {}
+        self.file = open(self.path, 'wb')
+        self.file.write(FILE_HEADER.pack(FILE_MAGIC, 1, 0, 0, 0, 0, self.COLOR_NODE))
+        self.add_node(self.DEPTH_NODE, 'Depth1', NODE_TYPE_DEPTH)
+        self.add_node(self.COLOR_NODE, 'Image1', NODE_TYPE_IMAGE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def string(value):
+        data = value.encode('latin-1') + b'\0'
+        return UINT32.pack(len(data)) + data
+
+    def record(self, record_type, node_id, fields, payload=b''):
+        offset = self.file.tell()
+        self.file.write(RECORD_HEADER.pack(
+            RECORD_MAGIC, record_type, node_id, RECORD_HEADER.size + len(fields), len(payload), 0,
+        ))
+        self.file.write(fields)
+        self.file.write(payload)
+        return offset
+
+    def add_node(self, node_id, name, node_type):
+        # Frame count and timestamp range are patched in by `close`.
+        fields = self.string(name) + struct.pack('<I4sIQQQ', node_type, self.codecs[node_id], 0, 0, 0, 0)
+        self.node_records[node_id] = (self.record(RECORD_NODE_ADDED, node_id, fields), len(self.string(name)))
+        mode = struct.pack('<III', self.width, self.height, self.fps)
+        self.record(RECORD_GENERAL_PROPERTY, node_id, self.string('xnMapOutputMode') + UINT32.pack(len(mode)) + mode)
+        for name, value in (('horizontalFov', DEFAULT_HFOV), ('verticalFov', DEFAULT_VFOV)):
+            self.record(RECORD_REAL_PROPERTY, node_id, self.string(name) + DOUBLE.pack(value))
+
+    def write(self, depth, color, timestamp=None):
+        """ Append one frame pair; `timestamp` in us defaults to the nominal frame rate. """
+        depth = np.ascontiguousarray(depth, dtype=np.uint16)
+        color = np.ascontiguousarray(color, dtype=np.uint8)
+        if self.codecs[self.DEPTH_NODE] == CODEC_16Z:
+            depth_payload = compress_16z(depth)
+        else:
+            depth_payload = depth.tobytes()
+        if self.codecs[self.COLOR_NODE] == CODEC_JPEG:
+            color_payload = cv2.imencode('.jpg', cv2.cvtColor(color, cv2.COLOR_RGB2BGR))[1].tobytes()
+        else:
+            color_payload = color.tobytes()
+        self.write_payloads(depth_payload, color_payload, timestamp)
+
+    def write_payloads(self, depth_payload, color_payload, timestamp=None):
+        """ Append one frame pair already encoded with the writer's codecs. """
+        if timestamp is None:
+            timestamp = self.frames * 1000000 // self.fps
+        self.timestamp = timestamp
+        self.frames += 1
+        fields = NEW_DATA_FIELDS.pack(timestamp, self.frames)
+        self.record(RECORD_NEW_DATA, self.DEPTH_NODE, fields, depth_payload)
+        self.record(RECORD_NEW_DATA, self.COLOR_NODE, fields, color_payload)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.record(RECORD_END, 0, b'')
+        self.file.seek(0)
+        self.file.write(FILE_HEADER.pack(FILE_MAGIC, 1, 0, 0, 0, self.timestamp, self.COLOR_NODE))
+        for offset, name_size in self.node_records.values():
+            self.file.seek(offset + RECORD_HEADER.size + name_size + 8)
+            self.file.write(struct.pack('<IQQ', self.frames, 0, self.timestamp))
+        self.file.close()
@@ -0,0 +1,109 @@
+""" Opening recordings off the GUI thread. """
+import threading
+
+from player_core import backends
+from player_core.playback import PlaybackEngine
+from player_core.stats import FrameStats
+from player_core.sync import SyncTable
+from player_core.thumbnails import ThumbnailIndex
+
+
+class Cancelled(Exception):
+    pass
+
+
+class OpenJob(threading.Thread):
+
+    """ Opens a recording in the background, in two phases.
+
+    First the file is opened and both streams are created; `opened` is set as soon as
+    they can be played. Then the timestamp table, the thumbnail index and, with
+    `statistics`, the per-frame statistics are built from a second set of streams (see `backends.concurrent_device`), so playback can
+    start meanwhile. `finished` is set at the end, successful or not.
+
+    `device_class` may also be a backend name; the backend (OpenNI initialization
+    included) is then loaded by the job too, off the GUI thread.
+
+    `stage`, `done` and `total` describe the work in progress for a progress bar;
+    `cancel` stops the job at its next progress report. An exception raised by the job
+    ends up in `error`; it leaves `device` closed when it happens before `opened`.
+    """
+
+    def __init__(self, device_class, path, thumbnail_step=0, statistics=False):
+        super().__init__(daemon=True)
+        self.device_class = device_class
+        self.path = path
+        self.thumbnail_step = thumbnail_step
+        self.statistics = statistics
+        self.stage = 'opening'
+        self.done = 0
+        self.total = 0
+        self.device = None
+        self.depth_stream = None
+        self.color_stream = None
+        self.playback_support = None
+        self.sync = None
+        self.thumbnails = None
+        self.stats = None
+        self.error = None
+        self.opened = threading.Event()
+        self.finished = threading.Event()
+        self.cancelled = threading.Event()
+
+    def progress(self, done, total):
+        if self.cancelled.is_set():
+            raise Cancelled()
+        self.done = done
+        self.total = total
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            self.open()
+            self.opened.set()
+            self.index()
+        except Cancelled:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            if not self.opened.is_set() and self.device is not None:
+                self.device.close()
+                self.device = None
+            self.finished.set()
+
+    def open(self):
+        if isinstance(self.device_class, str):
+            self.device_class = backends.device_class(self.device_class)
+        self.device = backends.open_file(self.device_class, self.path, self.progress)
+        self.depth_stream = self.device.create_depth_stream()
+        self.color_stream = self.device.create_color_stream()
+        self.playback_support = backends.create_playback_support(self.device)
+        self.depth_stream.start()
+        self.color_stream.start()
+        self.progress(0, 0)
+
+    def index(self):
+        device = backends.concurrent_device(self.device_class, self.device, self.path)
+        depth_stream = device.create_depth_stream()
+        color_stream = device.create_color_stream()
+        try:
+            depth_stream.start()
+            color_stream.start()
+            playback_support = backends.create_playback_support(device)
+            self.stage = 'timestamps'
+            self.sync = SyncTable.for_streams(self.path, depth_stream, color_stream, playback_support, self.progress)
+            if self.thumbnail_step:
+                self.stage = 'thumbnails'
+                engine = PlaybackEngine(depth_stream, color_stream, playback_support, sync=self.sync)
+                self.thumbnails = ThumbnailIndex.load_or_build(self.path, engine, self.thumbnail_step, self.progress)
+            if self.statistics:
+                self.stage = 'statistics'
+                self.stats = FrameStats.load_or_build(self.path, depth_stream, playback_support, self.progress)
+        finally:
+            depth_stream.close()
+            color_stream.close()
+            if device is not self.device:
+                device.close()
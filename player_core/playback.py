@@ -0,0 +1,125 @@
+import collections
+import time
+
+
+class FpsMeter:
+
+    """ Rolling frames/sec estimate over the last `window` frames. """
+
+    def __init__(self, window=30):
+        self.stamps = collections.deque(maxlen=window)
+        self.count = 0
+
+    def tick(self):
+        self.stamps.append(time.perf_counter())
+        self.count += 1
+
+    def reset(self):
+        self.stamps.clear()
+        self.count = 0
+
+    @property
+    def fps(self):
+        if len(self.stamps) < 2:
+            return 0.0
+        return (len(self.stamps) - 1) / (self.stamps[-1] - self.stamps[0])
+
+
+class PlaybackEngine:
+
+    """ Reads depth/color frame pairs from an opened recording.
+
+    While playing, frames are read in order with plain `read_frame` calls. The streams
+    are only seeked when the playhead is moved explicitly (slider, stepping back,
+    wrapping around at the end of the recording).
+
+    Positions are depth frame indices. With a `sync` table each depth frame is paired
+    with the color frame nearest in time: a color frame is repeated when the color
+    stream dropped frames, and the color stream is seeked forward when it has frames the
+    depth stream lacks. Without one both streams advance in lockstep.
+    """
+
+    def __init__(self, depth_stream, color_stream, playback_support, first_frame=2, sync=None):
+        self.depth_stream = depth_stream
+        self.color_stream = color_stream
+        self.playback_support = playback_support
+        self.first_frame = first_frame
+        self.sync = sync
+        self.last_frame = depth_stream.get_number_of_frames()
+
+        # `position` is the last frame handed out, `stream_position` the last frame the
+        # streams actually read. They only differ after a seek or a cache hit, and the
+        # streams are seeked lazily on the next read.
+        self.position = None
+        self.stream_position = None
+        self.color_position = None
+        self.color_frame = None
+        # The next depth seek only puts depth back after a color seek; not a jump of the playhead.
+        self.resync = False
+        self.seeks = 0
+        self.meter = FpsMeter()
+
+        # Let the file driver hand out frames as fast as we read them instead of
+        # pacing them to the recording rate.
+        self.playback_support.speed = -1
+
+    def frame_shapes(self):
+        depth_mode = self.depth_stream.get_video_mode()
+        color_mode = self.color_stream.get_video_mode()
+        return (depth_mode.resolutionY, depth_mode.resolutionX), (color_mode.resolutionY, color_mode.resolutionX)
+
+    def seek(self, position):
+        self.position = position - 1
+
+    def mark_read(self, position):
+        """ Move the playhead to `position` as if it had been read (e.g. served from a cache). """
+        self.position = position
+
+    def read(self):
+        position = self.position + 1
+        if self.stream_position != self.position:
+            self.playback_support.seek(self.depth_stream, position)
+            self.seeks += 1
+            if not self.resync:
+                self.meter.reset()
+            self.resync = False
+        depth_frame = self.depth_stream.read_frame()
+        self.position = self.stream_position = position
+
+        color_position = self.sync.color_position(position) if self.sync is not None else position
+        if color_position != self.color_position or self.color_frame is None:
+            if self.color_position is None or color_position != self.color_position + 1:
+                self.playback_support.seek(self.color_stream, color_position)
+                self.seeks += 1
+                # OpenNI streams of one device share the playback position, so this moved depth
+                # too: seek it back before its next read.
+                self.stream_position = None
+                self.resync = True
+            self.color_frame = self.color_stream.read_frame()
+            self.color_position = color_position
+
+        self.meter.tick()
+        return depth_frame, self.color_frame
+
+    def read_at(self, position):
+        self.seek(position)
+        return self.read()
+
+    def next_position(self):
+        if self.position is None or self.position >= self.last_frame:
+            return self.first_frame
+        return self.position + 1
+
+    def read_next(self):
+        return self.read_at(self.next_position())
+
+    def wrap(self, position):
+        if position > self.last_frame:
+            return self.first_frame
+        if position < self.first_frame:
+            return self.last_frame
+        return position
+
+    @property
+    def fps(self):
+        return self.meter.fps
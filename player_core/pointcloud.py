@@ -0,0 +1,165 @@
+""" Depth frames back-projected to XYZ(+RGB) point clouds.
+
+    python -m player_core.pointcloud recording.oni --out clouds --start 100 --end 200 --voxel 10
+
+Points are in millimetres in the sensor frame (x right, y up, z forward), the same
+convention as OpenNI's convertDepthToWorld. Each frame is written to its own .ply or
+.npy file as soon as it is computed, so memory stays bounded for any range length.
+"""
+import argparse
+import math
+import os
+import sys
+
+import cv2
+import numpy as np
+
+from player_core import backends
+from player_core.backends import close_recording, open_recording
+from player_core.export import read_range
+
+FORMATS = ('ply', 'npy')
+XYZ_DTYPE = np.dtype([('x', '<f4'), ('y', '<f4'), ('z', '<f4')])
+POINT_DTYPE = np.dtype(XYZ_DTYPE.descr + [('red', 'u1'), ('green', 'u1'), ('blue', 'u1')])
+
+
+class RayGrid:
+
+    """ Per-pixel x/z and y/z factors of a depth camera, computed once per resolution.
+
+    Back-projecting a frame is then two multiplications: x = z * rays_x, y = z * rays_y.
+    `stride` keeps every stride-th row and column.
+    """
+
+    def __init__(self, width, height, hfov, vfov, stride=1):
+        self.width = width
+        self.height = height
+        self.stride = stride
+        u = (np.arange(0, width, stride, dtype=np.float32) + 0.5) / width - 0.5
+        v = 0.5 - (np.arange(0, height, stride, dtype=np.float32) + 0.5) / height
+        self.rays_x = np.broadcast_to(u * np.float32(2 * math.tan(hfov / 2)), (len(v), len(u)))
+        self.rays_y = np.broadcast_to((v * np.float32(2 * math.tan(vfov / 2)))[:, None], (len(v), len(u)))
+
+    @classmethod
+    def for_stream(cls, stream, stride=1):
+        mode = stream.get_video_mode()
+        return cls(mode.resolutionX, mode.resolutionY, stream.get_horizontal_fov(), stream.get_vertical_fov(), stride)
+
+    def points(self, depth, color=None):
+        """ (N, 3) float32 points of the valid pixels and their (N, 3) uint8 colors (or None). """
+        depth = depth[::self.stride, ::self.stride]
+        valid = depth > 0
+        z = depth[valid].astype(np.float32)
+        points = np.empty((len(z), 3), dtype=np.float32)
+        np.multiply(z, self.rays_x[valid], out=points[:, 0])
+        np.multiply(z, self.rays_y[valid], out=points[:, 1])
+        points[:, 2] = z
+        if color is None:
+            return points, None
+        if color.shape[:2] != (self.height, self.width):
+            color = cv2.resize(color, (self.width, self.height), interpolation=cv2.INTER_NEAREST)
+        return points, color[::self.stride, ::self.stride][valid]
+
+
+def voxel_downsample(points, colors=None, voxel=10.0):
+    """ Average the points (and colors) falling into each `voxel` mm cube. """
+    if not len(points):
+        return points, colors
+    cells = np.floor(points / voxel).astype(np.int64)
+    cells -= cells.min(axis=0)
+    extent = cells.max(axis=0) + 1
+    keys = (cells[:, 0] * extent[1] + cells[:, 1]) * extent[2] + cells[:, 2]
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+
+    def mean(values):
+        sums = np.stack([np.bincount(inverse, values[:, k], len(counts)) for k in range(values.shape[1])], axis=1)
+        return sums / counts[:, None]
+
+    points = mean(points).astype(np.float32)
+    if colors is not None:
+        colors = np.rint(mean(colors.astype(np.float32))).astype(np.uint8)
+    return points, colors
+
+
+def structured(points, colors=None):
+    # Not POINT_DTYPE[['x', 'y', 'z']]: a field subset keeps the color bytes as padding.
+    cloud = np.zeros(len(points), dtype=POINT_DTYPE if colors is not None else XYZ_DTYPE)
+    cloud['x'], cloud['y'], cloud['z'] = points.T
+    if colors is not None:
+        cloud['red'], cloud['green'], cloud['blue'] = colors.T
+    return cloud
+
+
+def write_ply(path, points, colors=None):
+    cloud = structured(points, colors)
+    properties = ''.join(
+        f'property {"float" if cloud.dtype[name].kind == "f" else "uchar"} {name}\n' for name in cloud.dtype.names
+    )
+    with open(path, 'wb') as f:
+        f.write(f'ply\nformat binary_little_endian 1.0\nelement vertex {len(cloud)}\n{properties}end_header\n'.encode())
+        f.write(cloud.tobytes())
+
+
+def write_npy(path, points, colors=None):
+    np.save(path, structured(points, colors))
+
+
+WRITERS = {'ply': write_ply, 'npy': write_npy}
+
+
+def save(path, points, colors=None):
+    """ Write a cloud in the format given by the extension of `path` (.npy, otherwise .ply). """
+    WRITERS['npy' if os.fspath(path).lower().endswith('.npy') else 'ply'](path, points, colors)
+
+
+def frame_cloud(grid, depth, color=None, voxel=0):
+    points, colors = grid.points(depth, color)
+    if voxel:
+        points, colors = voxel_downsample(points, colors, voxel)
+    return points, colors
+
+
+def export_range(path, options):
+    """ Write one cloud file per frame of `options.start`..`options.end` (inclusive). """
+    device, engine = open_recording(path, options.backend)
+    try:
+        grid = RayGrid.for_stream(engine.depth_stream, options.stride)
+        end = min(options.end or engine.last_frame, engine.last_frame)
+        out_dir = os.path.join(options.out, os.path.splitext(os.path.basename(path))[0])
+        os.makedirs(out_dir, exist_ok=True)
+        points_written = 0
+        for position, depth, color in read_range(engine, options.start, end + 1):
+            if (position - options.start) % options.step:
+                continue
+            points, colors = frame_cloud(grid, depth, None if options.no_color else color, options.voxel)
+            WRITERS[options.format](os.path.join(out_dir, f'cloud_{position:06d}.{options.format}'), points, colors)
+            points_written += len(points)
+        return points_written
+    finally:
+        close_recording(device, engine)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Export per-frame point clouds from .oni recordings.')
+    parser.add_argument('paths', nargs='+', help='.oni recordings')
+    parser.add_argument('--out', default='clouds', help='output directory, one subdirectory per recording')
+    parser.add_argument('--format', choices=FORMATS, default='ply')
+    parser.add_argument('--backend', choices=backends.BACKENDS, default='native')
+    parser.add_argument('--start', type=int, default=1, help='first frame')
+    parser.add_argument('--end', type=int, default=0, help='last frame, 0 for the end of the recording')
+    parser.add_argument('--step', type=int, default=1, help='export every step-th frame')
+    parser.add_argument('--stride', type=int, default=1, help='use every stride-th pixel row and column')
+    parser.add_argument('--voxel', type=float, default=0, help='voxel size for downsampling, mm; 0 keeps all points')
+    parser.add_argument('--no-color', action='store_true', help='write XYZ only')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    for path in options.paths:
+        print(f'{path}: {export_range(path, options)} points')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
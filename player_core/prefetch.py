@@ -0,0 +1,284 @@
+import collections
+import threading
+
+import cv2
+import numpy as np
+
+from player_core.convert import color_array, depth_array, render_color, render_depth
+from player_core.instrument import Profiler
+from player_core.scheduler import SKIP_THRESHOLD
+
+# Render size of a view that is not visible: its conversion is skipped.
+HIDDEN = (0, 0)
+# Frame pairs shown but not published yet, beyond a full ring; a burst of seeks loses the oldest.
+PUBLISH_BACKLOG = 4
+
+
+def fitted(buffer, view, shape):
+    """ `view` if it is `shape`, else a contiguous RGB array of `shape` at the start of `buffer`. """
+    if view.shape[:2] == shape[:2]:
+        return view
+    return buffer[:shape[0] * shape[1] * 3].reshape(shape[0], shape[1], 3)
+
+
+class FrameSlot:
+
+    """ Preallocated display buffers for one depth/color pair.
+
+    `depth` and `color` are rendered at the size of the frames passed to `fill`, up to
+    the shapes the slot was made for; smaller frames reuse the start of the same buffers.
+    `raw` holds what a publisher is sent once the slot is shown, None without one.
+    """
+
+    __slots__ = ('index', 'depth', 'color', 'generation', 'depth_buffer', 'color_buffer', 'raw')
+
+    def __init__(self, depth_shape, color_shape):
+        self.index = None
+        self.depth_buffer = np.empty(depth_shape[0] * depth_shape[1] * 3, dtype=np.uint8)
+        self.color_buffer = np.empty(color_shape[0] * color_shape[1] * 3, dtype=np.uint8)
+        self.depth = self.depth_buffer.reshape(depth_shape + (3,))
+        self.color = self.color_buffer.reshape(color_shape + (3,))
+        self.generation = 0
+        self.raw = None
+
+    def fill(self, index, depth, color, colorizer):
+        """ Render `depth` and `color`; None leaves that picture as it was. """
+        self.index = index
+        if depth is not None:
+            self.depth = fitted(self.depth_buffer, self.depth, depth.shape)
+            render_depth(depth, self.depth, colorizer)
+        if color is not None:
+            self.color = fitted(self.color_buffer, self.color, color.shape)
+            render_color(color, self.color)
+
+
+class FrameRing:
+
+    """ Fixed set of frame slots passed from a producer to a consumer.
+
+    The producer `acquire`s a free slot, fills it and `commit`s it; the consumer `pop`s
+    ready slots in order and hands them back with `release` once painted. `clear` drops
+    every ready slot and invalidates the ones still being filled, so a seek never lets
+    stale frames through.
+    """
+
+    def __init__(self, capacity, depth_shape, color_shape):
+        self.capacity = capacity
+        self.free = collections.deque(FrameSlot(depth_shape, color_shape) for _ in range(capacity))
+        self.ready = collections.deque()
+        self.generation = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def __len__(self):
+        return len(self.ready)
+
+    def acquire(self):
+        with self.condition:
+            self.condition.wait_for(lambda: self.free or self.closed)
+            if self.closed:
+                return None
+            slot = self.free.popleft()
+            slot.generation = self.generation
+            return slot
+
+    def commit(self, slot):
+        with self.condition:
+            if slot.generation == self.generation:
+                self.ready.append(slot)
+            else:
+                self.free.append(slot)
+            self.condition.notify_all()
+
+    def pop(self, timeout=None):
+        with self.condition:
+            self.condition.wait_for(lambda: self.ready or self.closed, timeout)
+            if self.ready:
+                return self.ready.popleft()
+
+    def putback(self, slot):
+        """ Return a popped slot to the front of the queue, unless a seek made it stale. """
+        with self.condition:
+            if slot.generation == self.generation:
+                self.ready.appendleft(slot)
+            else:
+                self.free.append(slot)
+            self.condition.notify_all()
+
+    def release(self, slot):
+        with self.condition:
+            self.free.append(slot)
+            self.condition.notify_all()
+
+    def clear(self):
+        with self.condition:
+            self.generation += 1
+            self.free.extend(self.ready)
+            self.ready.clear()
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class Prefetcher(threading.Thread):
+
+    """ Producer thread reading and converting frames ahead of the playhead.
+
+    All stream access goes through `lock`, so seeks issued from the GUI thread never
+    interleave with a read in progress. With a `cache`, recently decoded frames are
+    served without touching the streams at all. With a `clock`, frames the playhead has
+    already passed are skipped instead of decoded. `filters` (DepthFilters) clean up
+    depth between the cache and rendering, so the cache keeps raw frames. Read,
+    convert, filter and render times go to `profiler`.
+
+    `sizes` holds the (width, height) depth and color are rendered at, None for their
+    own size. Frames are resampled down to it before colorizing, so no work is spent on
+    pixels the display would scale away; a HIDDEN view is not rendered at all.
+
+    With a `publisher` (stream.FramePublisher) every slot also keeps a copy of its frame
+    pair, raw and before filtering; the session hands it to `publish` once the slot is
+    shown, so subscribers get the frames played, not the ones read ahead and dropped.
+    Publishing happens on this thread with `lock` released, so a subscriber that holds
+    the publisher up never stalls a seek.
+    """
+
+    def __init__(self, engine, ring, colorizer, cache=None, clock=None, profiler=None, filters=None, publisher=None):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.ring = ring
+        self.colorizer = colorizer
+        self.cache = cache
+        self.clock = clock
+        self.profiler = profiler or Profiler()
+        self.filters = filters
+        self.publisher = publisher
+        self.sizes = (None, None)
+        self.resized = {}
+        self.outgoing = collections.deque(maxlen=ring.capacity + PUBLISH_BACKLOG)
+        self.lock = threading.Lock()
+        self.running = threading.Event()
+        self.stopped = False
+
+    def run(self):
+        while not self.stopped:
+            self.flush()
+            if not self.running.wait(0.1):
+                continue
+            slot = self.ring.acquire()
+            if slot is None:
+                break
+            with self.lock:
+                if slot.generation == self.ring.generation:
+                    self.load(self.next_position(), slot)
+            self.ring.commit(slot)
+
+    def next_position(self):
+        position = self.engine.next_position()
+        if self.clock is None or position <= self.engine.position:
+            # Never skip across the wrap-around, the clock restarts there.
+            return position
+        due = self.clock.due_position(position)
+        if due is not None and position + SKIP_THRESHOLD < due <= self.engine.last_frame:
+            self.clock.skipped += due - position
+            return due
+        return position
+
+    def load(self, position, slot):
+        stage = self.profiler.stage
+        if self.cache is not None:
+            depth = self.cache.get('depth', position)
+            color = self.cache.get('color', position)
+            if depth is not None and color is not None:
+                self.engine.mark_read(position)
+                return self.render(position, depth, color, slot)
+
+        with stage('read'):
+            depth_frame, color_frame = self.engine.read_at(position)
+        with stage('convert'):
+            depth = depth_array(depth_frame)
+            color = color_array(color_frame)
+            if self.cache is not None:
+                self.cache.put('depth', position, depth)
+                self.cache.put('color', position, color)
+        return self.render(position, depth, color, slot)
+
+    def render(self, position, depth, color, slot):
+        slot.raw = self.raw_pair(position, depth, color) if self.publisher else None
+        filters = self.filters
+        if filters:
+            with self.profiler.stage('filter'):
+                depth = filters.apply(depth, position)
+        depth_size, color_size = self.sizes
+        with self.profiler.stage('render'):
+            depth = self.resample('depth', depth, depth_size)
+            color = self.resample('color', color, color_size)
+            slot.fill(position, depth, color, self.colorizer)
+        return slot
+
+    def raw_pair(self, position, depth, color):
+        """ Publisher arguments for the pair, copied as the engine and cache reuse their arrays. """
+        sync = self.engine.sync
+        depth_timestamp, color_timestamp = sync.timestamps(position) if sync is not None else (0, 0)
+        return position, np.array(depth), np.array(color), depth_timestamp, color_timestamp
+
+    def publish(self, slot):
+        """ Queue the pair behind a slot that was shown for `flush`. """
+        if slot.raw is not None:
+            self.outgoing.append(slot.raw)
+
+    def flush(self):
+        """ Publish the queued pairs; called without `lock`, a 'block' subscriber may take a while. """
+        while self.outgoing:
+            with self.profiler.stage('publish'):
+                self.publisher.publish(*self.outgoing.popleft())
+
+    def resample(self, name, frame, size):
+        """ `frame` area-averaged down to `size` into a reused buffer, None for HIDDEN. """
+        if size is None or size == (frame.shape[1], frame.shape[0]):
+            return frame
+        if size == HIDDEN:
+            return None
+        shape = (size[1], size[0]) + frame.shape[2:]
+        out = self.resized.get(name)
+        if out is None or out.shape != shape or out.dtype != frame.dtype:
+            out = self.resized[name] = np.empty(shape, dtype=frame.dtype)
+        # Depth holes average in like any edge, which is what a smooth downscale shows.
+        cv2.resize(frame, size, dst=out, interpolation=cv2.INTER_AREA)
+        return out
+
+    def pause(self):
+        self.running.clear()
+
+    def resume(self):
+        self.running.set()
+
+    def read_at(self, position, slot):
+        """ Synchronously seek and fill `slot`, discarding everything prefetched so far. """
+        with self.lock:
+            self.ring.clear()
+            return self.load(position, slot)
+
+    def frames_at(self, position):
+        """ Depth and color arrays of `position`, leaving the playhead where it was. """
+        with self.lock:
+            if self.cache is not None:
+                depth = self.cache.get('depth', position)
+                color = self.cache.get('color', position)
+                if depth is not None and color is not None:
+                    return depth, color
+            playhead = self.engine.position
+            depth_frame, color_frame = self.engine.read_at(position)
+            depth = np.array(depth_array(depth_frame))
+            color = np.array(color_array(color_frame))
+            if playhead is not None:
+                self.engine.seek(playhead + 1)
+            return depth, color
+
+    def stop(self):
+        self.stopped = True
+        self.running.set()
+        self.ring.close()
+        self.join()
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import numpy as np
+
+SPEEDS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0)
+# Frames the decoder may fall behind the clock before it jumps ahead instead.
+SKIP_THRESHOLD = 2
+
+
+class PlaybackClock:
+
+    """ Paces playback to the recording's timeline.
+
+    Media time comes from the per-frame `timestamps` (us, index 0 = frame 1) when they
+    are usable, otherwise from the nominal `fps`. The display side asks `delay` how long
+    to wait before showing a frame and `should_drop` whether a late frame should be
+    skipped, and reports the frame it shows with `mark_shown`; the decoder asks
+    `due_position` so it can jump over frames it would only decode to throw away. Late,
+    dropped and skipped frames are counted.
+    """
+
+    def __init__(self, timestamps=None, fps=30, speed=1.0):
+        self.fps = fps or 30
+        self.timestamps = None
+        self.interval = 1.0 / self.fps
+        self.speed = speed
+        self.origin = None
+        self.shown = None
+        self.lock = threading.Lock()
+        self.late = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.set_timestamps(timestamps)
+
+    def set_timestamps(self, timestamps):
+        """ Switch to a per-frame timeline (or back to the nominal fps with None). """
+        if timestamps is not None and len(timestamps) > 1 and np.all(np.diff(timestamps) > 0):
+            self.timestamps = np.asarray(timestamps, dtype=np.int64)
+            self.interval = float(np.median(np.diff(self.timestamps))) / 1e6
+        else:
+            self.timestamps = None
+            self.interval = 1.0 / self.fps
+        if self.origin is not None:
+            # Media times changed under the running clock; carry on from the frame on screen.
+            self.start(self.shown)
+
+    def media_time(self, position):
+        if self.timestamps is not None:
+            i = min(max(position - 1, 0), len(self.timestamps) - 1)
+            return self.timestamps[i] / 1e6
+        return position * self.interval
+
+    def start(self, position):
+        with self.lock:
+            self.origin = (position, self.media_time(position), time.perf_counter())
+            self.shown = position
+
+    def stop(self):
+        with self.lock:
+            self.origin = None
+
+    def set_speed(self, speed, position=None):
+        self.speed = speed
+        if self.origin is not None and position is not None:
+            self.start(position)
+
+    def delay(self, position):
+        """ Seconds until `position` is due; negative when it is late. """
+        origin = self.origin
+        if origin is None or position < self.shown:
+            # Not playing, or wrapped around to the start: due once shown, see `mark_shown`.
+            return 0.0
+        origin_position, origin_media, origin_wall = origin
+        due = origin_wall + (self.media_time(position) - origin_media) / self.speed
+        return due - time.perf_counter()
+
+    def mark_shown(self, position):
+        """ `position` is on screen now; a frame behind the last one restarts the clock from it. """
+        if self.origin is None:
+            return
+        if position < self.shown:
+            self.start(position)
+        else:
+            self.shown = position
+
+    def should_drop(self, position, ready):
+        """ Drop a frame that is more than one frame late while a newer one is ready. """
+        delay = self.delay(position)
+        if delay < -self.interval / self.speed:
+            self.late += 1
+            if ready:
+                self.dropped += 1
+                return True
+        return False
+
+    def due_position(self, position):
+        """ Frame due now, the last one once the clock ran past the end of the recording, or
+        None when not playing or `position` wrapped behind the display.
+        """
+        origin = self.origin
+        if origin is None or position < self.shown:
+            return None
+        origin_position, origin_media, origin_wall = origin
+        media = origin_media + (time.perf_counter() - origin_wall) * self.speed
+        if self.timestamps is not None:
+            # Timestamps at or before `media`, which is the 1-based frame shown at it.
+            return min(int(np.searchsorted(self.timestamps, media * 1e6, side='right')), len(self.timestamps))
+        return int(media / self.interval)
+
+    def summary(self):
+        return f'{self.speed:g}x, {self.late} late / {self.dropped} dropped / {self.skipped} skipped'
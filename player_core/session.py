@@ -0,0 +1,288 @@
+""" Playback of one recording without any GUI: the frame pipeline both players are built on.
+
+    session = PlaybackSession.open(backends.device_class('native'), b'recording.oni')
+    for slot in session.frames():
+        ...  # slot.depth / slot.color are rendered RGB frames
+    session.close()
+"""
+import time
+
+from player_core import pointcloud
+from player_core.cache import FrameCache
+from player_core.colorize import DepthColorizer
+from player_core.filters import DepthFilters
+from player_core.instrument import Profiler
+from player_core.opener import OpenJob
+from player_core.playback import FpsMeter, PlaybackEngine
+from player_core.prefetch import HIDDEN, FrameRing, FrameSlot, Prefetcher
+from player_core.scheduler import PlaybackClock
+
+RING_CAPACITY = 8
+CACHE_BUDGET_MB = 512
+# A frame due within this many seconds is shown now rather than waited for.
+DUE_SLACK = 0.001
+
+
+class PlaybackSession:
+
+    """ One opened recording and the pipeline turning it into display frames.
+
+    A `Prefetcher` thread reads, converts, filters and renders frames ahead of the
+    playhead into a `FrameRing`; a `PlaybackClock` paces them to the recording. A GUI
+    calls `next_due` from its timer or display thread, paints the slot it gets and hands
+    it back with `release`. Headless code iterates `frames` or passes a callback to
+    `run`. Indexes (timestamps, thumbnails, statistics) can arrive later through
+    `attach_index`; until then color is paired with depth by frame index. Frames shown
+    are also handed to `publisher` (stream.FramePublisher) if there is one: ring slots
+    on `release`, the still slot on `seek`.
+    """
+
+    def __init__(self, colorizer=None, cache=None, profiler=None, filters=None, speed=1.0, publisher=None):
+        self.colorizer = colorizer or DepthColorizer()
+        self.cache = cache if cache is not None else FrameCache(CACHE_BUDGET_MB)
+        self.profiler = profiler or Profiler()
+        self.filters = filters or DepthFilters()
+        self.speed = speed
+        self.publisher = publisher
+        self.meter = FpsMeter()
+        self.device = None
+        self.depth_stream = None
+        self.color_stream = None
+        self.playback_support = None
+        self.engine = None
+        self.sync = None
+        self.thumbnails = None
+        self.stats = None
+        self.rays = None
+        self.clock = None
+        self.ring = None
+        self.prefetcher = None
+        self.still = None
+        self.pending = None
+        self.position = None
+
+    @classmethod
+    def open(cls, device_class, path, thumbnail_step=0, statistics=False, **kwargs):
+        """ Open `path` and build its indexes in the calling thread. """
+        job = OpenJob(device_class, path, thumbnail_step, statistics)
+        job.run()
+        if job.error is not None:
+            if job.device is not None:
+                job.device.close()
+            raise job.error
+        session = cls(**kwargs)
+        session.attach(job)
+        session.attach_index(job)
+        return session
+
+    @property
+    def is_open(self):
+        return self.engine is not None
+
+    @property
+    def first_frame(self):
+        return self.engine.first_frame
+
+    @property
+    def last_frame(self):
+        return self.engine.last_frame
+
+    def attach(self, job):
+        """ Take over the streams opened by `job` and show the first frame. """
+        self.device = job.device
+        self.depth_stream = job.depth_stream
+        self.color_stream = job.color_stream
+        self.playback_support = job.playback_support
+        self.engine = PlaybackEngine(self.depth_stream, self.color_stream, self.playback_support)
+        self.cache.clear()
+        self.rays = pointcloud.RayGrid.for_stream(self.depth_stream)
+
+        depth_shape, color_shape = self.engine.frame_shapes()
+        self.still = FrameSlot(depth_shape, color_shape)
+        self.ring = FrameRing(RING_CAPACITY, depth_shape, color_shape)
+        self.clock = PlaybackClock(None, self.depth_stream.get_video_mode().fps, self.speed)
+        self.prefetcher = Prefetcher(
+            self.engine, self.ring, self.colorizer, self.cache, self.clock, self.profiler, self.filters, self.publisher,
+        )
+        self.prefetcher.start()
+        return self.seek(self.engine.first_frame)
+
+    def attach_index(self, job):
+        """ Switch to the indexes `job` built: timestamp pairing and pacing, thumbnails, statistics. """
+        if job.sync is not None:
+            self.sync = job.sync
+            with self.prefetcher.lock:
+                self.engine.sync = job.sync
+                # Color was paired by index until now; neither cached nor prefetched pairs hold.
+                self.cache.clear()
+                self.ring.clear()
+            self.clock.set_timestamps(job.sync.depth_timestamps)
+        self.thumbnails = job.thumbnails
+        self.stats = job.stats
+
+    def seek(self, position):
+        """ Decode `position` right away into the still slot; playback continues after it. """
+        slot = self.prefetcher.read_at(position, self.still)
+        if slot.index != self.position:
+            # Redrawing the current frame is not a new frame for subscribers.
+            self.prefetcher.publish(slot)
+        self.position = slot.index
+        return slot
+
+    def step(self, offset):
+        """ Slot of the frame `offset` away from the current one, wrapping around the ends. """
+        if offset == 1:
+            slot = self.ring.pop(timeout=0)
+            if slot is not None:
+                if slot.generation == self.ring.generation:
+                    return slot
+                self.ring.release(slot)
+        return self.seek(self.engine.wrap(self.position + offset))
+
+    def play(self):
+        self.meter.reset()
+        self.clock.start(self.position)
+        self.prefetcher.resume()
+
+    def pause(self):
+        self.clock.stop()
+        self.prefetcher.pause()
+        if self.pending is not None:
+            self.ring.putback(self.pending)
+            self.pending = None
+
+    def next_due(self, timeout=0):
+        """ One scheduling step of playback.
+
+        Returns (slot, 0) when a frame is due and should be painted now, (None, seconds)
+        while the next frame is not due yet and (None, None) when nothing has been
+        decoded within `timeout`. Frames from before a seek and frames too late to be
+        worth showing are dropped on the way.
+        """
+        while True:
+            slot = self.pending or self.ring.pop(timeout)
+            self.pending = None
+            if slot is None:
+                return None, None
+            if slot.generation != self.ring.generation:
+                self.ring.release(slot)
+                continue
+            delay = self.clock.delay(slot.index)
+            if delay > DUE_SLACK:
+                self.pending = slot
+                return None, delay
+            if self.clock.should_drop(slot.index, len(self.ring)):
+                self.ring.release(slot)
+                continue
+            self.clock.mark_shown(slot.index)
+            return slot, 0.0
+
+    def release(self, slot):
+        """ Hand back a slot once painted; the playhead moves to it. """
+        self.position = slot.index
+        if slot is self.still:
+            return
+        self.meter.tick()
+        self.profiler.count('queued', len(self.ring))
+        self.prefetcher.publish(slot)
+        self.ring.release(slot)
+
+    def frames(self, start=None, end=None, paced=False):
+        """ Yield rendered slots from `start` through `end` (the whole recording by default).
+
+        With `paced` frames come at the recording's rate and late ones are dropped;
+        otherwise every frame is produced as fast as the pipeline allows. A slot is only
+        valid until the next one is requested.
+        """
+        end = self.last_frame if end is None else end
+        slot = self.seek(self.first_frame if start is None else start)
+        if paced:
+            self.play()
+        else:
+            self.meter.reset()
+            self.prefetcher.resume()
+        try:
+            while True:
+                yield slot
+                previous = slot.index
+                self.release(slot)
+                slot = None
+                if previous >= end:
+                    return
+                slot = self.next_slot(paced)
+                if slot.index < previous:
+                    # Wrapped around to the start.
+                    self.ring.release(slot)
+                    slot = None
+                    return
+        finally:
+            if slot is not None and slot is not self.still:
+                self.ring.release(slot)
+            self.pause()
+
+    def next_slot(self, paced):
+        while True:
+            if paced:
+                slot, wait = self.next_due(timeout=0.1)
+                if slot is None:
+                    if wait is not None:
+                        time.sleep(wait)
+                    continue
+                return slot
+            slot = self.ring.pop(timeout=0.1)
+            if slot is None:
+                continue
+            if slot.generation == self.ring.generation:
+                return slot
+            self.ring.release(slot)
+
+    def run(self, callback, start=None, end=None, paced=True):
+        """ Call `callback(slot)` for every frame from `start` through `end` until it returns False. """
+        for slot in self.frames(start, end, paced):
+            if callback(slot) is False:
+                break
+
+    def set_speed(self, speed):
+        self.speed = speed
+        if self.clock is not None:
+            self.clock.set_speed(speed, self.position)
+
+    def set_sizes(self, depth_size, color_size):
+        """ Render depth and color at these (width, height) from now on, HIDDEN to skip one.
+
+        Returns whether anything changed; the current frame is not re-rendered.
+        """
+        sizes = (depth_size, color_size)
+        if self.prefetcher is None or sizes == self.prefetcher.sizes:
+            return False
+        with self.prefetcher.lock:
+            if HIDDEN in self.prefetcher.sizes:
+                # Frames decoded while a view was hidden were never drawn.
+                self.ring.clear()
+            self.prefetcher.sizes = sizes
+        return True
+
+    def set_filters(self, names):
+        self.filters = DepthFilters(names)
+        if self.prefetcher is not None:
+            with self.prefetcher.lock:
+                self.prefetcher.filters = self.filters
+
+    def point_cloud(self, position=None):
+        """ Points and colors of `position` (default: the current frame). """
+        depth, color = self.prefetcher.frames_at(self.position if position is None else position)
+        return pointcloud.frame_cloud(self.rays, depth, color)
+
+    def summary(self):
+        sync = f'{self.sync.summary()}, ' if self.sync is not None else ''
+        return f'decode {self.engine.fps:.1f} fps, {self.cache}, {sync}{self.clock.summary()}'
+
+    def close(self):
+        if self.prefetcher is not None:
+            self.pause()
+            self.prefetcher.stop()
+        if self.device is not None:
+            self.depth_stream.close()
+            self.color_stream.close()
+            self.device.close()
+        self.__init__(self.colorizer, self.cache, self.profiler, self.filters, self.speed, self.publisher)
@@ -0,0 +1,32 @@
+""" Index files stored next to a recording and reused while the recording is unchanged. """
+import os
+
+import numpy as np
+
+
+def sidecar_path(path, suffix):
+    return os.fsdecode(path) + suffix
+
+
+def source_signature(path):
+    stat = os.stat(os.fsdecode(path))
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def load(path, suffix):
+    """ Return the arrays stored for `path`, or None if missing or stale. """
+    try:
+        with np.load(sidecar_path(path, suffix)) as data:
+            if not np.array_equal(data['source_signature'], source_signature(path)):
+                return None
+            return {name: data[name] for name in data.files if name != 'source_signature'}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def save(path, suffix, **arrays):
+    try:
+        with open(sidecar_path(path, suffix), 'wb') as f:
+            np.savez_compressed(f, source_signature=source_signature(path), **arrays)
+    except OSError:
+        pass
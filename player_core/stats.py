@@ -0,0 +1,172 @@
+""" Per-frame depth statistics of a recording, for frame search and the activity sparkline.
+
+    python -m player_core.stats recording.oni "min < 800 and motion > 50"
+"""
+import argparse
+import operator
+import re
+import sys
+
+import numpy as np
+
+from player_core import backends, sidecar
+from player_core.convert import depth_array
+from player_core.backends import close_recording, open_recording
+
+SUFFIX = '.stats.npz'
+COLUMNS = ('min', 'max', 'mean', 'valid', 'motion')
+HISTOGRAM_BINS = 16
+# Depth covered by the histogram, mm; the last bin also counts everything farther.
+HISTOGRAM_RANGE = 8000
+# Pixel step of the grid the motion score is computed on.
+MOTION_STRIDE = 4
+
+OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge, '==': operator.eq}
+CONDITION = re.compile(r'\s*(\w+)\s*(<=|>=|==|<|>)\s*([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)\s*$')
+
+
+def frame_stats(depth):
+    """ (min, max, mean, valid ratio, histogram, motion grid) of one depth frame.
+
+    min, max and mean are taken over valid (non-zero) pixels; the motion grid is what
+    `motion` compares between consecutive frames.
+    """
+    valid = int(np.count_nonzero(depth))
+    if valid:
+        low = int(np.min(depth, where=depth > 0, initial=np.iinfo(np.uint16).max))
+        mean = float(depth.sum(dtype=np.int64)) / valid
+    else:
+        low, mean = 0, 0.0
+    bins = np.minimum(depth, HISTOGRAM_RANGE - 1) // (HISTOGRAM_RANGE // HISTOGRAM_BINS)
+    histogram = np.bincount(bins.ravel(), minlength=HISTOGRAM_BINS)
+    # Bin 0 holds the invalid zeros as well.
+    histogram[0] -= depth.size - valid
+    return low, int(depth.max()), mean, valid / depth.size, histogram, depth[::MOTION_STRIDE, ::MOTION_STRIDE]
+
+
+def motion(grid, previous):
+    """ Mean absolute depth change in mm over the pixels valid in both grids. """
+    if previous is None:
+        return 0.0
+    both = (grid > 0) & (previous > 0)
+    count = np.count_nonzero(both)
+    if not count:
+        return 0.0
+    difference = np.abs(grid.astype(np.int32) - previous)
+    return float(difference.sum(where=both)) / count
+
+
+class FrameStats:
+
+    """ Columnar statistics of every depth frame, index 0 being frame 1.
+
+    `min`, `max`, `mean` (mm) and `valid` (ratio of non-zero pixels) describe the
+    frame itself, `motion` its mean depth change from the previous frame and
+    `histogram` its valid pixels in HISTOGRAM_BINS depth bins. Frames are searched with
+    queries such as ``min < 800`` or ``motion > 50 and valid > 0.5``.
+    """
+
+    def __init__(self, columns, histogram):
+        self.columns = columns
+        self.histogram = histogram
+
+    def __len__(self):
+        return len(self.histogram)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def select(self, query):
+        """ Boolean mask of the frames matching every `column op number` condition of `query`. """
+        mask = np.ones(len(self), dtype=bool)
+        for condition in re.split(r'\band\b', query.strip()):
+            match = CONDITION.match(condition)
+            if match is None or match.group(1) not in self.columns:
+                raise ValueError(f'bad condition {condition.strip()!r}, expected e.g. "min < 800", '
+                                 f'columns: {", ".join(COLUMNS)}')
+            name, op, value = match.groups()
+            mask &= OPERATORS[op](self.columns[name], float(value))
+        return mask
+
+    @staticmethod
+    def next_match(mask, position):
+        """ First matching frame after `position`, or None. """
+        hits = np.flatnonzero(mask[position:])
+        return int(hits[0]) + position + 1 if len(hits) else None
+
+    @staticmethod
+    def prev_match(mask, position):
+        """ Last matching frame before `position`, or None. """
+        hits = np.flatnonzero(mask[:max(position - 1, 0)])
+        return int(hits[-1]) + 1 if len(hits) else None
+
+    @classmethod
+    def build(cls, depth_stream, playback_support, progress=None):
+        """ Statistics from one sequential read of the depth stream. """
+        count = depth_stream.get_number_of_frames()
+        columns = {
+            'min': np.zeros(count, dtype=np.uint16),
+            'max': np.zeros(count, dtype=np.uint16),
+            'mean': np.zeros(count, dtype=np.float32),
+            'valid': np.zeros(count, dtype=np.float32),
+            'motion': np.zeros(count, dtype=np.float32),
+        }
+        histogram = np.zeros((count, HISTOGRAM_BINS), dtype=np.uint32)
+        # Unpaced, like read_timestamps: at 1.0 OpenNI would replay the recording in real time.
+        speed = playback_support.speed
+        playback_support.speed = -1
+        try:
+            playback_support.seek(depth_stream, 1)
+            previous = None
+            for i in range(count):
+                if progress is not None:
+                    progress(i, count)
+                depth = depth_array(depth_stream.read_frame())
+                *values, histogram[i], grid = frame_stats(depth)
+                for name, value in zip(COLUMNS, values):
+                    columns[name][i] = value
+                columns['motion'][i] = motion(grid, previous)
+                previous = grid.copy()
+        finally:
+            playback_support.speed = speed
+        return cls(columns, histogram)
+
+    @classmethod
+    def load(cls, path):
+        data = sidecar.load(path, SUFFIX)
+        if data is None or any(name not in data for name in COLUMNS + ('histogram',)):
+            return None
+        return cls({name: data[name] for name in COLUMNS}, data['histogram'])
+
+    def save(self, path):
+        sidecar.save(path, SUFFIX, histogram=self.histogram, **self.columns)
+
+    @classmethod
+    def load_or_build(cls, path, depth_stream, playback_support, progress=None):
+        stats = cls.load(path)
+        if stats is None:
+            stats = cls.build(depth_stream, playback_support, progress)
+            stats.save(path)
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find frames of a recording by their depth statistics.')
+    parser.add_argument('path', help='.oni or .oniz recording')
+    parser.add_argument('query', help=f'conditions joined by "and", e.g. "min < 800"; columns: {", ".join(COLUMNS)}')
+    parser.add_argument('--backend', choices=backends.BACKENDS, default='native')
+    args = parser.parse_args(argv)
+
+    # Depth only, no pairing needed.
+    device, engine = open_recording(args.path, args.backend, sync=False)
+    try:
+        stats = FrameStats.load_or_build(args.path, engine.depth_stream, engine.playback_support)
+    finally:
+        close_recording(device, engine)
+    matches = np.flatnonzero(stats.select(args.query)) + 1
+    print(f'{len(matches)} of {len(stats)} frames match')
+    print(' '.join(map(str, matches)))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
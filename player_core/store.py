@@ -0,0 +1,358 @@
+""" Optimized recordings: depth and color transcoded into compressed chunks of frames.
+
+    python -m player_core.store recording.oni --codec zstd --chunk 4
+
+writes recording.oniz next to the source. The color track is stored time-aligned,
+one color frame per depth frame, so both streams share a single frame index and a
+seek is an index lookup plus the decode of one chunk. Chunks are decoded by a thread
+pool, depth and color side by side, and one chunk ahead of the playhead during
+sequential reads; zlib, lz4 and zstd all release the GIL while they work.
+
+Layout: header, chunks (depth block then color block, each compressed on its own),
+index (per chunk offset and sizes, per frame timestamps, field of view), and the
+index offset as the last 8 bytes. Depth frames after the first of a chunk are stored
+as differences to their predecessor, and depth blocks are byte-shuffled (all low
+bytes, then all high bytes) before compression; both help the compressor a lot.
+"""
+import argparse
+import collections
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from player_core import oni_file
+
+SUFFIX = '.oniz'
+MAGIC = b'ONIZ'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIIIII4s')
+FOV = struct.Struct('<dd')
+FOOTER = struct.Struct('<Q')
+CHUNK_INDEX_DTYPE = np.dtype([('offset', '<i8'), ('depth_size', '<i8'), ('color_size', '<i8')])
+
+CODECS = ('zstd', 'lz4', 'zlib')
+CHUNK_FRAMES = 4
+# Decoded chunks (depth and color counted separately) kept per open store.
+CACHED_CHUNKS = 8
+
+
+def codec(name):
+    """ (compress, decompress) for `name`; lz4 and zstd need their optional packages. """
+    if name == 'zlib':
+        return (lambda data: zlib.compress(data, 3)), zlib.decompress
+    if name == 'lz4':
+        import lz4.frame
+        return lz4.frame.compress, lz4.frame.decompress
+    if name == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+    raise ValueError(f'unknown codec {name!r}, expected one of {CODECS}')
+
+
+def available_codecs():
+    names = []
+    for name in CODECS:
+        try:
+            codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def shuffle(block):
+    """ Depth frames as differences to the previous frame of the chunk, split into byte planes. """
+    delta = block.copy()
+    delta[1:] -= block[:-1]
+    return np.ascontiguousarray(delta.view(np.uint8).reshape(-1, 2).T)
+
+
+def unshuffle(data, shape):
+    planes = np.frombuffer(data, dtype=np.uint8).reshape(2, -1)
+    block = np.ascontiguousarray(planes.T).view(np.uint16).reshape(shape)
+    return np.cumsum(block, axis=0, dtype=np.uint16)
+
+
+def store_path(path):
+    return os.path.splitext(os.fsdecode(path))[0] + SUFFIX
+
+
+def is_store(path):
+    return os.fsdecode(path).lower().endswith(SUFFIX)
+
+
+class StoreRecording:
+
+    """ Memory-mapped optimized recording with a cache of decoded chunks. """
+
+    def __init__(self, path, workers=None):
+        self.path = os.fsdecode(path)
+        self.file = open(self.path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.parse()
+        except Exception:
+            self.file.close()
+            raise
+        self.compress, self.decompress = codec(self.codec)
+        self.blocks = collections.OrderedDict()
+        self.last = {}
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1))
+
+    def parse(self):
+        buf = self.map
+        if len(buf) < HEADER.size + FOOTER.size:
+            raise oni_file.OniFormatError(f'{self.path}: file too short')
+        (magic, version, _, depth_width, depth_height, color_width, color_height,
+         self.fps, self.frames, self.chunk, codec_name) = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise oni_file.OniFormatError(f'{self.path}: not an optimized recording')
+        self.codec = codec_name.rstrip(b' ').decode()
+        self.depth_shape = (depth_height, depth_width)
+        self.color_shape = (color_height, color_width, 3)
+
+        offset, = FOOTER.unpack_from(buf, len(buf) - FOOTER.size)
+        self.hfov, self.vfov = FOV.unpack_from(buf, offset)
+        offset += FOV.size
+        chunks = -(-self.frames // self.chunk)
+        self.index = np.frombuffer(buf, dtype=CHUNK_INDEX_DTYPE, count=chunks, offset=offset)
+        offset += self.index.nbytes
+        self.depth_timestamps = np.frombuffer(buf, dtype='<i8', count=self.frames, offset=offset)
+        offset += self.depth_timestamps.nbytes
+        self.color_timestamps = np.frombuffer(buf, dtype='<i8', count=self.frames, offset=offset)
+
+    def decode(self, kind, k):
+        row = self.index[k]
+        start = int(row['offset'])
+        if kind == 'color':
+            start += int(row['depth_size'])
+        size = int(row[kind + '_size'])
+        data = self.decompress(self.map[start:start + size])
+        frames = min(self.chunk, self.frames - k * self.chunk)
+        if kind == 'depth':
+            return unshuffle(data, (frames,) + self.depth_shape)
+        return np.frombuffer(data, dtype=np.uint8).reshape((frames,) + self.color_shape)
+
+    def submit(self, kind, k):
+        key = (kind, k)
+        if key not in self.blocks and 0 <= k < len(self.index):
+            self.blocks[key] = self.pool.submit(self.decode, kind, k)
+
+    def block(self, kind, k):
+        """ Decoded frames of chunk `k` of the `kind` track.
+
+        A miss decodes both tracks of the chunk in parallel, since the other stream
+        is about to ask for it; sequential reads also start decoding the next chunk.
+        """
+        with self.lock:
+            key = (kind, k)
+            if key not in self.blocks:
+                self.submit(kind, k)
+                self.submit('color' if kind == 'depth' else 'depth', k)
+            future = self.blocks[key]
+            self.blocks.move_to_end(key)
+            if self.last.get(kind) in (k, k - 1):
+                self.submit(kind, k + 1)
+            self.last[kind] = k
+            while len(self.blocks) > CACHED_CHUNKS:
+                self.blocks.popitem(last=False)
+        return future.result()
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.blocks.clear()
+        self.depth_timestamps = self.color_timestamps = self.index = None
+        try:
+            self.map.close()
+        except BufferError:
+            # Frames handed out still reference the map; it goes with them.
+            pass
+        self.file.close()
+
+
+class StoreStream:
+
+    """ Depth or color track of a `StoreRecording`, with the `OniStream` interface. """
+
+    def __init__(self, recording, kind):
+        self.recording = recording
+        self.kind = kind
+        shape = recording.depth_shape if kind == 'depth' else recording.color_shape
+        pixel_format = oni_file.PIXEL_FORMAT_DEPTH_1_MM if kind == 'depth' else oni_file.PIXEL_FORMAT_RGB888
+        self.mode = oni_file.VideoMode(pixel_format, shape[1], shape[0], recording.fps)
+        self.cursor = 0
+
+    def get_number_of_frames(self):
+        return self.recording.frames
+
+    def get_video_mode(self):
+        return self.mode
+
+    def get_horizontal_fov(self):
+        return self.recording.hfov
+
+    def get_vertical_fov(self):
+        return self.recording.vfov
+
+    def timestamps(self):
+        if self.kind == 'depth':
+            return self.recording.depth_timestamps
+        return self.recording.color_timestamps
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+    def seek(self, frame_index):
+        self.cursor = min(max(frame_index - 1, 0), self.recording.frames - 1)
+
+    def read_frame(self):
+        i = self.cursor
+        self.cursor = (i + 1) % self.recording.frames
+        chunk = self.recording.chunk
+        data = self.recording.block(self.kind, i // chunk)[i % chunk].reshape(-1)
+        return oni_file.OniFrame(data, self.mode.resolutionX, self.mode.resolutionY, int(self.timestamps()[i]), i + 1)
+
+
+class StoreDevice:
+    def __init__(self, recording):
+        self.recording = recording
+
+    @classmethod
+    def open_file(cls, path, progress=None):
+        # The index is read in one go, there is nothing to report.
+        return cls(StoreRecording(path))
+
+    def create_depth_stream(self):
+        return StoreStream(self.recording, 'depth')
+
+    def create_color_stream(self):
+        return StoreStream(self.recording, 'color')
+
+    def close(self):
+        self.recording.close()
+
+
+def compress_chunk(compress, depth, color):
+    return compress(shuffle(depth)), compress(color.tobytes())
+
+
+def transcode(source, target=None, backend='native', chunk=CHUNK_FRAMES, codec_name=None, jobs=None,
+              start=1, end=None, progress=None):
+    """ Write the optimized form of frames `start` through `end` of `source`; returns its path.
+
+    `progress(frames_done, frames_total)` is called once per chunk.
+    """
+    # Imported here: export imports backends, which imports this module.
+    from player_core import backends
+    from player_core.convert import color_array, depth_array
+    from player_core.playback import PlaybackEngine
+    from player_core.sync import SyncTable
+
+    codec_name = codec_name or available_codecs()[0]
+    compress, _ = codec(codec_name)
+    target = target or store_path(source)
+    jobs = jobs or os.cpu_count() or 1
+
+    device = backends.open_file(backends.device_class(backend), source)
+    depth_stream = device.create_depth_stream()
+    color_stream = device.create_color_stream()
+    depth_stream.start()
+    color_stream.start()
+    playback_support = backends.create_playback_support(device)
+    sync = SyncTable.for_streams(source, depth_stream, color_stream, playback_support)
+    engine = PlaybackEngine(depth_stream, color_stream, playback_support, first_frame=1, sync=sync)
+    (depth_height, depth_width), (color_height, color_width) = engine.frame_shapes()
+    end = engine.last_frame if end is None else end
+    if not 1 <= start <= end <= engine.last_frame:
+        raise ValueError(f'frames {start}..{end} are not in {os.fsdecode(source)} (1..{engine.last_frame})')
+    frames = end - start + 1
+    index = []
+
+    partial = target + '.partial'
+    try:
+        with open(partial, 'wb') as f, ThreadPoolExecutor(max_workers=jobs) as pool:
+            f.write(HEADER.pack(
+                MAGIC, VERSION, 0, depth_width, depth_height, color_width, color_height,
+                depth_stream.get_video_mode().fps, frames, chunk, codec_name.encode().ljust(4),
+            ))
+            pending = collections.deque()
+
+            def flush():
+                depth_data, color_data = pending.popleft().result()
+                index.append((f.tell(), len(depth_data), len(color_data)))
+                f.write(depth_data)
+                f.write(color_data)
+
+            engine.seek(start)
+            for done in range(0, frames, chunk):
+                if progress is not None:
+                    progress(done, frames)
+                count = min(chunk, frames - done)
+                depth = np.empty((count, depth_height, depth_width), dtype=np.uint16)
+                color = np.empty((count, color_height, color_width, 3), dtype=np.uint8)
+                for i in range(count):
+                    depth_frame, color_frame = engine.read()
+                    depth[i] = depth_array(depth_frame)
+                    color[i] = color_array(color_frame)
+                pending.append(pool.submit(compress_chunk, compress, depth, color))
+                while len(pending) > jobs:
+                    flush()
+            while pending:
+                flush()
+
+            index_offset = f.tell()
+            f.write(FOV.pack(depth_stream.get_horizontal_fov(), depth_stream.get_vertical_fov()))
+            f.write(np.array(index, dtype=CHUNK_INDEX_DTYPE).tobytes())
+            f.write(sync.depth_timestamps[start - 1:end].astype('<i8').tobytes())
+            f.write(sync.color_timestamps[sync.color_index[start - 1:end]].astype('<i8').tobytes())
+            f.write(FOOTER.pack(index_offset))
+        os.replace(partial, target)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+        depth_stream.close()
+        color_stream.close()
+        device.close()
+    return target
+
+
+def parse_args(argv=None):
+    from player_core import backends
+
+    parser = argparse.ArgumentParser(description='Transcode .oni recordings for fast random access.')
+    parser.add_argument('paths', nargs='+', help='.oni recordings')
+    parser.add_argument('--out', help='target file (single recording only), default: next to the source')
+    parser.add_argument('--codec', choices=CODECS, help='default: the first of zstd, lz4, zlib that is installed')
+    parser.add_argument('--chunk', type=int, default=CHUNK_FRAMES, help='frames per compressed chunk')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='compression threads')
+    parser.add_argument('--backend', choices=backends.BACKENDS, default='native')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    if options.out and len(options.paths) > 1:
+        sys.exit('--out needs a single recording')
+    for path in options.paths:
+        started = time.perf_counter()
+        target = transcode(path, options.out, options.backend, options.chunk, options.codec, options.jobs)
+        print(f'{path} -> {target}: {os.path.getsize(target) / os.path.getsize(path):.0%} of the source size, '
+              f'{time.perf_counter() - started:.1f} s')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
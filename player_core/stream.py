@@ -0,0 +1,564 @@
+""" Publishing decoded depth/color frame pairs to other processes on the same host.
+
+    python -m player_core.stream recording.oni --listen tcp:127.0.0.1:5555 --shm oni_frames
+    python -m player_core.stream --connect tcp:127.0.0.1:5555 --lz4
+    python -m player_core.stream --attach oni_frames
+
+The first form plays a recording headless and publishes every frame pair it plays; the
+players do the same with --publish / --shm. The other two are stand-in subscribers that
+print what they receive.
+
+Sockets (TCP or Unix): a subscriber connects and sends a HELLO with its options; the
+server then sends frames, each a FRAME header followed by the raw depth (uint16 HxW)
+and color (uint8 HxWx3) payloads, lz4-compressed when asked for and available. Every
+subscriber has a bounded queue and a sender thread of its own. With the 'drop' policy
+a subscriber that falls behind loses its oldest queued frames (reported in the next
+header); with 'block' the publisher waits for it, which paces the player to it, up to
+SEND_TIMEOUT before the stuck subscriber is disconnected.
+
+Shared memory (`SharedRing`): the last `capacity` frames, uncompressed, in fixed slots
+readers map and read in place. The writer never waits; each slot carries a sequence
+number that is odd while the slot is written, so readers detect a frame overwritten
+under them (a seqlock) and a gap in the sequence tells them how many they missed.
+"""
+import argparse
+import collections
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from player_core import backends
+
+HELLO = struct.Struct('<4sBBH')
+HELLO_MAGIC = b'ONIS'
+# magic, flags, index, dropped, depth and color timestamps (us), sent (monotonic ns),
+# depth height/width, color height/width, depth and color payload sizes.
+FRAME = struct.Struct('<4sIIIqqqHHHHII')
+FRAME_MAGIC = b'ONIF'
+LZ4 = 1
+POLICIES = ('drop', 'block')
+QUEUE_FRAMES = 8
+# A subscriber that takes nothing off its queue or socket for this long is dropped, s.
+SEND_TIMEOUT = 5
+
+# magic, capacity, slot size, depth payload size, latest sequence (last, updated per frame).
+RING_HEADER = struct.Struct('<4sIQQQ')
+RING_MAGIC = b'ONIR'
+# Word holding the latest sequence. It and the slot stamps are read and written as whole
+# aligned 64-bit words: struct copies byte by byte, and a torn counter sends readers ahead.
+LATEST = RING_HEADER.size // 8 - 1
+# sequence (odd while written), index, depth and color timestamps, sent, shapes.
+SLOT = struct.Struct('<QIqqqHHHH')
+RING_FRAMES = 16
+# How often shared memory readers look for a new frame, s.
+POLL_INTERVAL = 0.0005
+
+Frame = collections.namedtuple('Frame', 'index depth color depth_timestamp color_timestamp sent dropped')
+
+
+def lz4_codec():
+    """ (compress, decompress) of lz4 frames, or None without the lz4 package. """
+    try:
+        import lz4.frame
+    except ImportError:
+        return None
+    return lz4.frame.compress, lz4.frame.decompress
+
+
+def parse_address(address):
+    """ (family, address) of 'tcp:HOST:PORT', 'HOST:PORT' or 'unix:PATH'. """
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[len('unix:'):]
+    if address.startswith('tcp:'):
+        address = address[len('tcp:'):]
+    host, _, port = address.rpartition(':')
+    if not port.isdigit():
+        raise ValueError(f'bad address {address!r}, expected tcp:HOST:PORT or unix:PATH')
+    return socket.AF_INET, (host or '127.0.0.1', int(port))
+
+
+def recv_exact(connection, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    while view:
+        received = connection.recv_into(view)
+        if not received:
+            raise EOFError('connection closed')
+        view = view[received:]
+    return buffer
+
+
+class Packet:
+
+    """ One frame pair encoded for the wire, shared by every subscriber with the same options. """
+
+    __slots__ = ('flags', 'index', 'depth_timestamp', 'color_timestamp', 'sent', 'shapes', 'depth', 'color')
+
+    def __init__(self, index, depth, color, depth_timestamp, color_timestamp, compress=None):
+        self.flags = LZ4 if compress is not None else 0
+        self.index = index
+        self.depth_timestamp = depth_timestamp
+        self.color_timestamp = color_timestamp
+        self.sent = time.monotonic_ns()
+        self.shapes = depth.shape[:2] + color.shape[:2]
+        # Copied (or compressed) here, as the caller may reuse its arrays once we return.
+        depth = np.ascontiguousarray(depth).tobytes()
+        color = np.ascontiguousarray(color).tobytes()
+        self.depth = compress(depth) if compress is not None else depth
+        self.color = compress(color) if compress is not None else color
+
+    def header(self, dropped):
+        return FRAME.pack(
+            FRAME_MAGIC, self.flags, self.index, dropped, self.depth_timestamp, self.color_timestamp, self.sent,
+            *self.shapes, len(self.depth), len(self.color),
+        )
+
+
+class Subscriber(threading.Thread):
+
+    """ Sends queued packets to one connected subscriber. """
+
+    def __init__(self, connection, compressed, policy, capacity):
+        super().__init__(daemon=True)
+        self.connection = connection
+        self.compressed = compressed
+        self.policy = policy
+        self.capacity = max(capacity, 1)
+        self.queue = collections.deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+        self.sent = 0
+
+    def offer(self, packet):
+        with self.condition:
+            if self.policy == 'block':
+                if not self.condition.wait_for(lambda: len(self.queue) < self.capacity or self.closed, SEND_TIMEOUT):
+                    self.close()
+                    return
+            elif len(self.queue) >= self.capacity:
+                self.queue.popleft()
+                self.dropped += 1
+            if not self.closed:
+                self.queue.append(packet)
+                self.condition.notify_all()
+
+    def run(self):
+        try:
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.queue or self.closed)
+                    if self.closed:
+                        return
+                    packet = self.queue.popleft()
+                    dropped, self.dropped = self.dropped, 0
+                    self.condition.notify_all()
+                self.connection.sendall(packet.header(dropped))
+                self.connection.sendall(packet.depth)
+                self.connection.sendall(packet.color)
+                self.sent += 1
+        except OSError:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        try:
+            self.connection.close()
+        except OSError:
+            pass
+
+
+class SharedRing:
+
+    """ Writer side of the shared memory ring; slots are sized for the shapes given. """
+
+    def __init__(self, name, depth_shape, color_shape, capacity=RING_FRAMES):
+        self.depth_size = depth_shape[0] * depth_shape[1] * 2
+        self.color_size = color_shape[0] * color_shape[1] * 3
+        # Whole words, so every slot stamp is aligned.
+        self.slot_size = (SLOT.size + self.depth_size + self.color_size + 7) // 8 * 8
+        self.capacity = capacity
+        self.memory = shared_memory.SharedMemory(name, create=True, size=RING_HEADER.size + capacity * self.slot_size)
+        self.buffer = self.memory.buf
+        self.words = np.frombuffer(self.buffer, np.uint64, len(self.buffer) // 8)
+        self.sequence = 0
+        self.oversized = 0
+        RING_HEADER.pack_into(self.buffer, 0, RING_MAGIC, capacity, self.slot_size, self.depth_size, 0)
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def write(self, index, depth, color, depth_timestamp=0, color_timestamp=0):
+        if depth.nbytes > self.depth_size or color.nbytes > self.color_size:
+            # Larger frames than the ring was made for (another recording); readers keep the old ones.
+            self.oversized += 1
+            return
+        sequence = self.sequence + 1
+        offset = RING_HEADER.size + (sequence % self.capacity) * self.slot_size
+        shapes = depth.shape[:2] + color.shape[:2]
+        # The stamp changes in one store; packing the slot header rewrites the same value.
+        self.words[offset // 8] = 2 * sequence - 1
+        SLOT.pack_into(self.buffer, offset, 2 * sequence - 1, index, depth_timestamp, color_timestamp, 0, *shapes)
+        start = offset + SLOT.size
+        np.frombuffer(self.buffer, np.uint16, depth.size, start).reshape(depth.shape)[...] = depth
+        start += self.depth_size
+        np.frombuffer(self.buffer, np.uint8, color.size, start).reshape(color.shape)[...] = color
+        SLOT.pack_into(
+            self.buffer, offset, 2 * sequence - 1, index, depth_timestamp, color_timestamp, time.monotonic_ns(), *shapes,
+        )
+        self.words[offset // 8] = 2 * sequence
+        self.words[LATEST] = sequence
+        self.sequence = sequence
+
+    def close(self):
+        self.words = None
+        self.buffer = None
+        self.memory.close()
+        self.memory.unlink()
+
+
+class SharedRingReader:
+
+    """ Reader side of a `SharedRing` created by another process.
+
+    `frames` yields frames as views into the shared memory: they stay valid until the
+    writer comes around to their slot again, which `intact` tells; with `copy` they
+    are copied out and checked before being yielded.
+    """
+
+    def __init__(self, name):
+        try:
+            self.memory = shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            # Before Python 3.13 every attached process registers the segment for removal at exit.
+            from multiprocessing import resource_tracker
+            self.memory = shared_memory.SharedMemory(name)
+            resource_tracker.unregister(self.memory._name, 'shared_memory')
+        self.buffer = self.memory.buf
+        magic, self.capacity, self.slot_size, self.depth_size, _ = RING_HEADER.unpack_from(self.buffer, 0)
+        if magic != RING_MAGIC:
+            raise ValueError(f'{name} is not a frame ring')
+        self.words = np.frombuffer(self.buffer, np.uint64, len(self.buffer) // 8)
+        self.missed = 0
+
+    def latest(self):
+        return int(self.words[LATEST])
+
+    def slot(self, sequence):
+        return RING_HEADER.size + (sequence % self.capacity) * self.slot_size
+
+    def read(self, sequence):
+        """ Frame `sequence` as views into the ring, or None once it has been overwritten. """
+        offset = self.slot(sequence)
+        if self.words[offset // 8] != 2 * sequence:
+            return None
+        _, index, depth_timestamp, color_timestamp, sent, dh, dw, ch, cw = SLOT.unpack_from(self.buffer, offset)
+        start = offset + SLOT.size
+        depth = np.frombuffer(self.buffer, np.uint16, dh * dw, start).reshape(dh, dw)
+        color = np.frombuffer(self.buffer, np.uint8, ch * cw * 3, start + self.depth_size).reshape(ch, cw, 3)
+        return Frame(index, depth, color, depth_timestamp, color_timestamp, sent, 0)
+
+    def intact(self, sequence):
+        return self.words[self.slot(sequence) // 8] == 2 * sequence
+
+    def frames(self, copy=False, timeout=None):
+        """ Yield (sequence, frame) from the newest frame on, until `timeout` s pass without one. """
+        sequence = self.latest()
+        idle = 0.0
+        while True:
+            latest = self.latest()
+            if latest == sequence:
+                if timeout is not None and idle >= timeout:
+                    return
+                time.sleep(POLL_INTERVAL)
+                idle += POLL_INTERVAL
+                continue
+            idle = 0.0
+            if latest - sequence >= self.capacity:
+                # Fell behind by more than the ring holds.
+                self.missed += latest - sequence - 1
+                sequence = latest
+            else:
+                sequence += 1
+            frame = self.read(sequence)
+            if frame is not None and copy:
+                frame = frame._replace(depth=frame.depth.copy(), color=frame.color.copy())
+                if not self.intact(sequence):
+                    frame = None
+            if frame is None:
+                self.missed += 1
+                continue
+            yield sequence, frame
+
+    def close(self):
+        self.words = None
+        self.buffer = None
+        self.memory.close()
+
+
+class FramePublisher:
+
+    """ Fans frame pairs out to socket subscribers and an optional shared memory ring.
+
+    `publish` is called by whatever plays the frames (the prefetcher, for the frames a
+    session shows); it encodes each frame at most once per compression setting and
+    returns once every subscriber has it queued, or has it dropped.
+    """
+
+    def __init__(self, shm_name=None, ring_frames=RING_FRAMES):
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.codec = lz4_codec()
+        self.shm_name = shm_name
+        self.ring_frames = ring_frames
+        self.ring = None
+        self.servers = []
+        self.published = 0
+        self.closed = False
+
+    def __bool__(self):
+        return bool(self.subscribers) or self.shm_name is not None
+
+    def add(self, subscriber):
+        if subscriber.compressed and self.codec is None:
+            # The client sees uncompressed frames from the header flags.
+            subscriber.compressed = False
+        with self.lock:
+            self.subscribers.append(subscriber)
+        subscriber.start()
+
+    def publish(self, index, depth, color, depth_timestamp=0, color_timestamp=0):
+        with self.lock:
+            if self.closed:
+                return
+            if self.shm_name is not None:
+                if self.ring is None:
+                    self.ring = SharedRing(self.shm_name, depth.shape, color.shape[:2], self.ring_frames)
+                self.ring.write(index, depth, color, depth_timestamp, color_timestamp)
+            self.subscribers = [subscriber for subscriber in self.subscribers if not subscriber.closed]
+            subscribers = list(self.subscribers)
+        packets = {}
+        for subscriber in subscribers:
+            compressed = subscriber.compressed
+            if compressed not in packets:
+                compress = self.codec[0] if compressed else None
+                packets[compressed] = Packet(index, depth, color, depth_timestamp, color_timestamp, compress)
+            subscriber.offer(packets[compressed])
+        self.published += 1
+
+    def serve(self, address):
+        """ Accept subscribers on `address` in the background. """
+        server = StreamServer(self, address)
+        server.start()
+        self.servers.append(server)
+        return server
+
+    def summary(self):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        dropped = sum(subscriber.dropped for subscriber in subscribers)
+        return f'{self.published} frames published, {len(subscribers)} subscribers, {dropped} dropped'
+
+    def close(self):
+        for server in self.servers:
+            server.close()
+        for subscriber in self.subscribers:
+            # Wakes up a publish blocked on one of them, which holds no lock while it waits.
+            subscriber.close()
+        with self.lock:
+            self.closed = True
+            self.subscribers = []
+            if self.ring is not None:
+                self.ring.close()
+                self.ring = None
+
+
+class StreamServer(threading.Thread):
+
+    """ Accepts subscribers on a TCP or Unix socket and hands them to `publisher`. """
+
+    def __init__(self, publisher, address):
+        super().__init__(daemon=True)
+        self.publisher = publisher
+        family, self.address = parse_address(address)
+        self.listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_UNIX:
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+        else:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(self.address)
+        self.listener.listen()
+        self.family = family
+        self.stopped = False
+
+    def run(self):
+        while not self.stopped:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                break
+            try:
+                self.handshake(connection)
+            except (OSError, EOFError, ValueError):
+                connection.close()
+
+    def handshake(self, connection):
+        connection.settimeout(5)
+        magic, flags, policy, capacity = HELLO.unpack(recv_exact(connection, HELLO.size))
+        if magic != HELLO_MAGIC or policy >= len(POLICIES):
+            raise ValueError('not a frame subscriber')
+        # Also bounds each send, so a subscriber that stops reading ends its sender thread.
+        connection.settimeout(SEND_TIMEOUT)
+        if self.family != socket.AF_UNIX:
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.publisher.add(Subscriber(connection, bool(flags & LZ4), POLICIES[policy], capacity))
+
+    def close(self):
+        self.stopped = True
+        # accept() is not interrupted by close() everywhere; shutdown wakes it up.
+        try:
+            self.listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.listener.close()
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+class StreamClient:
+
+    """ Subscriber end of a `StreamServer` connection; iterate it for `Frame`s. """
+
+    def __init__(self, address, compressed=False, policy='drop', capacity=QUEUE_FRAMES, timeout=10):
+        family, address = parse_address(address)
+        self.connection = socket.socket(family, socket.SOCK_STREAM)
+        self.connection.settimeout(timeout)
+        self.connection.connect(address)
+        flags = LZ4 if compressed else 0
+        self.connection.sendall(HELLO.pack(HELLO_MAGIC, flags, POLICIES.index(policy), capacity))
+        self.codec = lz4_codec()
+        self.dropped = 0
+
+    def receive(self):
+        magic, flags, index, dropped, depth_timestamp, color_timestamp, sent, dh, dw, ch, cw, depth_size, color_size = \
+            FRAME.unpack(recv_exact(self.connection, FRAME.size))
+        if magic != FRAME_MAGIC:
+            raise ValueError('lost frame alignment')
+        depth = recv_exact(self.connection, depth_size)
+        color = recv_exact(self.connection, color_size)
+        if flags & LZ4:
+            depth = self.codec[1](depth)
+            color = self.codec[1](color)
+        self.dropped += dropped
+        return Frame(
+            index, np.frombuffer(depth, np.uint16).reshape(dh, dw), np.frombuffer(color, np.uint8).reshape(ch, cw, 3),
+            depth_timestamp, color_timestamp, sent, dropped,
+        )
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.receive()
+            except (EOFError, socket.timeout):
+                return
+
+    def close(self):
+        self.connection.close()
+
+
+def serve(options):
+    from player_core.prefetch import HIDDEN
+    from player_core.session import PlaybackSession
+
+    publisher = FramePublisher(options.shm)
+    if options.listen:
+        publisher.serve(options.listen)
+    session = PlaybackSession.open(backends.device_class(options.backend), os.fsencode(options.path),
+                                   publisher=publisher)
+    # Nothing is displayed, so nothing needs rendering.
+    session.set_sizes(HIDDEN, HIDDEN)
+    while len(publisher.subscribers) < options.wait:
+        time.sleep(0.05)
+    try:
+        while True:
+            for _ in session.frames(paced=options.paced):
+                pass
+            if not options.loop:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(publisher.summary())
+        # First, so a blocking subscriber lets the prefetcher go.
+        publisher.close()
+        session.close()
+
+
+def report(frames, started):
+    count = 0
+    dropped = 0
+    latencies = []
+    size = 0
+    for frame in frames:
+        latencies.append(time.monotonic_ns() - frame.sent)
+        count += 1
+        dropped += frame.dropped
+        size += frame.depth.nbytes + frame.color.nbytes
+    elapsed = time.perf_counter() - started
+    if not count:
+        print('no frames received')
+        return
+    ms = np.array(latencies) / 1e6
+    print(f'{count} frames ({dropped} dropped) in {elapsed:.2f} s, {count / elapsed:.1f} fps, '
+          f'{size / elapsed / 2 ** 20:.0f} MB/s, latency p50 {np.percentile(ms, 50):.2f} ms '
+          f'p99 {np.percentile(ms, 99):.2f} ms')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Publish the frames of a recording, or subscribe to them.')
+    parser.add_argument('path', nargs='?', help='.oni or .oniz recording to publish')
+    parser.add_argument('--listen', metavar='ADDRESS', help='accept subscribers on tcp:HOST:PORT or unix:PATH')
+    parser.add_argument('--shm', metavar='NAME', help='also publish into a shared memory ring of this name')
+    parser.add_argument('--backend', choices=backends.BACKENDS, default='native')
+    parser.add_argument('--paced', action='store_true', help='publish at the recording rate instead of at once')
+    parser.add_argument('--loop', action='store_true', help='start over at the end of the recording')
+    parser.add_argument('--wait', type=int, default=0, metavar='N', help='wait for N subscribers before starting')
+    parser.add_argument('--connect', metavar='ADDRESS', help='subscribe to a server and report what arrives')
+    parser.add_argument('--attach', metavar='NAME', help='read a shared memory ring and report what arrives')
+    parser.add_argument('--lz4', action='store_true', help='ask for lz4 compressed frames')
+    parser.add_argument('--policy', choices=POLICIES, default='drop', help='what the server does when we fall behind')
+    parser.add_argument('--timeout', type=float, default=5, help='subscribers stop after this long without a frame')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    if options.connect:
+        client = StreamClient(options.connect, options.lz4, options.policy, timeout=options.timeout)
+        report(client, time.perf_counter())
+        client.close()
+    elif options.attach:
+        reader = SharedRingReader(options.attach)
+        report((frame for _, frame in reader.frames(copy=True, timeout=options.timeout)), time.perf_counter())
+        print(f'{reader.missed} frames missed')
+        reader.close()
+    elif options.path:
+        serve(options)
+    else:
+        sys.exit('nothing to do: give a recording to publish, --connect or --attach')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import numpy as np
+
+from player_core import sidecar
+
+SUFFIX = '.sync.npz'
+
+
+def read_timestamps(stream, playback_support, progress=None):
+    """ Per-frame timestamps (us) of a stream, index 0 being frame 1.
+
+    Taken from the file index when the backend keeps one; otherwise the stream is read
+    once from the start, calling `progress(frames_done, frames_total)` on the way.
+    """
+    if hasattr(stream, 'timestamps'):
+        return np.asarray(stream.timestamps(), dtype=np.int64)
+    count = stream.get_number_of_frames()
+    timestamps = np.empty(count, dtype=np.int64)
+    # Unpaced: at the default speed of 1.0 the scan would take as long as the recording.
+    speed = playback_support.speed
+    playback_support.speed = -1
+    try:
+        playback_support.seek(stream, 1)
+        for i in range(count):
+            if progress is not None:
+                progress(i, count)
+            timestamps[i] = stream.read_frame().timestamp
+    finally:
+        playback_support.speed = speed
+    return timestamps
+
+
+def count_dropped(timestamps):
+    """ Frames missing from a stream, judged by gaps longer than 1.5 nominal intervals. """
+    if len(timestamps) < 3:
+        return 0
+    gaps = np.diff(timestamps)
+    interval = np.median(gaps)
+    if interval <= 0:
+        return 0
+    long_gaps = gaps[gaps > 1.5 * interval]
+    return int(np.sum(np.round(long_gaps / interval) - 1))
+
+
+class SyncTable:
+
+    """ Pairs every depth frame with the color frame nearest to it in time.
+
+    Built once from the two timestamp arrays with a vectorised `searchsorted`, so it
+    costs O(n log m) however long the recording is. Positions are 1-based frame indices
+    as used by `PlaybackSupport.seek`.
+    """
+
+    def __init__(self, depth_timestamps, color_timestamps):
+        self.depth_timestamps = np.asarray(depth_timestamps, dtype=np.int64)
+        self.color_timestamps = np.asarray(color_timestamps, dtype=np.int64)
+
+        order = np.argsort(self.color_timestamps, kind='stable')
+        sorted_color = self.color_timestamps[order]
+        right = np.clip(np.searchsorted(sorted_color, self.depth_timestamps), 1, len(sorted_color) - 1)
+        left = right - 1
+        if len(sorted_color) == 1:
+            nearest = np.zeros(len(self.depth_timestamps), dtype=np.int64)
+        else:
+            use_left = (self.depth_timestamps - sorted_color[left]) <= (sorted_color[right] - self.depth_timestamps)
+            nearest = np.where(use_left, left, right)
+        self.color_index = order[nearest]
+        self.offsets = self.color_timestamps[self.color_index] - self.depth_timestamps
+
+        used = np.bincount(self.color_index, minlength=len(self.color_timestamps))
+        self.repeated_color = int(np.sum(np.maximum(used - 1, 0)))
+        self.skipped_color = int(np.sum(used == 0))
+        self.dropped_depth = count_dropped(self.depth_timestamps)
+        self.dropped_color = count_dropped(self.color_timestamps)
+
+    def color_position(self, depth_position):
+        return int(self.color_index[depth_position - 1]) + 1
+
+    def timestamps(self, depth_position):
+        """ Timestamps (us) of a depth frame and of the color frame paired with it. """
+        i = depth_position - 1
+        return int(self.depth_timestamps[i]), int(self.color_timestamps[self.color_index[i]])
+
+    @property
+    def mean_drift(self):
+        return float(np.mean(np.abs(self.offsets))) if len(self.offsets) else 0.0
+
+    @property
+    def max_drift(self):
+        return int(np.max(np.abs(self.offsets))) if len(self.offsets) else 0
+
+    def summary(self):
+        return (f'sync drift {self.mean_drift / 1000:.1f} ms avg / {self.max_drift / 1000:.1f} ms max, '
+                f'dropped {self.dropped_depth} depth / {self.dropped_color} color')
+
+    def __str__(self):
+        return (f'{self.summary()}, {self.repeated_color} color frames repeated, '
+                f'{self.skipped_color} skipped')
+
+    @classmethod
+    def for_streams(cls, path, depth_stream, color_stream, playback_support, progress=None):
+        """ Table for an opened recording, caching OpenNI-read timestamps next to the file. """
+        if hasattr(depth_stream, 'timestamps') and hasattr(color_stream, 'timestamps'):
+            return cls(depth_stream.timestamps(), color_stream.timestamps())
+        data = sidecar.load(path, SUFFIX)
+        if data is None:
+            data = {
+                'depth': read_timestamps(depth_stream, playback_support, progress),
+                'color': read_timestamps(color_stream, playback_support, progress),
+            }
+            sidecar.save(path, SUFFIX, **data)
+        return cls(data['depth'], data['color'])
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+
+from player_core import sidecar
+from player_core.convert import color_array, depth_array
+
+SUFFIX = '.thumbs.npz'
+
+
+class ThumbnailIndex:
+
+    """ Downscaled depth/color frames taken every `step` frames of a recording.
+
+    Used to preview the slider position while it is dragged; the exact frame is only
+    decoded once the slider is released.
+    """
+
+    def __init__(self, first_frame, step, depth, color):
+        self.first_frame = first_frame
+        self.step = step
+        self.depth = depth
+        self.color = color
+
+    def __len__(self):
+        return len(self.depth)
+
+    def nearest(self, position):
+        i = int(round((position - self.first_frame) / self.step))
+        i = min(max(i, 0), len(self.depth) - 1)
+        return self.depth[i], self.color[i]
+
+    @classmethod
+    def build(cls, engine, step, width=160, progress=None):
+        depth_thumbs = []
+        color_thumbs = []
+        positions = range(engine.first_frame, engine.last_frame + 1, step)
+        for i, position in enumerate(positions):
+            if progress is not None:
+                progress(i, len(positions))
+            depth_frame, color_frame = engine.read_at(position)
+            depth = depth_array(depth_frame)
+            color = color_array(color_frame)
+            # Nearest neighbour for depth, so holes and edges are not averaged away.
+            depth_size = (width, depth.shape[0] * width // depth.shape[1])
+            color_size = (width, color.shape[0] * width // color.shape[1])
+            depth_thumbs.append(cv2.resize(depth, depth_size, interpolation=cv2.INTER_NEAREST))
+            color_thumbs.append(cv2.resize(color, color_size, interpolation=cv2.INTER_AREA))
+        return cls(engine.first_frame, step, np.stack(depth_thumbs), np.stack(color_thumbs))
+
+    @classmethod
+    def load(cls, path, first_frame, step):
+        data = sidecar.load(path, SUFFIX)
+        if data is None or int(data['step']) != step or int(data['first_frame']) != first_frame:
+            return None
+        return cls(first_frame, step, data['depth'], data['color'])
+
+    def save(self, path):
+        sidecar.save(path, SUFFIX, first_frame=self.first_frame, step=self.step, depth=self.depth, color=self.color)
+
+    @classmethod
+    def load_or_build(cls, path, engine, step, progress=None):
+        index = cls.load(path, engine.first_frame, step)
+        if index is None:
+            index = cls.build(engine, step, progress=progress)
+            index.save(path)
+        return index
@@ -0,0 +1,682 @@
+""" Main window logic shared by both players; they differ only in what drives playback.
+
+A player subclasses `PlayerWindow` together with its generated `gui.Ui_MainWindow` and
+implements `start_cycle` / `stop_cycle`, which start and stop feeding due frames from
+`session.next_due` to `show_slot`.
+
+Only Qt is imported up front. The frame pipeline and the imaging stack (NumPy, OpenCV)
+are imported by `CoreLoader` in the background once the window is on screen, and the
+OpenNI runtime is loaded by the first `OpenJob`, so a cold start shows the window first.
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from player_core import backends
+
+# Frames between slider preview thumbnails, 0 disables the thumbnail index.
+THUMBNAIL_STEP = 50
+# Refresh period of the performance overlay (F3), ms.
+OVERLAY_INTERVAL = 500
+# How often the progress of a file being opened is polled, ms.
+JOB_POLL_INTERVAL = 50
+# Everything the window needs once a file is opened, NumPy and OpenCV included.
+CORE_MODULES = (
+    'player_core.session', 'player_core.opener', 'player_core.display', 'player_core.pointcloud',
+    'player_core.oni_file', 'player_core.store',
+)
+
+
+class CoreLoader(QtCore.QThread):
+
+    """ Imports CORE_MODULES off the GUI thread; `finished` tells the window it can set them up. """
+
+    def __init__(self):
+        super().__init__()
+        self.seconds = None
+
+    def run(self) -> None:
+        started = time.perf_counter()
+        for name in CORE_MODULES:
+            importlib.import_module(name)
+        self.seconds = time.perf_counter() - started
+
+
+class PlayerWindow(QtWidgets.QMainWindow):
+    def __init__(self, device, trace_path=None):
+        super().__init__()
+        self.setupUi(self)
+
+        # A device class, or a backend name the first OpenJob loads.
+        self.device_class = device
+        self.trace_path = trace_path
+        self.started = time.perf_counter()
+        self.report_startup = False
+        # --publish address and --shm ring name frames are published to, if any.
+        self.publish_address = None
+        self.shm_name = None
+        self.publisher = None
+        self.session = None
+        self.profiler = None
+        self.is_play = False
+        self.was_playing = False
+        self.preview = None
+        self.depth_view = None
+        self.color_view = None
+        self.overlay = None
+        self.sparkline = None
+        for label in (self.left_label, self.right_label):
+            # Frames are fitted into the labels instead of sizing them.
+            label.setAlignment(QtCore.Qt.AlignCenter)
+            label.setSizePolicy(QtWidgets.QSizePolicy.Ignored, QtWidgets.QSizePolicy.Ignored)
+        self.screen_watched = False
+        self.overlay_timer = QtCore.QTimer()
+        self.overlay_timer.setInterval(OVERLAY_INTERVAL)
+        self.overlay_timer.timeout.connect(self.refresh_overlay)
+
+        self.job = None
+        self.job_timer = QtCore.QTimer()
+        self.job_timer.setInterval(JOB_POLL_INTERVAL)
+        self.job_timer.timeout.connect(self.poll_job)
+        self.open_progress = QtWidgets.QProgressBar()
+        self.open_progress.setMaximumWidth(240)
+        self.cancel_button = QtWidgets.QPushButton('Cancel')
+        self.cancel_button.clicked.connect(self.cancel_open)
+        self.statusbar.addPermanentWidget(self.open_progress)
+        self.statusbar.addPermanentWidget(self.cancel_button)
+        self.open_progress.hide()
+        self.cancel_button.hide()
+
+        self.path = None
+        # Clip in and out frames, None while not marked.
+        self.clip_start = None
+        self.clip_end = None
+        self.clip_job = None
+        self.clip_timer = QtCore.QTimer()
+        self.clip_timer.setInterval(JOB_POLL_INTERVAL)
+        self.clip_timer.timeout.connect(self.poll_clip)
+        self.clip_progress = QtWidgets.QProgressBar()
+        self.clip_progress.setMaximumWidth(240)
+        self.clip_cancel_button = QtWidgets.QPushButton('Cancel clip')
+        self.clip_cancel_button.clicked.connect(self.cancel_clip)
+        self.statusbar.addPermanentWidget(self.clip_progress)
+        self.statusbar.addPermanentWidget(self.clip_cancel_button)
+        self.clip_progress.hide()
+        self.clip_cancel_button.hide()
+
+        self.play_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaPlay))
+        self.play_button.clicked.connect(self.play_video)
+        self.stop_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaStop))
+        self.stop_button.clicked.connect(self.stop_video)
+        self.next_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaSkipForward))
+        self.next_button.clicked.connect(self.get_next_frame)
+        self.prev_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaSkipBackward))
+        self.prev_button.clicked.connect(self.get_prev_frame)
+
+        self.open_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_DialogOpenButton))
+        self.open_button.clicked.connect(self.open_device)
+
+        self.quit_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_DialogCancelButton))
+        self.quit_button.clicked.connect(self.quit_player)
+
+        self.cloud_button.clicked.connect(self.save_point_cloud)
+        self.next_match_button.clicked.connect(self.next_match)
+        self.prev_match_button.clicked.connect(self.prev_match)
+        self.mark_in_button.clicked.connect(self.mark_in)
+        self.mark_out_button.clicked.connect(self.mark_out)
+        self.clip_button.clicked.connect(self.save_clip)
+        QtWidgets.QShortcut(QtGui.QKeySequence('I'), self, activated=self.mark_in_button.click)
+        QtWidgets.QShortcut(QtGui.QKeySequence('O'), self, activated=self.mark_out_button.click)
+
+        self.horizontalSlider.sliderMoved.connect(self.preview_position)
+        self.horizontalSlider.sliderPressed.connect(self.slider_pressed)
+        self.horizontalSlider.sliderReleased.connect(self.slider_released)
+        self.set_controls_enabled(False)
+        for widget in (self.colormap_box, self.near_box, self.far_box, self.speed_box, self.filter_button,
+                       self.search_edit):
+            widget.setEnabled(False)
+
+        self.loader = CoreLoader()
+        self.loader.finished.connect(self.setup_core)
+
+    def preload(self):
+        """ Start importing the frame pipeline in the background. """
+        if self.session is None and not self.loader.isRunning():
+            self.loader.start()
+
+    def setup_core(self):
+        """ Create the session and the widgets that need the pipeline; imports whatever is not loaded yet. """
+        if self.session is not None:
+            return
+        from player_core.colorize import COLORMAPS
+        from player_core.display import FrameView, Sparkline, TextOverlay
+        from player_core.filters import FILTERS, TITLES
+        from player_core.instrument import Profiler
+        from player_core.scheduler import SPEEDS
+        from player_core.session import PlaybackSession
+
+        self.profiler = Profiler(tracing=self.trace_path is not None)
+        if self.publish_address or self.shm_name:
+            from player_core.stream import FramePublisher
+
+            self.publisher = FramePublisher(self.shm_name)
+            if self.publish_address:
+                self.publisher.serve(self.publish_address)
+        self.session = PlaybackSession(profiler=self.profiler, publisher=self.publisher)
+        self.depth_view = FrameView(self.left_label)
+        self.color_view = FrameView(self.right_label)
+        self.overlay = TextOverlay(self.centralwidget)
+        QtWidgets.QShortcut(QtGui.QKeySequence('F3'), self, activated=self.toggle_overlay)
+
+        filter_menu = QtWidgets.QMenu(self.filter_button)
+        for name in FILTERS:
+            action = filter_menu.addAction(TITLES[name])
+            action.setCheckable(True)
+            action.setData(name)
+            action.toggled.connect(self.set_filters)
+        self.filter_button.setMenu(filter_menu)
+
+        self.search_edit.returnPressed.connect(self.next_match)
+        self.sparkline = Sparkline(self.centralwidget)
+        self.sparkline.clicked.connect(self.jump_to)
+        self.sparkline.setMinimumWidth(self.horizontalSlider.minimumWidth())
+        self.sparkline.setMaximumWidth(self.horizontalSlider.maximumWidth())
+        # Between the spacers when the layout centres the slider.
+        self.activity_layout.insertWidget(self.activity_layout.count() // 2, self.sparkline)
+
+        colorizer = self.session.colorizer
+        self.colormap_box.addItems(COLORMAPS)
+        self.colormap_box.setCurrentText(colorizer.colormap)
+        self.colormap_box.currentTextChanged.connect(self.configure_colorizer)
+        self.near_box.setValue(colorizer.near)
+        self.near_box.valueChanged.connect(self.configure_colorizer)
+        self.far_box.setValue(colorizer.far)
+        self.far_box.valueChanged.connect(self.configure_colorizer)
+
+        self.speed_box.addItems([f'{speed:g}x' for speed in SPEEDS])
+        self.speed_box.setCurrentIndex(SPEEDS.index(self.session.speed))
+        self.speed_box.currentIndexChanged.connect(self.set_speed)
+        for widget in (self.colormap_box, self.near_box, self.far_box, self.speed_box, self.filter_button,
+                       self.search_edit):
+            widget.setEnabled(True)
+
+    @property
+    def is_open(self):
+        return self.session is not None and self.session.is_open
+
+    def report(self, event):
+        """ With --startup-report, print how long after startup `event` happened. """
+        if self.report_startup:
+            print(f'{event} {(time.perf_counter() - self.started) * 1000:.1f} ms', flush=True)
+
+    def start_cycle(self):
+        """ Start showing due frames; the session is already playing. """
+        raise NotImplementedError
+
+    def stop_cycle(self):
+        """ Stop showing frames before the session is paused. """
+        raise NotImplementedError
+
+    def set_controls_enabled(self, enabled):
+        for widget in (self.play_button, self.stop_button, self.next_button, self.next_match_button,
+                       self.prev_button, self.prev_match_button, self.cloud_button, self.horizontalSlider,
+                       self.mark_in_button, self.mark_out_button, self.clip_button):
+            widget.setEnabled(enabled)
+
+    def set_stepping_enabled(self, enabled):
+        for button in (self.next_button, self.next_match_button, self.prev_button, self.prev_match_button):
+            button.setEnabled(enabled)
+
+    def open_device(self):
+
+        """ Open .oni file and getting metadata. """
+
+        if self.is_open:
+            self.stop_video()
+        else:
+            self.cancel_open()
+            self.cancel_clip()
+
+        path = self.browse_folder()
+
+        if path:
+            self.open_path(path)
+
+    def open_path(self, path):
+        from player_core.opener import OpenJob
+
+        self.setup_core()
+        self.path = path
+        # Opening, timestamps, thumbnails and frame statistics run in the background; poll_job picks
+        # up the streams as soon as they are open and the indexes once built.
+        self.job = OpenJob(self.device_class, path, THUMBNAIL_STEP, statistics=True)
+        self.job.start()
+        self.open_progress.setRange(0, 0)
+        self.open_progress.show()
+        self.cancel_button.show()
+        self.job_timer.start()
+
+    def poll_job(self):
+        job = self.job
+        if job.opened.is_set() and not self.is_open:
+            self.attach_device(job)
+
+        if job.total:
+            self.open_progress.setRange(0, job.total)
+            self.open_progress.setValue(job.done)
+        else:
+            self.open_progress.setRange(0, 0)
+        self.open_progress.setFormat(f'{job.stage} %p%')
+
+        if job.finished.is_set():
+            self.finish_job()
+            if job.error is not None:
+                self.statusbar.showMessage(f'{os.fsdecode(job.path)}: {job.error}')
+            elif job.sync is not None:
+                self.attach_index(job)
+
+    def finish_job(self):
+        self.job_timer.stop()
+        self.open_progress.hide()
+        self.cancel_button.hide()
+        self.job = None
+
+    def cancel_open(self):
+        job = self.job
+        if job is None:
+            return
+        job.cancel()
+        job.join()
+        if job.opened.is_set() and not self.is_open:
+            job.device.close()
+        self.finish_job()
+
+    def attach_device(self, job):
+        # Color is paired by index until the timestamp table is ready.
+        self.paint(self.session.attach(job))
+        self.horizontalSlider.setRange(self.session.first_frame, self.session.last_frame)
+        self.sparkline.set_span(self.session.first_frame, self.session.last_frame)
+        self.update_sizes()
+        self.set_controls_enabled(True)
+        self.show_status()
+        self.report('first frame')
+        if self.report_startup:
+            QtCore.QTimer.singleShot(0, self.close)
+
+    def attach_index(self, job):
+        from player_core.prefetch import FrameSlot
+
+        self.session.attach_index(job)
+        thumbnails = self.session.thumbnails
+        if thumbnails is not None:
+            self.preview = FrameSlot(thumbnails.depth.shape[1:3], thumbnails.color.shape[1:3])
+        stats = self.session.stats
+        if stats is not None:
+            # The slider starts at frame 2, and so does the sparkline under it.
+            self.sparkline.set_values(stats['motion'][1:], first=2)
+        self.statusbar.showMessage(str(job.sync))
+
+    def update_sizes(self):
+        """ Render frames at the size the labels show them at now, and redraw a paused frame at it. """
+        if not self.is_open:
+            return
+        depth_shape, color_shape = self.session.engine.frame_shapes()
+        changed = self.session.set_sizes(
+            self.depth_view.fit(depth_shape[1], depth_shape[0]), self.color_view.fit(color_shape[1], color_shape[0]),
+        )
+        if changed and not self.is_play and self.depth_view.is_visible():
+            self.set_position(self.session.position)
+
+    def paint(self, slot):
+        self.horizontalSlider.setValue(slot.index)
+        with self.profiler.stage('paint'):
+            self.depth_view.show(slot.depth)
+            self.color_view.show(slot.color)
+
+    def show_slot(self, slot):
+        session = self.session
+        if not session.is_open:
+            # Queued by the playback thread before the recording was closed.
+            return
+        if slot is not session.still and slot.generation != session.ring.generation:
+            # Decoded before a seek and delivered after it.
+            session.ring.release(slot)
+            return
+        self.paint(slot)
+        session.release(slot)
+        if session.meter.count % 30 == 0:
+            self.show_status()
+
+    def close_streaming(self):
+        self.cancel_open()
+        self.set_controls_enabled(False)
+        if self.is_play:
+            self.stop_cycle()
+            self.is_play = False
+        self.session.close()
+        self.color_view.clear()
+        self.depth_view.clear()
+        self.horizontalSlider.setSliderPosition(0)
+        self.preview = None
+        self.clip_start = self.clip_end = None
+        self.sparkline.set_range(None, None)
+        self.sparkline.clear()
+
+    def play_video(self):
+        if self.is_play:
+            self.is_play = False
+            self.stop_cycle()
+            self.session.pause()
+            self.play_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaPlay))
+            self.play_button.setText('Play')
+            self.set_stepping_enabled(True)
+        else:
+            self.is_play = True
+            self.session.play()
+            self.start_cycle()
+            self.play_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaPause))
+            self.play_button.setText('Pause')
+            self.set_stepping_enabled(False)
+
+    def stop_video(self):
+        self.play_button.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_MediaPlay))
+        self.play_button.setText('Play')
+        self.close_streaming()
+        # The clip is of the recording being closed.
+        self.cancel_clip()
+
+    def slider_pressed(self):
+        self.was_playing = self.is_play
+        if self.was_playing:
+            self.play_video()
+
+    def slider_released(self):
+        self.set_position(self.horizontalSlider.value())
+        if self.was_playing:
+            self.play_video()
+
+    def show_status(self):
+        display_usec = self.depth_view.usec_per_frame + self.color_view.usec_per_frame
+        display_bytes = self.depth_view.bytes_per_frame + self.color_view.bytes_per_frame
+        self.statusbar.showMessage(
+            f'{self.session.meter.fps:.1f} fps, {self.session.summary()}, '
+            f'display {display_usec:.0f} us/{display_bytes / 1024:.0f} KiB copied per frame'
+        )
+
+    def set_position(self, position):
+        self.paint(self.session.seek(position))
+        self.show_status()
+
+    def set_speed(self, index):
+        from player_core.scheduler import SPEEDS
+
+        self.session.set_speed(SPEEDS[index])
+
+    def save_point_cloud(self):
+        position = self.session.position
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, 'Save point cloud', f'cloud_{position:06d}.ply', filter='Point clouds (*.ply *.npy)',
+        )
+        if path:
+            from player_core import pointcloud
+
+            points, colors = self.session.point_cloud(position)
+            pointcloud.save(path, points, colors)
+            self.statusbar.showMessage(f'frame {position}: {len(points)} points saved to {path}')
+
+    def mark_in(self):
+        self.clip_start = self.session.position
+        if self.clip_end is not None and self.clip_end < self.clip_start:
+            self.clip_end = None
+        self.show_clip()
+
+    def mark_out(self):
+        self.clip_end = self.session.position
+        if self.clip_start is not None and self.clip_start > self.clip_end:
+            self.clip_start = None
+        self.show_clip()
+
+    def clip_range(self):
+        """ In and out frames of the clip; a marker not set stands for that end of the recording. """
+        start = self.session.first_frame if self.clip_start is None else self.clip_start
+        end = self.session.last_frame if self.clip_end is None else self.clip_end
+        return start, end
+
+    def show_clip(self):
+        start, end = self.clip_range()
+        self.sparkline.set_range(start, end)
+        self.statusbar.showMessage(f'Clip: frames {start}..{end} ({end - start + 1} frames)')
+
+    def save_clip(self):
+        from player_core.clip import ClipJob, clip_path
+
+        if self.clip_job is not None:
+            self.statusbar.showMessage('A clip is being saved already')
+            return
+        start, end = self.clip_range()
+        extension = os.path.splitext(os.fsdecode(self.path))[1]
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, 'Save clip', clip_path(self.path, start, end), filter=f'Recordings (*{extension})',
+        )
+        if path:
+            # The clip is copied from the file itself, whatever plays it; the player keeps going meanwhile.
+            self.clip_job = ClipJob(self.path, path, start, end)
+            self.clip_job.start()
+            self.clip_progress.setRange(0, 0)
+            self.clip_progress.show()
+            self.clip_cancel_button.show()
+            self.clip_timer.start()
+
+    def poll_clip(self):
+        job = self.clip_job
+        if job.total:
+            self.clip_progress.setRange(0, job.total)
+            self.clip_progress.setValue(job.done)
+        self.clip_progress.setFormat(f'{job.stage} %p%')
+        if job.finished.is_set():
+            self.finish_clip()
+            if job.error is not None:
+                self.statusbar.showMessage(f'{job.target}: {job.error}')
+            elif not job.cancelled.is_set():
+                self.statusbar.showMessage(f'Frames {job.start_frame}..{job.end_frame} saved to {job.target}')
+
+    def finish_clip(self):
+        self.clip_timer.stop()
+        self.clip_progress.hide()
+        self.clip_cancel_button.hide()
+        self.clip_job = None
+
+    def cancel_clip(self):
+        job = self.clip_job
+        if job is None:
+            return
+        job.cancel()
+        job.join()
+        self.finish_clip()
+
+    def toggle_overlay(self):
+        if self.overlay.isVisible():
+            self.overlay_timer.stop()
+            self.overlay.hide()
+        else:
+            self.refresh_overlay()
+            self.overlay.show()
+            self.overlay_timer.start()
+
+    def refresh_overlay(self):
+        session = self.session
+        if session is None:
+            return
+        lines = [f'{session.meter.fps:5.1f} fps', 'stage       mean     p95     max']
+        if self.is_open:
+            lines[0] += f', decode {session.engine.fps:5.1f} fps'
+        lines += self.profiler.lines()
+        lines.append(f'cache {session.cache.hit_ratio:.0%} hits, {len(session.cache)} frames')
+        if self.is_open:
+            lines.append(session.clock.summary())
+        self.overlay.set_lines(lines)
+
+    def dump_trace(self):
+        if self.trace_path and self.profiler is not None:
+            self.profiler.dump_trace(self.trace_path)
+
+    def configure_colorizer(self):
+        self.session.colorizer.configure(
+            self.near_box.value(), self.far_box.value(), self.colormap_box.currentText(),
+        )
+        if self.is_open:
+            self.set_position(self.session.position)
+
+    def preview_position(self, position):
+        thumbnails = self.session.thumbnails
+        if thumbnails is None:
+            self.set_position(position)
+            return
+
+        self.preview.fill(position, *thumbnails.nearest(position), self.session.colorizer)
+        depth_shape, color_shape = self.session.engine.frame_shapes()
+        self.depth_view.show(self.preview.depth, QtCore.QSize(depth_shape[1], depth_shape[0]))
+        self.color_view.show(self.preview.color, QtCore.QSize(color_shape[1], color_shape[0]))
+
+    def get_next_frame(self):
+        self.show_slot(self.session.step(1))
+
+    def get_prev_frame(self):
+        self.show_slot(self.session.step(-1))
+
+    def set_filters(self):
+        names = [action.data() for action in self.filter_button.menu().actions() if action.isChecked()]
+        self.session.set_filters(names)
+        if self.is_open:
+            self.jump_to(self.session.position)
+
+    def jump_to(self, position):
+        was_playing = self.is_play
+        if was_playing:
+            self.play_video()
+        self.set_position(position)
+        if was_playing:
+            self.play_video()
+
+    def next_match(self):
+        self.find_match(forward=True)
+
+    def prev_match(self):
+        self.find_match(forward=False)
+
+    def find_match(self, forward):
+        stats = self.session.stats
+        if stats is None:
+            self.statusbar.showMessage('Frame statistics are not ready yet')
+            return
+        try:
+            matches = stats.select(self.search_edit.text())
+        except ValueError as e:
+            self.statusbar.showMessage(str(e))
+            return
+        # Frame 1 is never shown.
+        matches[0] = False
+        self.sparkline.set_marks(matches[1:])
+        search, direction = (stats.next_match, 'after') if forward else (stats.prev_match, 'before')
+        position = search(matches, self.session.position)
+        if position is None:
+            self.statusbar.showMessage(
+                f'No match {direction} frame {self.session.position} ({matches.sum()} in total)'
+            )
+        else:
+            self.jump_to(position)
+
+    def browse_folder(self):
+        p = QtWidgets.QFileDialog.getOpenFileName(self, 'Open file', r'C:\Users', filter='*.oni *.oniz')
+        if p[0]:
+            return bytes(''.join([el if el != '/' else '//' for el in list(p[0])]), encoding='utf-8')
+
+    def quit_player(self):
+        reply = QtWidgets.QMessageBox.question(
+            self,
+            'Message',
+            'Are you sure to quit?',
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+            QtWidgets.QMessageBox.No
+        )
+
+        if reply == QtWidgets.QMessageBox.Yes:
+            if self.is_open:
+                self.close_streaming()
+            backends.unload()
+            self.close()
+
+    def showEvent(self, a0: QtGui.QShowEvent):
+        super().showEvent(a0)
+        if not self.screen_watched:
+            # Moving to a screen with another pixel ratio changes the size frames are needed at.
+            self.windowHandle().screenChanged.connect(self.update_sizes)
+            self.screen_watched = True
+        self.update_sizes()
+
+    def resizeEvent(self, a0: QtGui.QResizeEvent):
+        super().resizeEvent(a0)
+        self.update_sizes()
+
+    def changeEvent(self, a0: QtCore.QEvent):
+        super().changeEvent(a0)
+        if a0.type() == QtCore.QEvent.WindowStateChange:
+            self.update_sizes()
+
+    def closeEvent(self, a0: QtGui.QCloseEvent):
+        self.loader.wait()
+        if self.publisher is not None:
+            # Before the session, so a blocking subscriber lets the prefetcher go.
+            self.publisher.close()
+        if self.is_open:
+            self.close_streaming()
+        self.cancel_open()
+        self.cancel_clip()
+        self.dump_trace()
+        backends.unload()
+
+
+def main(player_class):
+    started = time.perf_counter()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', nargs='?', help='recording to open right away')
+    parser.add_argument('--backend', choices=backends.BACKENDS, default='openni',
+                        help='read recordings through the OpenNI runtime or the built-in .oni reader')
+    parser.add_argument('--trace', metavar='PATH', help='record a Chrome trace of the playback hot path to PATH')
+    parser.add_argument('--grid', nargs='+', metavar='PATH',
+                        help='play several recordings side by side on one timeline instead')
+    parser.add_argument('--startup-report', action='store_true',
+                        help='print the time to the first window and to the first frame of PATH, then quit')
+    parser.add_argument('--publish', metavar='ADDRESS',
+                        help='publish the frames played to subscribers on tcp:HOST:PORT or unix:PATH')
+    parser.add_argument('--shm', metavar='NAME', help='publish the frames played into a shared memory ring')
+    args, qt_args = parser.parse_known_args()
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    if args.grid:
+        from player_core.gridview import GridWindow
+
+        grid = GridWindow(args.grid, args.backend)
+        grid.show()
+        sys.exit(app.exec_())
+
+    o_player = player_class(args.backend, args.trace)
+    o_player.started = started
+    o_player.report_startup = args.startup_report
+    o_player.publish_address = args.publish
+    o_player.shm_name = args.shm
+    o_player.show()
+    app.processEvents()
+    o_player.report('first window')
+    o_player.preload()
+    if args.path:
+        o_player.open_path(os.fsencode(args.path))
+    if args.startup_report:
+        if not args.path:
+            o_player.loader.wait()
+            o_player.report('core loaded')
+            return
+    sys.exit(app.exec_())
@@ -13,16 +13,16 @@ class Ui_MainWindow(object):
         self.verticalLayout.setObjectName("verticalLayout")
         self.label_layout = QtWidgets.QHBoxLayout()
         self.label_layout.setObjectName("label_layout")
-        self.label_left = QtWidgets.QLabel(self.centralwidget)
-        self.label_left.setMinimumSize(QtCore.QSize(640, 480))
-        self.label_left.setObjectName("label_left")
-        self.label_left.setStyleSheet("background-color: rgb(0, 0, 0);")
-        self.label_layout.addWidget(self.label_left)
-        self.label_right = QtWidgets.QLabel(self.centralwidget)
-        self.label_right.setMinimumSize(QtCore.QSize(640, 480))
-        self.label_right.setObjectName("label_right")
-        self.label_right.setStyleSheet("background-color: rgb(0, 0, 0);")
-        self.label_layout.addWidget(self.label_right)
+        self.left_label = QtWidgets.QLabel(self.centralwidget)
+        self.left_label.setMinimumSize(QtCore.QSize(640, 480))
+        self.left_label.setObjectName("left_label")
+        self.left_label.setStyleSheet("background-color: rgb(0, 0, 0);")
+        self.label_layout.addWidget(self.left_label)
+        self.right_label = QtWidgets.QLabel(self.centralwidget)
+        self.right_label.setMinimumSize(QtCore.QSize(640, 480))
+        self.right_label.setObjectName("right_label")
+        self.right_label.setStyleSheet("background-color: rgb(0, 0, 0);")
+        self.label_layout.addWidget(self.right_label)
         self.verticalLayout.addLayout(self.label_layout)
         self.slider_layout = QtWidgets.QHBoxLayout()
         self.slider_layout.setObjectName("slider_layout")
@@ -37,6 +37,72 @@ class Ui_MainWindow(object):
         spacerItem1 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
         self.slider_layout.addItem(spacerItem1)
         self.verticalLayout.addLayout(self.slider_layout)
+        self.activity_layout = QtWidgets.QHBoxLayout()
+        self.activity_layout.setObjectName("activity_layout")
+        spacerItem5 = QtWidgets.QSpacerItem(40, 0, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.activity_layout.addItem(spacerItem5)
+        spacerItem6 = QtWidgets.QSpacerItem(40, 0, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.activity_layout.addItem(spacerItem6)
+        self.verticalLayout.addLayout(self.activity_layout)
+        self.view_layout = QtWidgets.QHBoxLayout()
+        self.view_layout.setObjectName("view_layout")
+        self.colormap_label = QtWidgets.QLabel(self.centralwidget)
+        self.colormap_label.setObjectName("colormap_label")
+        self.view_layout.addWidget(self.colormap_label)
+        self.colormap_box = QtWidgets.QComboBox(self.centralwidget)
+        self.colormap_box.setObjectName("colormap_box")
+        self.view_layout.addWidget(self.colormap_box)
+        self.range_label = QtWidgets.QLabel(self.centralwidget)
+        self.range_label.setObjectName("range_label")
+        self.view_layout.addWidget(self.range_label)
+        self.near_box = QtWidgets.QSpinBox(self.centralwidget)
+        self.near_box.setMaximum(65535)
+        self.near_box.setSingleStep(100)
+        self.near_box.setObjectName("near_box")
+        self.view_layout.addWidget(self.near_box)
+        self.far_box = QtWidgets.QSpinBox(self.centralwidget)
+        self.far_box.setMaximum(65535)
+        self.far_box.setSingleStep(100)
+        self.far_box.setObjectName("far_box")
+        self.view_layout.addWidget(self.far_box)
+        self.speed_label = QtWidgets.QLabel(self.centralwidget)
+        self.speed_label.setObjectName("speed_label")
+        self.view_layout.addWidget(self.speed_label)
+        self.speed_box = QtWidgets.QComboBox(self.centralwidget)
+        self.speed_box.setObjectName("speed_box")
+        self.view_layout.addWidget(self.speed_box)
+        self.cloud_button = QtWidgets.QPushButton(self.centralwidget)
+        self.cloud_button.setObjectName("cloud_button")
+        self.view_layout.addWidget(self.cloud_button)
+        self.filter_button = QtWidgets.QToolButton(self.centralwidget)
+        self.filter_button.setPopupMode(QtWidgets.QToolButton.InstantPopup)
+        self.filter_button.setObjectName("filter_button")
+        self.view_layout.addWidget(self.filter_button)
+        self.search_label = QtWidgets.QLabel(self.centralwidget)
+        self.search_label.setObjectName("search_label")
+        self.view_layout.addWidget(self.search_label)
+        self.search_edit = QtWidgets.QLineEdit(self.centralwidget)
+        self.search_edit.setMinimumSize(QtCore.QSize(200, 0))
+        self.search_edit.setObjectName("search_edit")
+        self.view_layout.addWidget(self.search_edit)
+        self.prev_match_button = QtWidgets.QPushButton(self.centralwidget)
+        self.prev_match_button.setObjectName("prev_match_button")
+        self.view_layout.addWidget(self.prev_match_button)
+        self.next_match_button = QtWidgets.QPushButton(self.centralwidget)
+        self.next_match_button.setObjectName("next_match_button")
+        self.view_layout.addWidget(self.next_match_button)
+        self.mark_in_button = QtWidgets.QPushButton(self.centralwidget)
+        self.mark_in_button.setObjectName("mark_in_button")
+        self.view_layout.addWidget(self.mark_in_button)
+        self.mark_out_button = QtWidgets.QPushButton(self.centralwidget)
+        self.mark_out_button.setObjectName("mark_out_button")
+        self.view_layout.addWidget(self.mark_out_button)
+        self.clip_button = QtWidgets.QPushButton(self.centralwidget)
+        self.clip_button.setObjectName("clip_button")
+        self.view_layout.addWidget(self.clip_button)
+        spacerItem4 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
+        self.view_layout.addItem(spacerItem4)
+        self.verticalLayout.addLayout(self.view_layout)
         self.control_layout = QtWidgets.QHBoxLayout()
         self.control_layout.setObjectName("control_layout")
         self.open_button = QtWidgets.QPushButton(self.centralwidget)
@@ -90,6 +156,18 @@ class Ui_MainWindow(object):
         self.play_button.setText(_translate("MainWindow", "Play"))
         self.next_button.setText(_translate("MainWindow", "Next"))
         self.quit_button.setText(_translate("MainWindow", "Quit"))
+        self.colormap_label.setText(_translate("MainWindow", "Colormap"))
+        self.range_label.setText(_translate("MainWindow", "Depth range, mm"))
+        self.speed_label.setText(_translate("MainWindow", "Speed"))
+        self.cloud_button.setText(_translate("MainWindow", "Save point cloud"))
+        self.filter_button.setText(_translate("MainWindow", "Depth filters"))
+        self.search_label.setText(_translate("MainWindow", "Find"))
+        self.search_edit.setPlaceholderText(_translate("MainWindow", "min < 800 and motion > 50"))
+        self.prev_match_button.setText(_translate("MainWindow", "Previous match"))
+        self.next_match_button.setText(_translate("MainWindow", "Next match"))
+        self.mark_in_button.setText(_translate("MainWindow", "Mark in"))
+        self.mark_out_button.setText(_translate("MainWindow", "Mark out"))
+        self.clip_button.setText(_translate("MainWindow", "Save clip"))
         self.action_open.setText(_translate("MainWindow", "Open"))
         self.actionQuit.setText(_translate("MainWindow", "Quit"))
         self.action_quit.setText(_translate("MainWindow", "Quit"))
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from player_core.oni_file import CODEC_16Z, CODEC_NONE, OniWriter  # noqa: E402
+
+WIDTH = 16
+HEIGHT = 12
+FRAMES = 20
+
+
+def depth_frame(i):
+    yy, xx = np.mgrid[0:HEIGHT, 0:WIDTH]
+    depth = (1000 + 10 * i + 7 * xx + 3 * yy).astype(np.uint16)
+    depth[(xx + yy + i) % 9 == 0] = 0
+    return depth
+
+
+def color_frame(i):
+    color = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    color[..., 0] = i
+    color[..., 1] = np.arange(WIDTH, dtype=np.uint8)
+    return color
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """ A small 16z/raw .oni file of FRAMES frame pairs, 100 ms apart. """
+    path = str(tmp_path / 'source.oni')
+    with OniWriter(path, WIDTH, HEIGHT, fps=10, depth_codec=CODEC_16Z, color_codec=CODEC_NONE) as writer:
+        for i in range(FRAMES):
+            writer.write(depth_frame(i), color_frame(i))
+    return path
@@ -0,0 +1,54 @@
+import numpy as np
+
+from player_core.cache import FrameCache
+
+MB = 1024 * 1024
+
+
+def frame(value, size=MB):
+    return np.full(size, value, dtype=np.uint8)
+
+
+def test_evicts_least_recently_used():
+    cache = FrameCache(budget_mb=3)
+    for i in range(3):
+        cache.put('depth', i, frame(i))
+    assert cache.get('depth', 0) is not None
+    cache.put('depth', 3, frame(3))
+    assert ('depth', 1) not in cache
+    assert [key for key in cache.frames] == [('depth', 2), ('depth', 0), ('depth', 3)]
+    assert cache.size == 3 * MB
+
+
+def test_stores_private_copies():
+    cache = FrameCache(budget_mb=1)
+    source = frame(1, 16)
+    cache.put('color', 1, source)
+    source[:] = 9
+    assert cache.get('color', 1).tolist() == [1] * 16
+
+
+def test_replacing_a_frame_keeps_the_size_right():
+    cache = FrameCache(budget_mb=1)
+    cache.put('depth', 1, frame(1, 100))
+    cache.put('depth', 1, frame(2, 300))
+    assert len(cache) == 1
+    assert cache.size == 300
+
+
+def test_frame_larger_than_budget_is_not_kept():
+    cache = FrameCache(budget_mb=1)
+    cache.put('depth', 1, frame(1, 100))
+    assert cache.put('depth', 2, frame(2, 2 * MB)) is not None
+    assert ('depth', 2) not in cache
+    assert ('depth', 1) in cache
+
+
+def test_hit_ratio_and_clear():
+    cache = FrameCache(budget_mb=1)
+    cache.put('depth', 1, frame(1, 10))
+    cache.get('depth', 1)
+    cache.get('depth', 2)
+    assert cache.hit_ratio == 0.5
+    cache.clear()
+    assert len(cache) == 0 and cache.size == 0
@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import FRAMES, HEIGHT, WIDTH, color_frame, depth_frame
+from player_core import clip, oni_file
+from player_core.opener import Cancelled
+
+
+def node_added_counts(path, node_id):
+    """ Frame count, timestamp range and seek table position of a node-added record. """
+    with open(path, 'rb') as f:
+        buf = f.read()
+    offset = oni_file.FILE_HEADER.size
+    while True:
+        _, record_type, record_node, fields_size, payload_size, _ = oni_file.RECORD_HEADER.unpack_from(buf, offset)
+        if record_type == oni_file.RECORD_NODE_ADDED and record_node == node_id:
+            fields = offset + oni_file.RECORD_HEADER.size
+            name_size = oni_file.UINT32.unpack_from(buf, fields)[0] + oni_file.UINT32.size
+            return clip.NODE_ADDED_COUNTS.unpack_from(buf, fields + name_size + 8)
+        offset += fields_size + payload_size
+
+
+def test_copy_records(recording, tmp_path):
+    target = str(tmp_path / 'clip.oni')
+    clip.copy_records(recording, target, 5, 9)
+
+    copied = oni_file.OniRecording(target)
+    try:
+        depth = copied.node(oni_file.NODE_TYPE_DEPTH)
+        color = copied.node(oni_file.NODE_TYPE_IMAGE)
+        assert len(depth.frames) == len(color.frames) == 5
+        assert depth.frames['number'].tolist() == [1, 2, 3, 4, 5]
+        assert depth.frames['timestamp'].tolist() == [i * 100000 for i in range(4, 9)]
+        assert depth.video_mode.resolutionX == WIDTH
+        for i in range(5):
+            values = oni_file.decompress_16z(copied.payload(depth, i), WIDTH * HEIGHT)
+            assert np.array_equal(values.reshape(HEIGHT, WIDTH), depth_frame(i + 4))
+            pixels = np.frombuffer(copied.payload(color, i), dtype=np.uint8).reshape(HEIGHT, WIDTH, 3)
+            assert np.array_equal(pixels, color_frame(i + 4))
+        assert copied.max_timestamp == 800000
+        for node in (depth, color):
+            assert node_added_counts(target, node.node_id) == (5, 400000, 800000, 0)
+    finally:
+        copied.close()
+
+
+def test_whole_recording(recording, tmp_path):
+    target = str(tmp_path / 'clip.oni')
+    clip.save_clip(recording, target, 1, FRAMES)
+    source = oni_file.OniRecording(recording)
+    copied = oni_file.OniRecording(target)
+    try:
+        for node_type in (oni_file.NODE_TYPE_DEPTH, oni_file.NODE_TYPE_IMAGE):
+            a, b = source.node(node_type), copied.node(node_type)
+            assert a.frames['timestamp'].tolist() == b.frames['timestamp'].tolist()
+            assert all(bytes(source.payload(a, i)) == bytes(copied.payload(b, i)) for i in range(FRAMES))
+    finally:
+        source.close()
+        copied.close()
+
+
+@pytest.mark.parametrize('start, end', [(0, 3), (5, 4), (1, FRAMES + 1)])
+def test_frames_out_of_range(recording, tmp_path, start, end):
+    with pytest.raises(ValueError):
+        clip.copy_records(recording, str(tmp_path / 'clip.oni'), start, end)
+
+
+def test_cancel_leaves_nothing(recording, tmp_path):
+    def cancel(done, total):
+        raise Cancelled()
+
+    target = str(tmp_path / 'clip.oni')
+    with pytest.raises(Cancelled):
+        clip.save_clip(recording, target, 2, 10, progress=cancel)
+    assert os.listdir(tmp_path) == ['source.oni']
+
+
+def test_cancel_while_indexing(recording, tmp_path, monkeypatch):
+    monkeypatch.setattr(oni_file, 'PROGRESS_RECORDS', 1)
+    totals = []
+
+    def cancel(done, total):
+        totals.append(total)
+        raise Cancelled()
+
+    with pytest.raises(Cancelled):
+        clip.save_clip(recording, str(tmp_path / 'clip.oni'), 2, 10, progress=cancel)
+    # Stopped in the frame index, which reports bytes of the source.
+    assert totals == [os.path.getsize(recording)]
+    assert os.listdir(tmp_path) == ['source.oni']
+
+
+def test_clip_job(recording, tmp_path):
+    target = str(tmp_path / 'clip.oni')
+    job = clip.ClipJob(recording, target, 3, 6)
+    job.start()
+    assert job.finished.wait(10)
+    assert job.error is None
+    assert os.path.exists(target)
@@ -0,0 +1,39 @@
+import cv2
+import numpy as np
+import pytest
+
+from player_core.colorize import COLORMAPS, DepthColorizer, colormap_table
+
+
+@pytest.mark.parametrize('colormap', COLORMAPS)
+def test_lut_spans_near_to_far(colormap):
+    colorizer = DepthColorizer(1000, 2020, colormap)
+    table = colormap_table(colormap)
+    lut = colorizer.lut
+    assert lut.shape == (65536, 3) and lut.dtype == np.uint8
+    assert lut[0].tolist() == [0, 0, 0]
+    assert np.array_equal(lut[1], table[0]) and np.array_equal(lut[1000], table[0])
+    assert np.array_equal(lut[1510], table[127])
+    assert np.array_equal(lut[2020], table[255]) and np.array_equal(lut[65535], table[255])
+
+
+def test_tables_are_rgb():
+    assert colormap_table('linear')[200].tolist() == [200, 200, 200]
+    bgr = cv2.applyColorMap(np.array([[30]], dtype=np.uint8), cv2.COLORMAP_JET)[0, 0]
+    assert colormap_table('jet')[30].tolist() == bgr[::-1].tolist()
+
+
+def test_render_fills_the_buffer_given():
+    colorizer = DepthColorizer(500, 4500, 'turbo')
+    depth = np.array([[0, 500, 2500], [4500, 9000, 1234]], dtype=np.uint16)
+    out = np.full((2, 3, 3), 7, dtype=np.uint8)
+    assert colorizer.render(depth, out) is out
+    assert np.array_equal(out, colorizer.lut[depth])
+    assert np.array_equal(colorizer.render(depth), out)
+
+
+def test_configure_keeps_what_is_not_given():
+    colorizer = DepthColorizer(400, 4500, 'jet')
+    colorizer.configure(far=1400)
+    assert (colorizer.near, colorizer.far, colorizer.colormap) == (400, 1400, 'jet')
+    assert np.array_equal(colorizer.lut, DepthColorizer(400, 1400, 'jet').lut)
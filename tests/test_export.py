@@ -0,0 +1,44 @@
+import os
+
+import cv2
+import numpy as np
+
+from conftest import FRAMES, HEIGHT, WIDTH, color_frame, depth_frame
+from player_core import export
+from player_core.oni_file import CODEC_16Z, CODEC_NONE, OniWriter
+
+
+def test_npz_chunks(recording, tmp_path):
+    out = str(tmp_path / 'out')
+    export.main([recording, '--out', out, '--format', 'npz', '--jobs', '2', '--chunk', '8'])
+    out_dir = os.path.join(out, 'source')
+    assert sorted(os.listdir(out_dir)) == ['frames_000001.npz', 'frames_000009.npz', 'frames_000017.npz']
+    positions = []
+    for name in sorted(os.listdir(out_dir)):
+        with np.load(os.path.join(out_dir, name)) as data:
+            for position, depth, color in zip(data['positions'], data['depth'], data['color']):
+                assert np.array_equal(depth, depth_frame(position - 1))
+                assert np.array_equal(color, color_frame(position - 1))
+            positions.extend(data['positions'].tolist())
+    assert positions == list(range(1, FRAMES + 1))
+
+
+def test_png_depth_is_lossless(recording, tmp_path):
+    out = str(tmp_path / 'out')
+    export.main([recording, '--out', out, '--format', 'png', '--jobs', '1'])
+    depth = cv2.imread(os.path.join(out, 'source', 'depth_000005.png'), cv2.IMREAD_UNCHANGED)
+    assert depth.dtype == np.uint16
+    assert np.array_equal(depth, depth_frame(4))
+    assert len(os.listdir(os.path.join(out, 'source'))) == 3 * FRAMES
+
+
+def test_empty_recording_is_skipped(recording, tmp_path, capsys):
+    empty = str(tmp_path / 'empty.oni')
+    with OniWriter(empty, WIDTH, HEIGHT, fps=10, depth_codec=CODEC_16Z, color_codec=CODEC_NONE):
+        pass
+    out = str(tmp_path / 'out')
+    export.main([empty, recording, '--out', out, '--format', 'npz', '--jobs', '1'])
+    printed = capsys.readouterr().out
+    assert f'{empty}: no frames, skipped' in printed
+    assert f'total: {FRAMES} frames from 2 files' in printed
+    assert os.listdir(out) == ['source']
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from player_core.filters import DepthFilters, HoleFill, SpatialSmooth, TemporalEma, TemporalMedian
+
+
+def flat(value, shape=(8, 8)):
+    return np.full(shape, value, dtype=np.float32)
+
+
+def test_hole_fill_takes_the_farthest_neighbour():
+    depth = flat(1000)
+    depth[:, 4:] = 2000
+    depth[3, 3:5] = 0
+    out = HoleFill(size=3, passes=1).apply(depth)
+    assert out[3, 3] == 2000 and out[3, 4] == 2000
+    assert not np.any(out == 0)
+
+
+def test_spatial_smooth_keeps_holes():
+    depth = flat(1500) + np.arange(8, dtype=np.float32)
+    depth[2, 2] = 0
+    out = SpatialSmooth().apply(depth.copy())
+    assert out[2, 2] == 0
+    assert np.all(out[depth > 0] > 0)
+
+
+def test_ema_blends_small_changes_and_replaces_large_ones():
+    ema = TemporalEma(alpha=0.5, delta=100)
+    ema.apply(flat(1000))
+    frame = flat(1040)
+    frame[0, 0] = 3000
+    frame[0, 1] = 0
+    out = ema.apply(frame)
+    assert out[4, 4] == 1020
+    assert out[0, 0] == 3000
+    # A pixel missing in the new frame keeps its average.
+    assert out[0, 1] == 1000
+
+
+def test_median_of_the_window():
+    median = TemporalMedian(window=3)
+    for value in (1000, 5000):
+        median.apply(flat(value))
+    out = median.apply(flat(1100))
+    assert np.all(out == 1100)
+    # 1000 has left the window: median of 5000, 1100 and 900.
+    out = median.apply(flat(900))
+    assert np.all(out == 1100)
+
+
+def test_median_window_must_be_odd():
+    with pytest.raises(ValueError):
+        TemporalMedian(window=4)
+
+
+def test_depth_filters_order_and_output():
+    filters = DepthFilters(('median', 'holes'))
+    assert filters.names == ('holes', 'median')
+    depth = np.full((8, 8), 1200, dtype=np.uint16)
+    depth[1, 1] = 0
+    out = filters.apply(depth, 1)
+    assert out.dtype == np.uint16
+    assert np.all(out == 1200)
+    assert depth[1, 1] == 0
+
+
+def test_no_filters_pass_the_frame_through():
+    filters = DepthFilters()
+    depth = np.zeros((2, 2), dtype=np.uint16)
+    assert not filters
+    assert filters.apply(depth, 1) is depth
+
+
+def test_temporal_filters_restart_after_a_jump():
+    filters = DepthFilters(('ema',))
+    filters.apply(np.full((4, 4), 1000, dtype=np.uint16), 1)
+    assert np.all(filters.apply(np.full((4, 4), 1050, dtype=np.uint16), 2) < 1050)
+    assert np.all(filters.apply(np.full((4, 4), 1050, dtype=np.uint16), 10) == 1050)
@@ -0,0 +1,70 @@
+import struct
+
+import numpy as np
+import pytest
+
+from conftest import FRAMES, HEIGHT, WIDTH, color_frame, depth_frame
+from player_core import oni_file
+from player_core.oni_file import compress_16z, decompress_16z
+
+
+def payload(first, *tokens):
+    return struct.pack('<H', first) + bytes(tokens)
+
+
+@pytest.mark.parametrize('values', [
+    [0],
+    [1234, 1234],
+    [500, 501, 499, 505, 0, 0, 0, 7000, 7001, 100],
+    list(range(0, 32000, 997)),
+])
+def test_16z_round_trip(values):
+    values = np.array(values, dtype=np.uint16)
+    assert np.array_equal(decompress_16z(compress_16z(values), len(values)), values)
+
+
+def test_16z_round_trip_random():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        count = int(rng.integers(2, 2000))
+        values = np.cumsum(rng.integers(-80, 80, count)).clip(0, 0x7FFF).astype(np.uint16)
+        values[rng.random(count) < 0.2] = 0
+        assert np.array_equal(decompress_16z(compress_16z(values), count), values)
+
+
+def test_16z_tokens():
+    # Two 4-bit deltas, then a padded one: 500 -0 -1, -(-1).
+    assert decompress_16z(payload(500, 0x67, 0x5D), 4).tolist() == [500, 500, 499, 500]
+    # A run of 2 * 0x1E unchanged values; 0xFE is the longest.
+    assert decompress_16z(payload(42, 0xFE), 61).tolist() == [42] * 61
+    # A 4-bit delta then a 7-bit one, and an absolute value after 0xFF.
+    assert decompress_16z(payload(100, 0x6F, 0xC0 + 5, 0xFF, 0x12, 0x34), 4).tolist() == [100, 100, 95, 0x1234]
+    # Missing values are zero, extra ones are cut off.
+    assert decompress_16z(payload(7, 0x66), 5).tolist() == [7, 7, 7, 0, 0]
+    assert decompress_16z(payload(7, 0x66), 2).tolist() == [7, 7]
+
+
+def test_16z_vga_frame():
+    rng = np.random.default_rng(1)
+    depth = (1500 + np.cumsum(rng.integers(-8, 9, 640 * 480))).clip(0, 9000).astype(np.uint16)
+    depth[rng.random(depth.size) < 0.1] = 0
+    assert np.array_equal(decompress_16z(compress_16z(depth), depth.size), depth)
+
+
+def test_writer_round_trip(recording):
+    source = oni_file.OniRecording(recording)
+    try:
+        depth = source.node(oni_file.NODE_TYPE_DEPTH)
+        color = source.node(oni_file.NODE_TYPE_IMAGE)
+        assert len(depth.frames) == len(color.frames) == FRAMES
+        assert depth.frames['timestamp'].tolist() == [i * 100000 for i in range(FRAMES)]
+        assert depth.frames['number'].tolist() == list(range(1, FRAMES + 1))
+        mode = depth.video_mode
+        assert (mode.resolutionX, mode.resolutionY) == (WIDTH, HEIGHT)
+        for i in (0, 7, FRAMES - 1):
+            values = decompress_16z(source.payload(depth, i), WIDTH * HEIGHT)
+            assert np.array_equal(values.reshape(HEIGHT, WIDTH), depth_frame(i))
+            pixels = np.frombuffer(source.payload(color, i), dtype=np.uint8).reshape(HEIGHT, WIDTH, 3)
+            assert np.array_equal(pixels, color_frame(i))
+    finally:
+        source.close()
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from player_core.playback import PlaybackEngine
+from player_core.sync import SyncTable
+
+
+class Frame:
+    def __init__(self, number, timestamp):
+        self.number = number
+        self.timestamp = timestamp
+
+
+class SharedDevice:
+
+    """ Like an OpenNI file device: seeking one stream moves every stream to that time. """
+
+    def __init__(self, **timestamps):
+        self.timestamps = timestamps
+        self.cursors = dict.fromkeys(timestamps, 0)
+
+
+class Stream:
+    def __init__(self, device, name):
+        self.device = device
+        self.name = name
+
+    def get_number_of_frames(self):
+        return len(self.device.timestamps[self.name])
+
+    def read_frame(self):
+        i = self.device.cursors[self.name]
+        self.device.cursors[self.name] += 1
+        return Frame(i + 1, self.device.timestamps[self.name][i])
+
+
+class Support:
+    speed = 1.0
+
+    def __init__(self, device):
+        self.device = device
+
+    def seek(self, stream, position):
+        at = self.device.timestamps[stream.name][position - 1]
+        for name, timestamps in self.device.timestamps.items():
+            self.device.cursors[name] = int(np.searchsorted(timestamps, at))
+
+
+def engine_for(depth, color):
+    device = SharedDevice(depth=depth, color=color)
+    sync = SyncTable(depth, color)
+    return PlaybackEngine(Stream(device, 'depth'), Stream(device, 'color'), Support(device), 1, sync), sync
+
+
+@pytest.mark.parametrize('color', [
+    np.arange(100) * 33333 + 500,
+    np.delete(np.arange(100) * 33333 + 500, [10, 11, 40]),
+    np.arange(200) * 16666 + 500,
+])
+def test_pairs_survive_a_shared_playback_position(color):
+    depth = np.arange(100) * 33333
+    engine, sync = engine_for(depth, color)
+    positions = list(range(1, 60)) + [80, 81, 82, 20, 21, 5] + list(range(60, 101))
+    for position in positions:
+        depth_frame, color_frame = engine.read_at(position)
+        assert depth_frame.number == position
+        assert color_frame.number == sync.color_position(position)
+
+
+def test_sequential_reads_do_not_seek():
+    depth = np.arange(50) * 33333
+    engine, _ = engine_for(depth, depth + 500)
+    engine.seek(1)
+    engine.read()
+    engine.read()
+    # Depth, color, then depth put back where the color seek left it.
+    assert engine.seeks == 3
+    for _ in range(48):
+        engine.read()
+    assert engine.seeks == 3
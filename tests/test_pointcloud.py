@@ -0,0 +1,69 @@
+import math
+import os
+
+import numpy as np
+
+from conftest import color_frame, depth_frame
+from player_core import pointcloud
+from player_core.pointcloud import RayGrid, voxel_downsample
+
+
+def test_rays_follow_the_field_of_view():
+    grid = RayGrid(4, 2, math.pi / 2, math.pi / 2)
+    points, colors = grid.points(np.full((2, 4), 1000, dtype=np.uint16))
+    assert colors is None
+    assert np.allclose(points[:4, 0], [-750, -250, 250, 750])
+    assert np.allclose(points[:, 1], [500] * 4 + [-500] * 4)
+    assert np.all(points[:, 2] == 1000)
+
+
+def test_holes_are_left_out_and_colors_follow():
+    depth = depth_frame(3)
+    grid = RayGrid(depth.shape[1], depth.shape[0], 1.0, 0.8)
+    color = color_frame(3)
+    points, colors = grid.points(depth, color)
+    valid = depth > 0
+    assert len(points) == len(colors) == valid.sum()
+    assert np.array_equal(points[:, 2], depth[valid])
+    assert np.array_equal(colors, color[valid])
+    # A color frame of another size is resampled to depth first.
+    _, halved = grid.points(depth, color[::2, ::2])
+    assert len(halved) == valid.sum()
+
+
+def test_stride():
+    depth = np.full((12, 16), 1500, dtype=np.uint16)
+    points, _ = RayGrid(16, 12, 1.0, 0.8, stride=4).points(depth)
+    assert len(points) == 4 * 3
+
+
+def test_voxel_downsample_averages_each_cell():
+    points = np.array([[1, 1, 1], [3, 3, 3], [25, 1, 1]], dtype=np.float32)
+    colors = np.array([[0, 0, 0], [100, 50, 10], [7, 7, 7]], dtype=np.uint8)
+    points, colors = voxel_downsample(points, colors, voxel=10)
+    order = np.argsort(points[:, 0])
+    assert np.allclose(points[order], [[2, 2, 2], [25, 1, 1]])
+    assert colors[order].tolist() == [[50, 25, 5], [7, 7, 7]]
+
+
+def test_ply_and_npy(tmp_path):
+    points = np.array([[1, 2, 3], [4, 5, 6]], dtype=np.float32)
+    colors = np.array([[10, 20, 30], [40, 50, 60]], dtype=np.uint8)
+    pointcloud.save(str(tmp_path / 'cloud.npy'), points, colors)
+    cloud = np.load(tmp_path / 'cloud.npy')
+    assert cloud['z'].tolist() == [3, 6] and cloud['blue'].tolist() == [30, 60]
+
+    pointcloud.save(str(tmp_path / 'cloud.ply'), points)
+    data = (tmp_path / 'cloud.ply').read_bytes()
+    header, body = data.split(b'end_header\n')
+    assert b'element vertex 2\n' in header and b'property uchar red' not in header
+    assert np.array_equal(np.frombuffer(body, np.float32).reshape(2, 3), points)
+
+
+def test_export_range(recording, tmp_path):
+    out = str(tmp_path / 'clouds')
+    pointcloud.main([recording, '--out', out, '--format', 'npy', '--start', '3', '--end', '5'])
+    names = sorted(os.listdir(os.path.join(out, 'source')))
+    assert names == ['cloud_000003.npy', 'cloud_000004.npy', 'cloud_000005.npy']
+    cloud = np.load(os.path.join(out, 'source', names[0]))
+    assert np.array_equal(cloud['z'], depth_frame(2)[depth_frame(2) > 0])
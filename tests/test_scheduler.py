@@ -0,0 +1,34 @@
+import time
+
+import numpy as np
+
+from player_core.scheduler import PlaybackClock
+
+
+def test_clock_delay_does_not_mark_frames_shown():
+    clock = PlaybackClock(fps=10)
+    clock.start(5)
+    assert 0.25 < clock.delay(8) <= 0.3
+    assert clock.shown == 5
+    clock.mark_shown(8)
+    assert clock.shown == 8
+
+
+def test_clock_restarts_on_wrap_around():
+    clock = PlaybackClock(fps=10)
+    clock.start(50)
+    assert clock.delay(2) == 0.0
+    clock.mark_shown(2)
+    assert clock.origin[0] == 2
+    assert clock.delay(3) > 0.05
+
+
+def test_due_position_at_the_end():
+    clock = PlaybackClock(np.arange(10) * 100000)
+    clock.start(9)
+    time.sleep(0.15)
+    assert clock.due_position(9) == 10
+    clock.start(1)
+    assert clock.due_position(1) == 1
+    clock.stop()
+    assert clock.due_position(1) is None
@@ -0,0 +1,78 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from conftest import FRAMES, depth_frame
+from player_core import backends
+from player_core.scheduler import SKIP_THRESHOLD
+from player_core.session import PlaybackSession
+
+
+class Recorder:
+
+    """ Stands in for stream.FramePublisher, keeping what it is sent. """
+
+    def __init__(self):
+        self.frames = []
+
+    def publish(self, index, depth, color, depth_timestamp=0, color_timestamp=0):
+        self.frames.append((index, depth, depth_timestamp))
+
+    def indexes(self):
+        return [index for index, _, _ in self.frames]
+
+
+def wait_for(recorder, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while len(recorder.frames) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Long enough for anything published by mistake to show up too.
+    time.sleep(0.3)
+
+
+@pytest.fixture
+def session(recording):
+    recorder = Recorder()
+    session = PlaybackSession.open(backends.device_class('native'), os.fsencode(recording), publisher=recorder)
+    yield session
+    session.close()
+
+
+def test_publishes_the_frames_shown(session):
+    recorder = session.publisher
+    for _ in session.frames():
+        pass
+    # Let the prefetcher read past the end and wrap around; none of that is shown.
+    time.sleep(0.2)
+    session.seek(5)
+    session.seek(5)
+    for _ in session.frames(10, 12):
+        pass
+    expected = list(range(session.first_frame, FRAMES + 1)) + [5, 10, 11, 12]
+    wait_for(recorder, len(expected))
+    assert recorder.indexes() == expected
+    for index, depth, _ in recorder.frames:
+        assert np.array_equal(depth, depth_frame(index - 1))
+    # The first frame is shown before the timestamp index is attached.
+    assert all(timestamp == (index - 1) * 100000 for index, _, timestamp in recorder.frames[1:])
+
+
+def test_late_frames_are_dropped_and_skipped(session):
+    session.play()
+    # The display stalls while the clock runs on: the ring holds frames long overdue.
+    time.sleep(1.2)
+    shown = []
+    while len(shown) < 3:
+        slot, wait = session.next_due(timeout=1)
+        if slot is None:
+            time.sleep(wait or 0)
+            continue
+        shown.append(slot.index)
+        session.release(slot)
+    session.pause()
+    assert session.clock.dropped > 0
+    assert session.clock.skipped > 0
+    assert shown == sorted(shown)
+    assert shown[0] > session.first_frame + SKIP_THRESHOLD
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from conftest import FRAMES
+from player_core.backends import close_recording, open_recording
+from player_core.stats import COLUMNS, HISTOGRAM_BINS, FrameStats, frame_stats
+
+
+@pytest.fixture
+def stats():
+    columns = {name: np.zeros(6, dtype=np.float32) for name in COLUMNS}
+    columns['min'][:] = [900, 700, 750, 1200, 600, 800]
+    columns['valid'][:] = [0.9, 0.4, 0.8, 0.9, 0.7, 0.2]
+    return FrameStats(columns, np.zeros((6, HISTOGRAM_BINS), dtype=np.uint32))
+
+
+def test_select(stats):
+    assert stats.select('min < 800').tolist() == [False, True, True, False, True, False]
+    assert stats.select('min < 800 and valid > 0.5').tolist() == [False, False, True, False, True, False]
+    assert stats.select('min >= 1200').tolist() == [False, False, False, True, False, False]
+
+
+@pytest.mark.parametrize('query', ['min <', 'depth > 3', 'min ~ 3'])
+def test_select_rejects_bad_queries(stats, query):
+    with pytest.raises(ValueError):
+        stats.select(query)
+
+
+def test_next_and_prev_match(stats):
+    mask = stats.select('min < 800')
+    # Frames 2, 3 and 5 match (1-based).
+    assert FrameStats.next_match(mask, 1) == 2
+    assert FrameStats.next_match(mask, 3) == 5
+    assert FrameStats.next_match(mask, 5) is None
+    assert FrameStats.prev_match(mask, 5) == 3
+    assert FrameStats.prev_match(mask, 2) is None
+
+
+def test_frame_stats_skip_holes():
+    depth = np.array([[0, 1000], [2000, 0]], dtype=np.uint16)
+    low, high, mean, valid, histogram, _ = frame_stats(depth)
+    assert (low, high, mean, valid) == (1000, 2000, 1500, 0.5)
+    assert histogram.sum() == 2
+
+
+def test_build_reads_unpaced(recording):
+    device, engine = open_recording(recording, 'native', sync=False)
+    try:
+        support = engine.playback_support
+        support.speed = 1.0
+        speeds = []
+        read_frame = engine.depth_stream.read_frame
+
+        def read():
+            speeds.append(support.speed)
+            return read_frame()
+
+        engine.depth_stream.read_frame = read
+        stats = FrameStats.build(engine.depth_stream, support)
+        assert speeds == [-1] * FRAMES
+        assert support.speed == 1.0
+        assert len(stats.columns['min']) == FRAMES
+        assert stats.columns['max'][0] > stats.columns['min'][0] > 0
+    finally:
+        close_recording(device, engine)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from conftest import FRAMES, color_frame, depth_frame
+from player_core import store
+from player_core.backends import close_recording, open_recording
+from player_core.convert import color_array, depth_array
+
+
+def test_shuffle_round_trip():
+    block = np.arange(3 * 4 * 5, dtype=np.uint16).reshape(3, 4, 5) * 257
+    assert np.array_equal(store.unshuffle(store.shuffle(block), block.shape), block)
+
+
+@pytest.mark.parametrize('codec_name', store.available_codecs())
+@pytest.mark.parametrize('chunk', [1, 3])
+def test_transcode_round_trip(recording, tmp_path, codec_name, chunk):
+    target = str(tmp_path / 'source.oniz')
+    assert store.transcode(recording, target, chunk=chunk, codec_name=codec_name, jobs=2) == target
+    assert store.is_store(target)
+    device, engine = open_recording(target, 'native')
+    try:
+        assert engine.last_frame == FRAMES
+        assert engine.depth_stream.timestamps().tolist() == [i * 100000 for i in range(FRAMES)]
+        # Sequential reads, then seeks landing in the middle of chunks.
+        for position in list(range(1, FRAMES + 1)) + [7, 2, 19, 11]:
+            depth, color = engine.read_at(position)
+            assert np.array_equal(depth_array(depth), depth_frame(position - 1))
+            assert np.array_equal(color_array(color), color_frame(position - 1))
+    finally:
+        close_recording(device, engine)
+
+
+def test_transcode_a_range(recording, tmp_path):
+    target = str(tmp_path / 'range.oniz')
+    done = []
+    store.transcode(recording, target, chunk=4, codec_name='zlib', start=6, end=15,
+                    progress=lambda frames, total: done.append((frames, total)))
+    assert done == [(0, 10), (4, 10), (8, 10)]
+    device, engine = open_recording(target, 'native')
+    try:
+        assert engine.last_frame == 10
+        depth, _ = engine.read_at(1)
+        assert np.array_equal(depth_array(depth), depth_frame(5))
+        assert engine.depth_stream.timestamps()[0] == 500000
+    finally:
+        close_recording(device, engine)
+
+
+def test_not_a_store(recording):
+    assert not store.is_store(recording)
@@ -0,0 +1,75 @@
+import os
+import time
+from multiprocessing import resource_tracker
+
+import numpy as np
+import pytest
+
+from player_core import stream
+
+
+def frame_pair(index, shape=(12, 16)):
+    depth = np.full(shape, 1000 + index, dtype=np.uint16)
+    color = np.full(shape + (3,), index, dtype=np.uint8)
+    return depth, color
+
+
+@pytest.fixture
+def ring_name():
+    return f'oni_test_{os.getpid()}'
+
+
+@pytest.mark.parametrize('shape', [(12, 16), (5, 3)])
+def test_shared_ring(ring_name, shape, monkeypatch):
+    # The reader would unregister the segment the writer in this same process registered.
+    monkeypatch.setattr(resource_tracker, 'unregister', lambda name, rtype: None)
+    ring = stream.SharedRing(ring_name, shape, shape, capacity=4)
+    reader = None
+    try:
+        for i in range(1, 7):
+            ring.write(i, *frame_pair(i, shape), i * 100, i * 100 + 5)
+        assert ring.slot_size % 8 == 0
+        reader = stream.SharedRingReader(ring_name)
+        assert reader.latest() == 6
+        # Four slots: frames 1 and 2 have been written over.
+        assert reader.read(2) is None
+        frame = reader.read(5)
+        assert (frame.index, frame.depth_timestamp, frame.color_timestamp) == (5, 500, 505)
+        assert np.array_equal(frame.depth, frame_pair(5, shape)[0])
+        assert np.array_equal(frame.color, frame_pair(5, shape)[1])
+        assert reader.intact(5)
+        del frame
+    finally:
+        if reader is not None:
+            reader.close()
+        ring.close()
+
+
+def test_publisher_sends_to_a_subscriber(tmp_path):
+    publisher = stream.FramePublisher()
+    address = f'unix:{tmp_path / "frames.sock"}'
+    publisher.serve(address)
+    client = stream.StreamClient(address, policy='block', timeout=5)
+    try:
+        deadline = time.monotonic() + 5
+        while not publisher.subscribers and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert publisher
+        for i in range(1, 6):
+            publisher.publish(i, *frame_pair(i), i * 100, i * 100 + 5)
+        for i in range(1, 6):
+            frame = client.receive()
+            assert (frame.index, frame.depth_timestamp, frame.color_timestamp, frame.dropped) == (i, i * 100, i * 100 + 5, 0)
+            assert np.array_equal(frame.depth, frame_pair(i)[0])
+            assert np.array_equal(frame.color, frame_pair(i)[1])
+    finally:
+        publisher.close()
+        client.close()
+
+
+def test_drop_policy_keeps_the_newest():
+    subscriber = stream.Subscriber(None, False, 'drop', 2)
+    for i in range(1, 4):
+        subscriber.offer(stream.Packet(i, *frame_pair(i), 0, 0))
+    assert [packet.index for packet in subscriber.queue] == [2, 3]
+    assert subscriber.dropped == 1
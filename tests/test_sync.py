@@ -0,0 +1,49 @@
+import numpy as np
+
+from player_core.sync import SyncTable, count_dropped
+
+
+def test_pairs_nearest_color_frame():
+    depth = [0, 33000, 66000, 100000]
+    color = [1000, 30000, 70000, 99000]
+    table = SyncTable(depth, color)
+    assert [table.color_position(p) for p in range(1, 5)] == [1, 2, 3, 4]
+    assert table.max_drift == 4000
+    assert table.repeated_color == table.skipped_color == 0
+
+
+def test_ties_go_to_the_earlier_frame():
+    table = SyncTable([50], [0, 100])
+    assert table.color_position(1) == 1
+
+
+def test_dropped_color_repeats_and_extra_color_is_skipped():
+    depth = np.arange(10) * 33333
+    color = np.delete(np.arange(10) * 33333 + 500, [4])
+    table = SyncTable(depth, color)
+    # Depth frame 5 has no color of its own; the closest is frame 4 (index 3).
+    assert table.color_position(5) in (4, 5)
+    assert table.repeated_color == 1
+    assert table.skipped_color == 0
+    assert table.dropped_color == 1
+
+    extra = SyncTable(np.arange(5) * 66666, np.arange(10) * 33333)
+    assert [extra.color_position(p) for p in range(1, 6)] == [1, 3, 5, 7, 9]
+    assert extra.skipped_color == 5
+
+
+def test_unsorted_color_timestamps():
+    table = SyncTable([0, 100, 200], [210, 5, 95])
+    assert [table.color_position(p) for p in (1, 2, 3)] == [2, 3, 1]
+
+
+def test_timestamps_of_a_pair():
+    table = SyncTable([0, 100, 200], [10, 90, 260])
+    assert table.timestamps(2) == (100, 90)
+    assert table.timestamps(3) == (200, 260)
+
+
+def test_count_dropped():
+    assert count_dropped(np.array([0, 100, 200, 300])) == 0
+    assert count_dropped(np.array([0, 100, 200, 500, 600])) == 2
+    assert count_dropped(np.array([0, 100])) == 0